@@ -1,24 +1,39 @@
 from flask import Flask
 from flask_cors import CORS
+from app.config import config, DevelopmentConfig, engine_options, is_sqlite, register_sqlite_pragmas
 from app.models import db
+from app.utils import current_user, fastjson, compression
+from app.services import pubsub, outbox, retention, categories, group_deletion
+from app.migrations import migrate
 from app.routes.auth import auth_bp
 from app.routes.dashboard import dashboard_bp
 from app.routes.expenses import expenses_bp
 from app.routes.groups import groups_bp
 from app.routes.wallet import wallet_bp
 from app.routes.notifications import notifications_bp
+from app.routes.analytics import analytics_bp
 
 def create_app(config_name='development'):
     app = Flask(__name__)
     
     # Configuration
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///penny_pals.db'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SECRET_KEY'] = 'your-secret-key-change-in-production'
+    app.config.from_object(config.get(config_name, DevelopmentConfig))
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
     
     # Initialize extensions
     db.init_app(app)
+    if is_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+        with app.app_context():
+            register_sqlite_pragmas(db.engine, app.config)
     CORS(app, supports_credentials=True)
+    fastjson.configure(app)
+    compression.configure(app)
+    current_user.configure(app)
+    pubsub.configure(app)
+    outbox.configure(app)
+    retention.configure(app)
+    categories.configure(app)
+    group_deletion.configure(app)
     
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api')
@@ -27,6 +42,7 @@ def create_app(config_name='development'):
     app.register_blueprint(groups_bp, url_prefix='/api')
     app.register_blueprint(wallet_bp, url_prefix='/api')
     app.register_blueprint(notifications_bp, url_prefix='/api')
+    app.register_blueprint(analytics_bp, url_prefix='/api')
     
     # Error handlers
     @app.errorhandler(404)
@@ -37,13 +53,27 @@ def create_app(config_name='development'):
     def internal_error(error):
         return {'error': 'Internal server error'}, 500
     
-    # Create tables and seed data
+    # Create tables, apply pending migrations and seed data. init_db queries the
+    # models, so without AUTO_MIGRATE it is left to migrate.py, after migrating
     with app.app_context():
         db.create_all()
-        init_db()
+        if app.config['AUTO_MIGRATE']:
+            migrate()
+            init_db()
     
     return app
 
 def init_db():
     """Initialize database - no seed data, starts clean"""
-    pass
+    from app.models import Expense, GroupBalance, SpendRollup
+    from app.services import ledger, rollups
+    
+    # Databases created before the balance ledger existed need a one-off backfill
+    if not GroupBalance.query.first() and Expense.query.first():
+        ledger.rebuild()
+        db.session.commit()
+    
+    # Likewise for the spend rollups
+    if not SpendRollup.query.first() and Expense.query.first():
+        rollups.rebuild()
+        db.session.commit()
@@ -0,0 +1,136 @@
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+class Config:
+    """Base configuration; values can be overridden through the environment"""
+    SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///penny_pals.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', '1') != '0'
+    
+    # In-process cache of current-user rows and group memberships
+    CURRENT_USER_CACHE_SIZE = int(os.getenv('CURRENT_USER_CACHE_SIZE', 10000))
+    CURRENT_USER_CACHE_TTL = int(os.getenv('CURRENT_USER_CACHE_TTL', 60))
+    # Seconds between log lines with each process's cache hit/miss counters (0 = off)
+    CURRENT_USER_CACHE_STATS_INTERVAL = int(os.getenv('CURRENT_USER_CACHE_STATS_INTERVAL', 300))
+    
+    # Lifetime of bearer access tokens issued by /auth/login and /auth/register
+    TOKEN_MAX_AGE = int(os.getenv('TOKEN_MAX_AGE', 900))
+    
+    # Password hashing: werkzeug method string in full form (as stored in hashes),
+    # so older hashes can be detected and upgraded on login
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_SALT_LENGTH = int(os.getenv('PASSWORD_SALT_LENGTH', 16))
+    # Worker processes for hashing (0 hashes inline), extra jobs allowed to wait,
+    # and how long a request waits for a slot before getting a 503
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv('PASSWORD_HASH_QUEUE_SIZE', 8))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', 0.05))
+    
+    # Notification push: 'memory' (single process) or 'socket' (workers on one host)
+    NOTIFICATION_BROKER = os.getenv('NOTIFICATION_BROKER', 'memory')
+    NOTIFICATION_BROKER_SOCKET_DIR = os.getenv('NOTIFICATION_BROKER_SOCKET_DIR', '/tmp/pennypals-pubsub')
+    SSE_KEEPALIVE_SECONDS = int(os.getenv('SSE_KEEPALIVE_SECONDS', 15))
+    
+    # Notification outbox: intents are committed with the change they announce and
+    # written by a background flusher, up to BATCH_SIZE per commit, at most every
+    # INTERVAL seconds; it also polls every POLL_INTERVAL seconds for intents a
+    # crashed worker left behind (ASYNC=0 writes inline)
+    NOTIFICATION_OUTBOX_ASYNC = os.getenv('NOTIFICATION_OUTBOX_ASYNC', '1') != '0'
+    NOTIFICATION_OUTBOX_BATCH_SIZE = int(os.getenv('NOTIFICATION_OUTBOX_BATCH_SIZE', 1000))
+    NOTIFICATION_OUTBOX_INTERVAL = float(os.getenv('NOTIFICATION_OUTBOX_INTERVAL', 0.05))
+    NOTIFICATION_OUTBOX_POLL_INTERVAL = float(os.getenv('NOTIFICATION_OUTBOX_POLL_INTERVAL', 1))
+    
+    # Notification retention: drop anything older than DAYS (0 = no age limit) and
+    # read items beyond each user's newest KEEP_READ, BATCH_SIZE rows per commit,
+    # every INTERVAL seconds (0 = only via purge_notifications.py)
+    NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', 90))
+    NOTIFICATION_RETENTION_KEEP_READ = int(os.getenv('NOTIFICATION_RETENTION_KEEP_READ', 200))
+    NOTIFICATION_RETENTION_BATCH_SIZE = int(os.getenv('NOTIFICATION_RETENTION_BATCH_SIZE', 500))
+    NOTIFICATION_RETENTION_INTERVAL = int(os.getenv('NOTIFICATION_RETENTION_INTERVAL', 3600))
+    
+    # Group deletion: groups with more expenses than the threshold are tombstoned and
+    # purged BATCH_SIZE expenses per commit by a worker polling every POLL_INTERVAL
+    # seconds (WORKER=0 purges right after the request's commit instead)
+    GROUP_DELETE_ASYNC_THRESHOLD = int(os.getenv('GROUP_DELETE_ASYNC_THRESHOLD', 5000))
+    GROUP_DELETE_BATCH_SIZE = int(os.getenv('GROUP_DELETE_BATCH_SIZE', 1000))
+    GROUP_DELETE_POLL_INTERVAL = int(os.getenv('GROUP_DELETE_POLL_INTERVAL', 5))
+    GROUP_DELETE_WORKER = os.getenv('GROUP_DELETE_WORKER', '1') != '0'
+    
+    # Expense categories: JSON object of category -> title keywords, in priority
+    # order, replacing the built-in table in app/services/categories.py
+    EXPENSE_CATEGORY_KEYWORDS = os.getenv('EXPENSE_CATEGORY_KEYWORDS')
+    
+    # Responses: orjson encoder when installed, gzip/br above COMPRESS_MIN_SIZE bytes (0 = off)
+    JSON_FAST_ENCODER = os.getenv('JSON_FAST_ENCODER', '1') != '0'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    
+    # SQLite profile: WAL lets readers run alongside the single writer
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+    
+    # Server profile (PostgreSQL etc.): connection pool settings
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+
+class DevelopmentConfig(Config):
+    pass
+
+class ProductionConfig(Config):
+    pass
+
+class TestingConfig(Config):
+    TESTING = True
+    PASSWORD_HASH_WORKERS = 0
+    NOTIFICATION_OUTBOX_ASYNC = False
+    NOTIFICATION_RETENTION_INTERVAL = 0
+    GROUP_DELETE_WORKER = False
+    CURRENT_USER_CACHE_STATS_INTERVAL = 0
+    SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URL', 'sqlite://')
+
+config = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+}
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+def engine_options(app_config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the profile matching the database URI"""
+    if is_sqlite(app_config['SQLALCHEMY_DATABASE_URI']):
+        # sqlite3's own lock wait, in seconds; busy_timeout is set per connection too
+        return {'connect_args': {'timeout': app_config['SQLITE_BUSY_TIMEOUT_MS'] / 1000}}
+    return {
+        'pool_size': app_config['DB_POOL_SIZE'],
+        'max_overflow': app_config['DB_MAX_OVERFLOW'],
+        'pool_recycle': app_config['DB_POOL_RECYCLE'],
+        'pool_timeout': app_config['DB_POOL_TIMEOUT'],
+        'pool_pre_ping': True,
+    }
+
+def register_sqlite_pragmas(engine, app_config):
+    """Apply the SQLite profile pragmas to every new connection"""
+    pragmas = [
+        f"PRAGMA journal_mode={app_config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={app_config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={app_config['SQLITE_BUSY_TIMEOUT_MS']}",
+        f"PRAGMA mmap_size={app_config['SQLITE_MMAP_SIZE']}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{app_config['SQLITE_CACHE_SIZE_KB']}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
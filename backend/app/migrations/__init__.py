@@ -0,0 +1,173 @@
+# Migrations module
+from datetime import date, datetime
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.schema import CreateIndex
+from app.models import db, Notification, schema_migrations
+from app.services import balances, categories, debts, expense_list, memberships, notification_list, rollups, unread, user_search
+
+# Indexes backing the filters/sorts in app/routes, declared on the models
+HOT_PATH_INDEXES = [
+    ('expenses', 'ix_expenses_group_date'),
+    ('expenses', 'ix_expenses_paid_by_group'),
+    ('expense_splits', 'ix_expense_splits_user_expense'),
+    ('expense_splits', 'ix_expense_splits_expense'),
+    ('expense_splits', 'ix_expense_splits_user_date'),
+    ('notifications', 'ix_notifications_user_created'),
+    ('group_members', 'ix_group_members_group'),
+    ('group_balances', 'ix_group_balances_group'),
+]
+
+USER_SEARCH_INDEXES = [
+    ('users', 'ix_users_username_lower'),
+    ('users', 'ix_users_name_lower'),
+    ('users', 'ix_users_email_lower'),
+]
+
+def add_column(conn, table, column, ddl):
+    """ALTER TABLE ... ADD COLUMN unless the column is already there"""
+    if column not in {c['name'] for c in inspect(conn).get_columns(table)}:
+        conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+
+def create_indexes(conn, names):
+    """Create model-declared indexes that don't exist yet"""
+    for table, name in names:
+        index = next(i for i in db.metadata.tables[table].indexes if i.name == name)
+        # IF NOT EXISTS rather than checkfirst: inspectors skip expression indexes
+        conn.execute(CreateIndex(index, if_not_exists=True))
+
+def backfill_unread_counters(conn):
+    """Seed the unread counters from existing notifications"""
+    db.metadata.tables['notification_counters'].create(conn, checkfirst=True)
+    unread.rebuild(conn)
+
+def add_hot_path_indexes(conn):
+    """Copy expenses.date onto expense_splits for the expense list, then create the hot-path indexes"""
+    add_column(conn, 'expense_splits', 'expense_date', 'DATETIME')
+    conn.execute(text(
+        'UPDATE expense_splits SET expense_date = '
+        '(SELECT date FROM expenses WHERE expenses.id = expense_splits.expense_id) '
+        'WHERE expense_date IS NULL'
+    ))
+    create_indexes(conn, HOT_PATH_INDEXES)
+
+def add_categories(conn):
+    """Add expenses.category and give existing wallet payments and settle-ups PAYMENT_CATEGORY.
+    
+    They are recognised by their generated titles and single split of the
+    whole amount to someone other than the payer. Other expenses are left
+    for backfill_categories.py.
+    """
+    add_column(conn, 'expenses', 'category', 'VARCHAR(30)')
+    conn.execute(text(
+        "UPDATE expenses SET category = :payment "
+        "WHERE category IS NULL "
+        "AND (title LIKE 'Payment from %' OR title LIKE 'Settle up from %') "
+        "AND (SELECT COUNT(*) FROM expense_splits s WHERE s.expense_id = expenses.id) = 1 "
+        "AND EXISTS (SELECT 1 FROM expense_splits s WHERE s.expense_id = expenses.id "
+        "AND s.user_id != expenses.paid_by AND s.amount = expenses.amount)"
+    ), {'payment': categories.PAYMENT_CATEGORY})
+
+# (version, name, apply(conn)); append only, never renumber
+MIGRATIONS = [
+    (1, 'add wallets.bank_account',
+        lambda conn: add_column(conn, 'wallets', 'bank_account', 'VARCHAR(20)')),
+    (2, 'add users.currency',
+        lambda conn: add_column(conn, 'users', 'currency', "VARCHAR(10) DEFAULT 'USD'")),
+    (3, 'add expense_splits.expense_date and hot-path indexes', add_hot_path_indexes),
+    (4, 'add users.membership_version',
+        lambda conn: add_column(conn, 'users', 'membership_version', 'INTEGER NOT NULL DEFAULT 0')),
+    (5, 'add user search indexes',
+        lambda conn: create_indexes(conn, USER_SEARCH_INDEXES)),
+    (6, 'backfill notification_counters', backfill_unread_counters),
+    (7, 'add notifications.created_at index',
+        lambda conn: create_indexes(conn, [('notifications', 'ix_notifications_created')])),
+    (8, 'add users.data_version',
+        lambda conn: add_column(conn, 'users', 'data_version', 'INTEGER NOT NULL DEFAULT 0')),
+    (9, 'add expenses.category and mark payments', add_categories),
+    (10, 'add expenses.category index',
+        lambda conn: create_indexes(conn, [('expenses', 'ix_expenses_category')])),
+]
+
+def applied_versions(conn):
+    """Versions already recorded in schema_migrations"""
+    schema_migrations.create(conn, checkfirst=True)
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+def migrate(engine=None):
+    """Apply pending migrations in order, each in its own transaction.
+    
+    Errors are raised, not swallowed; a failed migration is not recorded.
+    Returns the list of (version, name) applied.
+    """
+    engine = engine or db.engine
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+    
+    applied = []
+    for version, name, apply in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            apply(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+        applied.append((version, name))
+    return applied
+
+# Hot-path reads from app/services, run as the routes run them with ids that
+# match nothing; check_query_plans explains every statement each one issues
+HOT_PATH_QUERIES = {
+    'expenses list': lambda: db.session.execute(
+        expense_list.page_query('', [''], 50, after=(datetime.utcnow(), ''))
+    ).all(),
+    'wallet stats': lambda: balances.wallet_totals(''),
+    'group balances': lambda: balances.group_balances('', ['']),
+    'group splits': lambda: debts.pairwise_balances(''),
+    'group members': lambda: memberships.member_page('', 50, after=''),
+    'notifications list': lambda: db.session.scalars(notification_list.latest_query('')).all(),
+    'notifications replay': lambda: db.session.scalars(
+        notification_list.replay_query('', Notification(id='', created_at=datetime.utcnow()))
+    ).all(),
+    'user search': lambda: user_search.search_users('', [''], 'a', 20),
+    'analytics range': lambda: rollups.spend_series('user', '', 'month', date(2024, 1, 1), date(2024, 12, 31)),
+}
+
+# Queries that sort the caller's group mates (or ties on one index key), so a temp B-tree is expected
+SORTED_MATCHES = {'user search'}
+
+def plan_problems(plan, allow_sort=False):
+    """Full table scans and (unless allow_sort) temp B-tree sorts in an EXPLAIN QUERY PLAN"""
+    return [
+        detail for detail in plan
+        if detail.startswith('SCAN') and 'CONSTANT ROW' not in detail
+        or detail.startswith('USE TEMP B-TREE') and not allow_sort
+    ]
+
+def check_query_plans():
+    """EXPLAIN QUERY PLAN every statement HOT_PATH_QUERIES issues (SQLite only).
+    
+    Returns {query_name: [plan details]} for every query with a statement
+    that scans a whole table or, outside SORTED_MATCHES, sorts in a temp
+    B-tree; an empty dict means all hot paths read in index order.
+    """
+    failures = {}
+    for name, run in HOT_PATH_QUERIES.items():
+        statements = []
+        
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+        
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            run()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+            db.session.rollback()
+        
+        with db.engine.connect() as conn:
+            for statement, parameters in statements:
+                plan = [row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+                if plan_problems(plan, name in SORTED_MATCHES):
+                    failures.setdefault(name, []).extend(plan)
+    return failures
@@ -7,6 +7,15 @@ db = SQLAlchemy()
 group_members = db.Table('group_members',
     db.Column('user_id', db.String(36), db.ForeignKey('users.id'), primary_key=True),
     db.Column('group_id', db.String(36), db.ForeignKey('groups.id'), primary_key=True),
+    db.Index('ix_group_members_group', 'group_id', 'user_id'),
+    extend_existing=True
+)
+
+# Applied schema migration versions (see app.migrations)
+schema_migrations = db.Table('schema_migrations',
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('name', db.String(200), nullable=False),
+    db.Column('applied_at', db.DateTime, default=datetime.utcnow),
     extend_existing=True
 )
 
@@ -20,20 +29,27 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     name = db.Column(db.String(120), nullable=False)
     currency = db.Column(db.String(10), default='USD')
+    membership_version = db.Column(db.Integer, default=0, nullable=False) # bumped on group joins/leaves
+    data_version = db.Column(db.Integer, default=0, nullable=False) # bumped when anything the user reads changes
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     expenses = db.relationship('Expense', backref='user', lazy=True)
     groups = db.relationship('Group', secondary=group_members, backref='members')
     
     def set_password(self, password):
-        """Hash and set password"""
-        from werkzeug.security import generate_password_hash
-        self.password_hash = generate_password_hash(password)
+        """Hash and set password (in the hashing process pool)"""
+        from app.utils.passwords import hash_password
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        """Check if provided password matches hash"""
-        from werkzeug.security import check_password_hash
-        return check_password_hash(self.password_hash, password)
+        """Check if provided password matches hash (in the hashing process pool)"""
+        from app.utils.passwords import verify_password
+        return verify_password(self.password_hash, password)
+
+# Case-insensitive prefix search over users (see app.services.user_search)
+db.Index('ix_users_username_lower', db.func.lower(User.username))
+db.Index('ix_users_name_lower', db.func.lower(User.name))
+db.Index('ix_users_email_lower', db.func.lower(User.email))
 
 class Group(db.Model):
     __tablename__ = 'groups'
@@ -45,15 +61,34 @@ class Group(db.Model):
     
     expenses = db.relationship('Expense', backref='group', lazy=True, cascade='all, delete-orphan')
 
+class GroupDeletion(db.Model):
+    """Progress of an asynchronous group deletion, kept after the group row is gone"""
+    __tablename__ = 'group_deletions'
+    __table_args__ = {'extend_existing': True}
+    
+    group_id = db.Column(db.String(36), primary_key=True) # no foreign key: outlives the group
+    requested_by = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    status = db.Column(db.String(10), default='pending', nullable=False) # pending, running, done
+    total_expenses = db.Column(db.Integer, default=0, nullable=False)
+    deleted_expenses = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
 class Expense(db.Model):
     __tablename__ = 'expenses'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_expenses_group_date', 'group_id', 'date', 'id'),
+        db.Index('ix_expenses_paid_by_group', 'paid_by', 'group_id', 'amount'),
+        db.Index('ix_expenses_category', 'category'),
+        {'extend_existing': True}
+    )
     
     id = db.Column(db.String(36), primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     amount = db.Column(db.Float, nullable=False)
     paid_by = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     group_id = db.Column(db.String(36), db.ForeignKey('groups.id'), nullable=True)
+    category = db.Column(db.String(30), nullable=True) # from the title, see app/services/categories.py
     date = db.Column(db.DateTime, default=datetime.utcnow)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -61,18 +96,29 @@ class Expense(db.Model):
 
 class ExpenseSplit(db.Model):
     __tablename__ = 'expense_splits'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_expense_splits_user_expense', 'user_id', 'expense_id', 'amount'),
+        db.Index('ix_expense_splits_expense', 'expense_id', 'user_id', 'amount'),
+        # Walked in order by the GET /expenses keyset pages
+        db.Index('ix_expense_splits_user_date', 'user_id', 'expense_date', 'expense_id', 'amount'),
+        {'extend_existing': True}
+    )
     
     id = db.Column(db.String(36), primary_key=True)
     expense_id = db.Column(db.String(36), db.ForeignKey('expenses.id'), nullable=False)
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     amount = db.Column(db.Float, nullable=False)
+    expense_date = db.Column(db.DateTime, nullable=True) # copy of expenses.date, set on insert
     
     user = db.relationship('User', backref='splits')
 
 class Notification(db.Model):
     __tablename__ = 'notifications'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_notifications_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_notifications_created', 'created_at'), # retention age cutoff
+        {'extend_existing': True}
+    )
     
     id = db.Column(db.String(36), primary_key=True)
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
@@ -81,6 +127,28 @@ class Notification(db.Model):
     read = db.Column(db.Boolean, default=False)
     type = db.Column(db.String(20), default='info') # info, success, warning, error
 
+class NotificationIntent(db.Model):
+    """A notification to write, committed with the change it announces and
+    deleted by the outbox flusher in the transaction that writes it"""
+    __tablename__ = 'notification_intents'
+    __table_args__ = {'extend_existing': True}
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True) # drained in id order
+    user_ids = db.Column(db.JSON, nullable=True) # explicit recipients, or
+    group_id = db.Column(db.String(36), nullable=True) # every member, resolved when written
+    exclude = db.Column(db.JSON, nullable=False, default=list)
+    message = db.Column(db.String(255), nullable=False)
+    type = db.Column(db.String(20), default='info')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class NotificationCounter(db.Model):
+    """Unread notification count per user, kept in sync with notification writes"""
+    __tablename__ = 'notification_counters'
+    __table_args__ = {'extend_existing': True}
+    
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    unread = db.Column(db.Integer, default=0, nullable=False)
+
 class Wallet(db.Model):
     __tablename__ = 'wallets'
     __table_args__ = {'extend_existing': True}
@@ -92,3 +160,40 @@ class Wallet(db.Model):
     bank_account = db.Column(db.String(20), nullable=True)
     
     user = db.relationship('User', backref=db.backref('wallet', uselist=False))
+
+# group_balances bucket for expenses outside any group
+DIRECT_PAYMENTS = ''
+
+class GroupBalance(db.Model):
+    """Running paid/owed totals per user and group, kept in sync on every write"""
+    __tablename__ = 'group_balances'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'group_id', name='uq_group_balances_user_group'),
+        db.Index('ix_group_balances_group', 'group_id'),
+        {'extend_existing': True}
+    )
+    
+    id = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    # DIRECT_PAYMENTS ('') for direct payments rather than NULL, so (user_id, group_id)
+    # is a usable ON CONFLICT target; hence no foreign key to groups
+    group_id = db.Column(db.String(36), nullable=False, default=DIRECT_PAYMENTS)
+    paid = db.Column(db.Float, default=0.0, nullable=False)
+    owed = db.Column(db.Float, default=0.0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SpendRollup(db.Model):
+    """Spend per user (their shares) or group (expense totals), period bucket and category.
+    
+    Keyed by those columns directly so range reads walk the primary key.
+    """
+    __tablename__ = 'spend_rollups'
+    __table_args__ = {'extend_existing': True}
+    
+    scope = db.Column(db.String(10), primary_key=True) # user, group
+    scope_id = db.Column(db.String(36), primary_key=True)
+    period = db.Column(db.String(10), primary_key=True) # month, week
+    bucket = db.Column(db.Date, primary_key=True) # first day of the month / Monday of the week
+    category = db.Column(db.String(30), primary_key=True)
+    amount = db.Column(db.Float, default=0.0, nullable=False)
+    expense_count = db.Column(db.Integer, default=0, nullable=False)
@@ -0,0 +1,87 @@
+from datetime import date, datetime, timedelta
+from flask import Blueprint, request
+from app.models import Group
+from app.services import rollups
+from app.utils.helpers import handle_error
+from app.utils.current_user import get_current_user, get_group_ids
+from app.utils import versions
+
+analytics_bp = Blueprint('analytics', __name__)
+
+# Buckets returned when no start is given, and the most allowed per request
+DEFAULT_BUCKETS = 12
+MAX_BUCKETS = 260
+
+def parse_day(value, name):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a date (YYYY-MM-DD)')
+
+@analytics_bp.route('/analytics', methods=['GET'])
+@versions.conditional
+def get_analytics():
+    """Spend per month or week, with a per-category breakdown.
+    
+    ?scope=user (default) is the user's own share of expenses; ?scope=group
+    with ?group_id= is the group's total. ?period=month|week, and ?start= /
+    ?end= (YYYY-MM-DD) bound the range, which defaults to the last 12 buckets.
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return {'error': 'Not authenticated'}, 401
+        
+        period = request.args.get('period', 'month')
+        if period not in rollups.PERIODS:
+            return handle_error('period must be month or week')
+        scope = request.args.get('scope', 'user')
+        if scope not in rollups.SCOPES:
+            return handle_error('scope must be user or group')
+        
+        try:
+            end = parse_day(request.args['end'], 'end') if 'end' in request.args else datetime.utcnow().date()
+            if 'start' in request.args:
+                start = parse_day(request.args['start'], 'start')
+            else:
+                start = rollups.bucket_start(end, period)
+                for _ in range(DEFAULT_BUCKETS - 1):
+                    start = rollups.bucket_start(start - timedelta(days=1), period)
+        except ValueError as e:
+            return handle_error(str(e))
+        if start > end:
+            return handle_error('start must not be after end')
+        
+        days_per_bucket = 7 if period == 'week' else 28
+        if (end - start).days // days_per_bucket + 1 > MAX_BUCKETS:
+            return handle_error(f'At most {MAX_BUCKETS} buckets per request')
+        
+        if scope == 'group':
+            scope_id = request.args.get('group_id')
+            if not scope_id:
+                return handle_error('group_id is required for scope=group')
+            if not Group.query.get(scope_id):
+                return handle_error('Group not found', 404)
+            if scope_id not in get_group_ids(user):
+                return handle_error('You are not a member of this group', 403)
+        else:
+            scope_id = user.id
+        
+        series = rollups.spend_series(scope, scope_id, period, start, end)
+        totals = {}
+        for bucket in series:
+            for category, amount in bucket['categories'].items():
+                totals[category] = round(totals.get(category, 0.0) + amount, 2)
+        
+        return {
+            'success': True,
+            'scope': scope,
+            'period': period,
+            'start': series[0]['start'],
+            'end': end.isoformat(),
+            'total': round(sum(bucket['total'] for bucket in series), 2),
+            'categories': totals,
+            'buckets': series
+        }, 200
+    except Exception as e:
+        return handle_error(str(e), 500)
@@ -1,9 +1,8 @@
-import sqlite3
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, current_app, request, session
 from app.models import db, User
-from app.utils.helpers import generate_id, handle_error
-
-from sqlite3 import OperationalError
+from app.utils.helpers import generate_id, handle_error, parse_limit, encode_cursor, decode_cursor
+from app.services import user_search
+from app.utils import current_user, passwords, tokens
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -73,8 +72,12 @@ def register():
                 "name": new_user.name,
                 "currency": new_user.currency,
             },
+            "access_token": tokens.issue_token(new_user),
         }, 201
 
+    except passwords.HashPoolBusy as e:
+        db.session.rollback()
+        return {"error": str(e)}, 503, {"Retry-After": "1"}
     except Exception as e:
         db.session.rollback()
         return handle_error(str(e), 500)
@@ -98,6 +101,12 @@ def login():
         if not user or not user.check_password(password):
             return {"error": "Invalid username or password"}, 401
 
+        # Transparently upgrade hashes made with older parameters
+        if passwords.needs_rehash(user.password_hash):
+            user.set_password(password)
+            db.session.commit()
+            current_user.invalidate_user(user.id)
+
         # Set session
         session["user_id"] = user.id
         session["username"] = user.username
@@ -110,9 +119,13 @@ def login():
                 "email": user.email,
                 "name": user.name,
             },
+            "access_token": tokens.issue_token(user),
         }, 200
 
+    except passwords.HashPoolBusy as e:
+        return {"error": str(e)}, 503, {"Retry-After": "1"}
     except Exception as e:
+        db.session.rollback()
         return {"error": "Invalid username or password"}, 401
 
 
@@ -126,6 +139,28 @@ def logout():
         return handle_error(str(e), 500)
 
 
+@auth_bp.route("/auth/refresh", methods=["POST"])
+def refresh_token():
+    """Issue a fresh access token with the user's current membership version"""
+    try:
+        current = current_user.get_current_user()
+        if not current:
+            return {"error": "Not authenticated"}, 401
+
+        # Token requests attach a User built from the old claims; re-read the row
+        user = db.session.get(User, current.id, populate_existing=True)
+        if not user:
+            return {"error": "User not found"}, 404
+
+        return {
+            "access_token": tokens.issue_token(user),
+            "expires_in": current_app.config["TOKEN_MAX_AGE"],
+        }, 200
+
+    except Exception as e:
+        return handle_error(str(e), 500)
+
+
 @auth_bp.route("/auth/current-user", methods=["GET"])
 def get_current_user():
     """Get current logged-in user"""
@@ -154,19 +189,49 @@ def get_current_user():
 
 @auth_bp.route("/auth/users", methods=["GET"])
 def get_all_users():
-    """Get all users (for adding to groups/splits)"""
+    """Search users (for adding to groups/splits).
+
+    ?q= matches a username, name or email prefix; members of the caller's
+    groups come first. ?exclude_group= leaves out the members of one of the
+    caller's groups. Paginated with ?limit= and ?cursor= (next_cursor).
+    """
     try:
-        users = User.query.all()
+        user = current_user.get_current_user()
+        if not user:
+            return {"error": "Not authenticated"}, 401
+
+        try:
+            limit = parse_limit(request.args.get("limit"), default=50, maximum=100)
+            cursor = request.args.get("cursor")
+            after = None
+            if cursor:
+                parts = decode_cursor(cursor)
+                # Matched values may contain the separator; tier, field and id never do
+                after = (int(parts[0]), int(parts[1]), "|".join(parts[2:-1]), parts[-1])
+        except (ValueError, IndexError):
+            return {"error": "Invalid cursor or limit"}, 400
+
+        group_ids = current_user.get_group_ids(user)
+        exclude_group = request.args.get("exclude_group")
+        if exclude_group and exclude_group not in group_ids:
+            return {"error": "You are not a member of this group"}, 403
+
+        query = request.args.get("q", "").strip()
+        rows, next_after = user_search.search_users(
+            user.id, group_ids, query, limit, after, exclude_group
+        )
+
         return {
             "users": [
                 {
-                    "id": user.id,
-                    "username": user.username,
-                    "name": user.name,
-                    "email": user.email,
+                    "id": user_id,
+                    "username": username,
+                    "name": name,
+                    "email": email,
                 }
-                for user in users
-            ]
+                for user_id, username, name, email in rows
+            ],
+            "next_cursor": encode_cursor(*next_after) if next_after else None,
         }, 200
     except Exception as e:
         return handle_error(str(e), 500)
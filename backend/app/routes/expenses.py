@@ -1,85 +1,118 @@
+import io
+from collections import defaultdict
+from datetime import datetime
 from flask import Blueprint, request, jsonify, session
-from app.models import db, Expense, ExpenseSplit, User, Group
-from app.utils.helpers import generate_id, serialize_model, handle_error
+from sqlalchemy import select, insert, exists
+from app.models import db, Expense, ExpenseSplit, User, Group, group_members
+from app.utils.helpers import generate_id, serialize_model, handle_error, parse_limit, encode_cursor, decode_cursor
+from app.utils import versions
+from app.utils.current_user import get_current_user, get_group_ids
+from app.services import ledger, importer, outbox, categories, rollups, expense_list
+from app.services.splitting import parse_amount, parse_participant_ids, split_amounts
 
 expenses_bp = Blueprint('expenses', __name__)
 
-def get_current_user():
-    """Get current logged-in user from session"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return None
-    return User.query.get(user_id)
+BATCH_MODES = ('atomic', 'best_effort')
+
+# Upper bound on expenses per batch request
+MAX_BATCH_SIZE = 1000
 
 @expenses_bp.route('/expenses', methods=['GET'])
+@versions.conditional
 def get_expenses():
-    """Get all expenses for current user"""
+    """Get expenses for current user, newest first.
+    
+    Paginated with ?limit= and the opaque ?cursor= returned as next_cursor;
+    ?category= keeps only one category.
+    """
     try:
         user = get_current_user()
         if not user:
             return {'error': 'Not authenticated'}, 401
         
-        # Icon mapping based on keywords
-        def get_icon(title):
-            title_lower = title.lower()
-            if any(word in title_lower for word in ['grocery', 'groceries', 'food', 'supermarket']):
-                return '🛒'
-            elif any(word in title_lower for word in ['dinner', 'lunch', 'restaurant', 'cafe', 'bistro']):
-                return '🍽️'
-            elif any(word in title_lower for word in ['movie', 'cinema', 'tickets']):
-                return '🎬'
-            elif any(word in title_lower for word in ['coffee', 'cafe', 'starbucks']):
-                return '☕'
-            elif any(word in title_lower for word in ['internet', 'wifi', 'broadband']):
-                return '🌐'
-            elif any(word in title_lower for word in ['gas', 'fuel', 'petrol']):
-                return '⛽'
-            elif any(word in title_lower for word in ['uber', 'taxi', 'transport']):
-                return '🚗'
-            else:
-                return '💰'
-        
-        # Get all expenses where user is a participant (has a split) from groups they're in
-        user_group_ids = [g.id for g in user.groups]
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            category = request.args.get('category')
+            cursor = request.args.get('cursor')
+            if cursor:
+                cursor_date, cursor_id = decode_cursor(cursor)
+                cursor_date = datetime.fromisoformat(cursor_date)
+        except ValueError as e:
+            return handle_error(str(e))
         
-        # Get all expenses from user's groups, ordered by date
-        expenses = Expense.query.filter(
-            Expense.group_id.in_(user_group_ids)
-        ).order_by(Expense.date.desc()).all()
+        # Start from the user's splits - user only sees expenses they're part of -
+        # and pull the payer's name in the same query
+        rows = db.session.execute(expense_list.page_query(
+            user.id, get_group_ids(user), limit, category,
+            (cursor_date, cursor_id) if cursor else None
+        )).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         
         transactions = []
-        for expense in expenses:
-            # Find user's share - user only sees expenses they're part of
-            user_split = ExpenseSplit.query.filter_by(
-                expense_id=expense.id,
-                user_id=user.id
-            ).first()
+        for expense, owed_amount, paid_by_name in rows:
+            is_owed = expense.paid_by != user.id
+            # Rows written before categories were stored get classified on the fly
+            expense_category = expense.category or categories.classify(expense.title)
             
-            # Only include if user has a split in this expense
-            if user_split:
-                paid_by_user = User.query.get(expense.paid_by)
-                is_owed = expense.paid_by != user.id
-                
-                transactions.append({
-                    'id': expense.id,
-                    'icon': get_icon(expense.title),
-                    'title': expense.title,
-                    'paidBy': paid_by_user.name if paid_by_user else 'Unknown',
-                    'amount': f'${expense.amount:.2f}',
-                    'owedAmount': f'${user_split.amount:.2f}',
-                    'isOwed': is_owed,
-                    'date': expense.date.isoformat() if expense.date else '',
-                })
-        
-        return {'transactions': transactions}, 200
+            transactions.append({
+                'id': expense.id,
+                'icon': categories.icon(expense_category),
+                'category': expense_category,
+                'title': expense.title,
+                'paidBy': paid_by_name or 'Unknown',
+                'amount': f'${expense.amount:.2f}',
+                'owedAmount': f'${owed_amount:.2f}',
+                'isOwed': is_owed,
+                'date': expense.date.isoformat() if expense.date else '',
+            })
+        
+        next_cursor = None
+        if has_more:
+            last = rows[-1][0]
+            next_cursor = encode_cursor(last.date, last.id)
+        
+        return {'transactions': transactions, 'next_cursor': next_cursor}, 200
     except Exception as e:
         return handle_error(str(e), 500)
 
 @expenses_bp.route('/transactions', methods=['GET'])
 def get_transactions():
-    """Get all transactions (alias for expenses)"""
+    """Get transactions (alias for expenses, same limit/cursor params)"""
     return get_expenses()
 
+@expenses_bp.route('/expenses/import', methods=['POST'])
+def import_expenses():
+    """Bulk import expenses from a streamed CSV or NDJSON body.
+    
+    Format comes from ?format= or the Content-Type (text/csv,
+    application/x-ndjson). Rows are committed in chunks of ?chunk_size=;
+    bad rows are reported per line without aborting the import.
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return {'error': 'Not authenticated'}, 401
+        
+        fmt = request.args.get('format')
+        if not fmt:
+            fmt = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+        if fmt not in importer.FORMATS:
+            return handle_error('format must be csv or ndjson')
+        
+        try:
+            chunk_size = parse_limit(request.args.get('chunk_size'), default=1000, maximum=10000)
+        except ValueError as e:
+            return handle_error(str(e))
+        
+        stream = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+        result = importer.ExpenseImporter(user, chunk_size).run(importer.iter_records(stream, fmt))
+        
+        return {'success': True, **result}, 200
+    except Exception as e:
+        db.session.rollback()
+        return handle_error(str(e), 500)
+
 @expenses_bp.route('/expenses', methods=['POST'])
 def add_expense():
     """Add new expense"""
@@ -92,88 +125,93 @@ def add_expense():
         
         # Validate required fields
         required_fields = ['title', 'amount']
-        if not all(field in data for field in required_fields):
+        if not isinstance(data, dict) or not all(field in data for field in required_fields):
             return handle_error('Missing required fields')
         
         group_id = data.get('group_id')
-        amount = float(data['amount'])
         split_type = data.get('split_type', 'equal')
         custom_splits = data.get('splits', {})
+        requested = data.get('participants')
+        try:
+            amount = parse_amount(data['amount'])
+            if requested:
+                requested = parse_participant_ids(requested)
+            if group_id is not None and not isinstance(group_id, str):
+                raise ValueError('group_id must be a string')
+        except ValueError as e:
+            return handle_error(str(e))
         
-        # Determine participants
-        participants = []
-        if 'participants' in data and data['participants']:
-            # Use explicitly selected participants
-            participant_ids = data['participants']
-            for pid in participant_ids:
-                p = User.query.get(pid)
-                if p:
-                    participants.append(p)
-        elif group_id:
-            # Get all members of the group
-            group = Group.query.filter_by(id=group_id).first()
-            if not group:
+        if group_id:
+            if not db.session.get(Group, group_id):
                 return handle_error('Group not found', 404)
-            if user not in group.members:
+            if group_id not in get_group_ids(user):
                 return handle_error('You are not a member of this group', 403)
-            participants = group.members
+        
+        # Determine participants with one query, whatever their number
+        if requested:
+            # Use explicitly selected participants; unknown ids are skipped
+            if group_id:
+                in_group = exists().where(
+                    group_members.c.group_id == group_id,
+                    group_members.c.user_id == User.id
+                )
+                found = dict(db.session.execute(select(User.id, in_group).where(User.id.in_(requested))).all())
+                if not all(found.values()):
+                    return handle_error('Participants must be members of this group')
+            else:
+                found = set(db.session.scalars(select(User.id).where(User.id.in_(requested))))
+            participant_ids = [pid for pid in requested if pid in found]
+        elif group_id:
+            # All members of the group
+            participant_ids = list(db.session.scalars(
+                select(group_members.c.user_id).where(group_members.c.group_id == group_id)
+            ))
         else:
             return handle_error('Either group_id or participants list is required', 400)
         
-        if not participants:
+        if not participant_ids:
             return handle_error('No participants for this expense', 400)
         
-        # Create expense
         expense_id = generate_id()
+        try:
+            amounts = split_amounts(amount, participant_ids, split_type, custom_splits, expense_id)
+        except ValueError as e:
+            return handle_error(str(e))
+        
+        # Create expense
         expense = Expense(
             id=expense_id,
             title=data['title'],
+            category=categories.classify(data['title']),
             amount=amount,
             paid_by=user.id,
-            group_id=group_id
+            group_id=group_id,
+            date=datetime.utcnow()
         )
         db.session.add(expense)
         
-        # Calculate splits
-        if split_type == 'equal':
-            split_amount = amount / len(participants)
-            for participant in participants:
-                split_id = generate_id()
-                split = ExpenseSplit(
-                    id=split_id,
-                    expense_id=expense_id,
-                    user_id=participant.id,
-                    amount=split_amount
-                )
-                db.session.add(split)
+        # Splits go in as one multi-row insert rather than through the unit of work
+        shares = list(zip(participant_ids, amounts))
+        db.session.execute(insert(ExpenseSplit), [
+            {'id': generate_id(), 'expense_id': expense_id, 'user_id': pid, 'amount': split_amount,
+             'expense_date': expense.date}
+            for pid, split_amount in shares
+        ])
+        
+        ledger.record_expense(expense, shares)
+        rollups.record_expense(expense, shares)
+        message = f"{user.name} added \"{expense.title}\" (${amount:.2f})"
+        recipient_ids = [pid for pid in participant_ids if pid != user.id]
+        
+        # Committed with the expense and written by the outbox after the
+        # response; group-wide expenses fan out there
+        if requested:
+            outbox.enqueue(recipient_ids, message)
         else:
-            # Handle unequal/percentage splits
-            total_split_amount = 0
-            for participant in participants:
-                split_val = custom_splits.get(participant.id, 0)
-                # Ensure split_val is float
-                try:
-                    split_val = float(split_val)
-                except (ValueError, TypeError):
-                    split_val = 0.0
-                
-                total_split_amount += split_val
-                
-                split_id = generate_id()
-                split = ExpenseSplit(
-                    id=split_id,
-                    expense_id=expense_id,
-                    user_id=participant.id,
-                    amount=split_val
-                )
-                db.session.add(split)
-            
-            # Validate total split amount matches expense amount (allow small float error)
-            if abs(total_split_amount - amount) > 0.01:
-                # Rollback is handled by exception handler
-                raise ValueError(f"Split amounts (${total_split_amount:.2f}) do not match total amount (${amount:.2f})")
-
+            outbox.enqueue_group(group_id, message, exclude=[user.id])
+        
         db.session.commit()
+        outbox.wake()
         
         return {
             'success': True,
@@ -182,3 +220,161 @@ def add_expense():
     except Exception as e:
         db.session.rollback()
         return handle_error(str(e), 500)
+
+
+def build_batch_item(user, item, known_users, group_members_by_id):
+    """Validate one batch entry against pre-fetched users/groups.
+    
+    Returns (expense_row, split_rows); raises ValueError with the item's error.
+    """
+    if not isinstance(item, dict) or not all(field in item for field in ('title', 'amount')):
+        raise ValueError('Missing required fields')
+    
+    amount = parse_amount(item['amount'])
+    
+    group_id = item.get('group_id')
+    if group_id is not None and not isinstance(group_id, str):
+        raise ValueError('group_id must be a string')
+    if group_id:
+        members = group_members_by_id.get(group_id)
+        if members is None:
+            raise ValueError('Group not found')
+        if user.id not in members:
+            raise ValueError('You are not a member of this group')
+    
+    # Determine participants; as in add_expense, unknown ids are skipped
+    if item.get('participants'):
+        requested = parse_participant_ids(item['participants'])
+        if group_id and not all(pid in members for pid in requested if pid in known_users):
+            raise ValueError('Participants must be members of this group')
+        participant_ids = [pid for pid in requested if pid in known_users]
+    elif group_id:
+        participant_ids = list(members)
+    else:
+        raise ValueError('Either group_id or participants list is required')
+    
+    if not participant_ids:
+        raise ValueError('No participants for this expense')
+    
+    expense_id = generate_id()
+    amounts = split_amounts(
+        amount, participant_ids, item.get('split_type', 'equal'), item.get('splits') or {}, expense_id
+    )
+    
+    expense = {
+        'id': expense_id,
+        'title': item['title'],
+        'category': categories.classify(item['title']),
+        'amount': amount,
+        'paid_by': user.id,
+        'group_id': group_id,
+        'date': datetime.utcnow()
+    }
+    splits = [
+        {'id': generate_id(), 'expense_id': expense_id, 'user_id': pid, 'amount': split_amount,
+         'expense_date': expense['date']}
+        for pid, split_amount in zip(participant_ids, amounts)
+    ]
+    return expense, splits
+
+@expenses_bp.route('/expenses/batch', methods=['POST'])
+def add_expenses_batch():
+    """Add many expenses in one transaction.
+    
+    Body: {expenses: [...], mode: 'atomic' | 'best_effort'}, or the bare
+    array with ?mode=. Each entry takes the same fields as POST /expenses.
+    In atomic mode nothing is written if any entry is invalid; best_effort
+    writes the valid ones. Either way the response has one result per
+    entry, in order.
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return {'error': 'Not authenticated'}, 401
+        
+        data = request.get_json(silent=True)
+        if isinstance(data, list):
+            items, mode = data, request.args.get('mode', 'atomic')
+        elif isinstance(data, dict):
+            items, mode = data.get('expenses'), data.get('mode', 'atomic')
+        else:
+            return handle_error('Body must be a list of expenses or {expenses: [...]}')
+        if not isinstance(items, list) or not items:
+            return handle_error('expenses list is required')
+        if len(items) > MAX_BATCH_SIZE:
+            return handle_error(f'At most {MAX_BATCH_SIZE} expenses per batch')
+        
+        if mode not in BATCH_MODES:
+            return handle_error('mode must be atomic or best_effort')
+        
+        # Fetch every referenced user and group up front, one IN query each;
+        # malformed values are left for build_batch_item to reject per entry
+        entries = [item for item in items if isinstance(item, dict)]
+        participant_ids = {
+            pid for item in entries if isinstance(item.get('participants'), list)
+            for pid in item['participants'] if isinstance(pid, str)
+        }
+        group_ids = {item['group_id'] for item in entries if item.get('group_id') and isinstance(item['group_id'], str)}
+        
+        known_users = set(db.session.scalars(
+            select(User.id).where(User.id.in_(participant_ids))
+        )) if participant_ids else set()
+        
+        group_members_by_id = {}
+        if group_ids:
+            for group_id in db.session.scalars(select(Group.id).where(Group.id.in_(group_ids))):
+                # Insertion-ordered, with constant-time membership checks
+                group_members_by_id[group_id] = {}
+            membership = db.session.execute(
+                select(group_members.c.group_id, group_members.c.user_id).where(
+                    group_members.c.group_id.in_(group_members_by_id)
+                )
+            )
+            for group_id, member_id in membership:
+                group_members_by_id[group_id][member_id] = None
+        
+        results, expenses, splits = [], [], []
+        deltas = defaultdict(lambda: defaultdict(lambda: [0.0, 0.0]))
+        spend = rollups.RollupDeltas()
+        for index, item in enumerate(items):
+            try:
+                expense, item_splits = build_batch_item(user, item, known_users, group_members_by_id)
+            except ValueError as e:
+                results.append({'index': index, 'success': False, 'error': str(e)})
+                continue
+            
+            expenses.append(expense)
+            splits.extend(item_splits)
+            deltas[expense['group_id']][user.id][0] += expense['amount']
+            for split in item_splits:
+                deltas[expense['group_id']][split['user_id']][1] += split['amount']
+            spend.add_expense(expense['group_id'], expense['category'], expense['date'], expense['amount'],
+                              [(split['user_id'], split['amount']) for split in item_splits])
+            results.append({'index': index, 'success': True, 'id': expense['id']})
+        
+        failed = len(items) - len(expenses)
+        if failed and mode == 'atomic':
+            return {
+                'success': False,
+                'mode': mode,
+                'created': 0,
+                'results': results
+            }, 400
+        
+        if expenses:
+            db.session.execute(insert(Expense), expenses)
+            db.session.execute(insert(ExpenseSplit), splits)
+            for group_id, group_deltas in deltas.items():
+                ledger.apply_deltas(group_id, {uid: tuple(d) for uid, d in group_deltas.items()})
+            spend.apply()
+            db.session.commit()
+        
+        return {
+            'success': not failed,
+            'mode': mode,
+            'created': len(expenses),
+            'results': results
+        }, 201 if not failed else 200
+    except Exception as e:
+        db.session.rollback()
+        return handle_error(str(e), 500)
@@ -1,17 +1,16 @@
-from flask import Blueprint, request, jsonify, session
-from app.models import db, Group, User, group_members, Expense, ExpenseSplit
-from app.utils.helpers import generate_id, serialize_model, handle_error
+from flask import Blueprint, current_app, request
+from app.models import db, Group, GroupDeletion, User
+from app.services import settlement, debts, outbox, group_deletion, memberships
+from app.services.balances import summarize_groups
+from app.routes.notifications import publish_notifications
+from app.utils.helpers import generate_id, serialize_model, handle_error, parse_limit, encode_cursor, decode_cursor
+from app.utils import versions
+from app.utils.current_user import get_current_user, get_group_ids, invalidate_memberships, bump_membership_version
 
 groups_bp = Blueprint('groups', __name__)
 
-def get_current_user():
-    """Get current logged-in user from session"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return None
-    return User.query.get(user_id)
-
 @groups_bp.route('/groups', methods=['GET'])
+@versions.conditional
 def get_groups():
     """Get all groups for current user"""
     try:
@@ -19,49 +18,7 @@ def get_groups():
         if not user:
             return {'error': 'Not authenticated'}, 401
         
-        groups = user.groups
-        
-        groups_list = []
-        total_balance = 0
-        
-        # Define gradient colors for groups
-        gradients = [
-            'linear-gradient(135deg, #667eea 0%, #764ba2 100%)',
-            'linear-gradient(135deg, #f093fb 0%, #f5576c 100%)',
-            'linear-gradient(135deg, #4facfe 0%, #00f2fe 100%)',
-            'linear-gradient(135deg, #fa709a 0%, #fee140 100%)',
-            'linear-gradient(135deg, #a8edea 0%, #fed6e3 100%)',
-            'linear-gradient(135deg, #ff9a9e 0%, #fecfef 100%)',
-        ]
-        
-        for idx, group in enumerate(groups):
-            # Get user's total splits in this group (per-user amount, not total expense)
-            user_splits = ExpenseSplit.query.filter(
-                ExpenseSplit.user_id == user.id,
-                Expense.group_id == group.id
-            ).join(Expense).all()
-            
-            # Get total amount user paid in this group
-            user_paid = sum(expense.amount for expense in Expense.query.filter_by(paid_by=user.id, group_id=group.id).all())
-            
-            group_amount = sum(split.amount for split in user_splits)
-            # Net amount: if user paid more than they owe, it's positive (owed to them)
-            # if user owes more than they paid, it's negative (they owe)
-            net_amount = user_paid - group_amount
-            
-            total_balance += net_amount
-            
-            groups_list.append({
-                'id': group.id,
-                'name': group.name,
-                'amount': f'${abs(net_amount):.2f}',
-                'color': gradients[idx % len(gradients)],
-                'isOwed': net_amount >= 0,  # True if others owe you, False if you owe them
-                'members': [
-                    {'id': m.id, 'username': m.username, 'name': m.name}
-                    for m in group.members
-                ]
-            })
+        groups_list, total_balance = summarize_groups(user)
         
         return {
             'groups': groups_list,
@@ -92,8 +49,10 @@ def add_group():
         
         # Add current user to group
         group.members.append(user)
+        bump_membership_version([user.id])
         
         db.session.commit()
+        invalidate_memberships(user.id)
         
         return {
             'success': True,
@@ -103,9 +62,77 @@ def add_group():
         db.session.rollback()
         return handle_error(str(e), 500)
 
+# Most user ids accepted by one membership change
+MAX_MEMBER_IDS = 10000
+
+def parse_member_ids(data):
+    """The request's member_ids list, or raise ValueError"""
+    member_ids = (data or {}).get('member_ids')
+    if not isinstance(member_ids, list) or not all(isinstance(m, str) for m in member_ids):
+        raise ValueError('member_ids list is required')
+    if len(member_ids) > MAX_MEMBER_IDS:
+        raise ValueError(f'At most {MAX_MEMBER_IDS} member_ids per request')
+    return member_ids
+
+def page_args():
+    """(limit, after) from ?limit= and ?cursor=, or raise ValueError"""
+    limit = parse_limit(request.args.get('limit'), default=50, maximum=200)
+    cursor = request.args.get('cursor')
+    return limit, decode_cursor(cursor)[0] if cursor else None
+
+def members_page(group_id, limit, after=None):
+    rows, next_after = memberships.member_page(group_id, limit, after)
+    return {
+        'members': [
+            {'id': member_id, 'username': username, 'name': name}
+            for member_id, username, name in rows
+        ],
+        'next_cursor': encode_cursor(next_after) if next_after else None
+    }
+
+def membership_options():
+    """Page arguments when ?include_members=true, else None; raise ValueError"""
+    if request.args.get('include_members', '').lower() in ('1', 'true'):
+        return page_args()
+    return None
+
+def membership_response(group, changed_key, changed, page):
+    """Response for a membership change, with the first page of members if asked for"""
+    summary = {'id': group.id, 'name': group.name, 'member_count': memberships.member_count(group.id)}
+    if page:
+        summary.update(members_page(group.id, *page))
+    return {'success': True, changed_key: changed, 'group': summary}, 200
+
+@groups_bp.route('/groups/<group_id>/members', methods=['GET'])
+def get_group_members(group_id):
+    """List a group's members, paginated with ?limit= and ?cursor= (next_cursor)"""
+    try:
+        user = get_current_user()
+        if not user:
+            return {'error': 'Not authenticated'}, 401
+        
+        if not Group.query.get(group_id):
+            return handle_error('Group not found', 404)
+        
+        if group_id not in get_group_ids(user):
+            return handle_error('You are not a member of this group', 403)
+        
+        try:
+            limit, after = page_args()
+        except ValueError:
+            return handle_error('Invalid cursor or limit')
+        return members_page(group_id, limit, after), 200
+    except Exception as e:
+        return handle_error(str(e), 500)
+
 @groups_bp.route('/groups/<group_id>/members', methods=['POST'])
 def add_members_to_group(group_id):
-    """Add members to an existing group"""
+    """Add members to an existing group.
+    
+    Ids that don't exist or are already members are skipped. The group's
+    member list is included only with ?include_members=true (first page,
+    ?limit=); GET /groups/<id>/members returns the rest.
+    """
     try:
         user = get_current_user()
         if not user:
@@ -116,47 +143,87 @@ def add_members_to_group(group_id):
             return handle_error('Group not found', 404)
         
         # Check if user is in the group (can only add if you're a member)
-        if user not in group.members:
+        if group_id not in get_group_ids(user):
             return handle_error('You are not a member of this group', 403)
         
-        data = request.json
-        if 'member_ids' not in data:
-            return handle_error('member_ids list is required')
-        
-        member_ids = data['member_ids']
-        added_members = []
-        
-        for member_id in member_ids:
-            member = User.query.get(member_id)
-            if member and member not in group.members:
-                group.members.append(member)
-                added_members.append({
-                    'id': member.id,
-                    'username': member.username,
-                    'name': member.name
-                })
+        try:
+            member_ids = parse_member_ids(request.json)
+            page = membership_options()
+        except ValueError as e:
+            return handle_error(str(e))
+        
+        added = memberships.add_members(group_id, member_ids)
+        added_ids = [member_id for member_id, _, _ in added]
         
+        bump_membership_version(added_ids)
+        if added:
+            # Existing members see the new names in the group's member list
+            versions.bump(group_ids=[group_id])
+        outbox.enqueue(added_ids, f"{user.name} added you to {group.name}")
         db.session.commit()
+        invalidate_memberships(*added_ids)
+        outbox.wake()
         
-        return {
-            'success': True,
-            'added_members': added_members,
-            'group': {
-                'id': group.id,
-                'name': group.name,
-                'members': [
-                    {'id': m.id, 'username': m.username, 'name': m.name}
-                    for m in group.members
-                ]
-            }
-        }, 200
+        return membership_response(group, 'added_members', [
+            {'id': member_id, 'username': username, 'name': name}
+            for member_id, username, name in added
+        ], page)
+    except Exception as e:
+        db.session.rollback()
+        return handle_error(str(e), 500)
+
+@groups_bp.route('/groups/<group_id>/members/remove', methods=['POST'])
+def remove_members_from_group(group_id):
+    """Remove members from a group (any member can remove, including themselves).
+    
+    Body: {member_ids: [...]}; ids that aren't members are skipped. Past
+    expenses and balances are kept. Accepts ?include_members= like adding.
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return {'error': 'Not authenticated'}, 401
+        
+        group = Group.query.get(group_id)
+        if not group:
+            return handle_error('Group not found', 404)
+        
+        if group_id not in get_group_ids(user):
+            return handle_error('You are not a member of this group', 403)
+        
+        try:
+            member_ids = parse_member_ids(request.json)
+            page = membership_options()
+        except ValueError as e:
+            return handle_error(str(e))
+        
+        removed_ids = memberships.remove_members(group_id, member_ids)
+        
+        bump_membership_version(removed_ids)
+        if removed_ids:
+            # Remaining members see the names go from the group's member list
+            versions.bump(group_ids=[group_id])
+        outbox.enqueue(
+            [member_id for member_id in removed_ids if member_id != user.id],
+            f"{user.name} removed you from {group.name}"
+        )
+        db.session.commit()
+        invalidate_memberships(*removed_ids)
+        outbox.wake()
+        
+        return membership_response(group, 'removed_member_ids', removed_ids, page)
     except Exception as e:
         db.session.rollback()
         return handle_error(str(e), 500)
 
 @groups_bp.route('/groups/<group_id>', methods=['DELETE'])
 def delete_group(group_id):
-    """Delete a group (any member can delete)"""
+    """Delete a group (any member can delete).
+    
+    Groups with more than GROUP_DELETE_ASYNC_THRESHOLD expenses, or any
+    group with ?async=true, are tombstoned and purged in the background:
+    the response is 202 and GET /groups/<id>/deletion reports progress.
+    """
     try:
         user = get_current_user()
         if not user:
@@ -167,27 +234,155 @@ def delete_group(group_id):
             return handle_error('Group not found', 404)
         
         # Check if user is in the group
-        if user not in group.members:
+        if group_id not in get_group_ids(user):
             return handle_error('You are not a member of this group', 403)
         
-        # Delete all expenses associated with this group
-        expenses = Expense.query.filter_by(group_id=group_id).all()
-        for expense in expenses:
-            # Delete splits first
-            ExpenseSplit.query.filter_by(expense_id=expense.id).delete()
-            db.session.delete(expense)
-        
-        # Remove all members from group
-        group.members.clear()
+        total_expenses = group_deletion.expense_count(group_id)
+        run_async = (
+            request.args.get('async', '').lower() in ('1', 'true')
+            or total_expenses > current_app.config['GROUP_DELETE_ASYNC_THRESHOLD']
+        )
         
-        # Delete the group
-        db.session.delete(group)
+        if run_async:
+            member_ids = group_deletion.start(group_id, user.id, total_expenses)
+        else:
+            member_ids = group_deletion.delete_now(group_id)
+        bump_membership_version(member_ids)
         db.session.commit()
+        invalidate_memberships(*member_ids)
+        
+        if not run_async:
+            return {
+                'success': True,
+                'message': 'Group deleted successfully'
+            }, 200
         
+        if current_app.config['GROUP_DELETE_WORKER']:
+            group_deletion.wake()
+        else:
+            group_deletion.purge(group_id, current_app.config['GROUP_DELETE_BATCH_SIZE'])
         return {
             'success': True,
-            'message': 'Group deleted successfully'
+            'message': 'Group deletion started',
+            'deletion': serialize_model(GroupDeletion.query.get(group_id))
+        }, 202
+    except Exception as e:
+        db.session.rollback()
+        return handle_error(str(e), 500)
+
+@groups_bp.route('/groups/<group_id>/deletion', methods=['GET'])
+def get_group_deletion(group_id):
+    """Progress of an asynchronous group deletion (visible to whoever started it)"""
+    try:
+        user = get_current_user()
+        if not user:
+            return {'error': 'Not authenticated'}, 401
+        
+        deletion = GroupDeletion.query.get(group_id)
+        if not deletion or deletion.requested_by != user.id:
+            return handle_error('Group deletion not found', 404)
+        
+        return {
+            'success': True,
+            'deletion': serialize_model(deletion)
+        }, 200
+    except Exception as e:
+        return handle_error(str(e), 500)
+
+@groups_bp.route('/groups/<group_id>/settle-up', methods=['GET', 'POST'])
+def settle_up(group_id):
+    """Suggest (GET) or record (POST) the transfers that settle a group"""
+    try:
+        user = get_current_user()
+        if not user:
+            return {'error': 'Not authenticated'}, 401
+        
+        group = Group.query.get(group_id)
+        if not group:
+            return handle_error('Group not found', 404)
+        
+        if group_id not in get_group_ids(user):
+            return handle_error('You are not a member of this group', 403)
+        
+        transfers = settlement.simplify_debts(settlement.net_positions(group_id))
+        
+        user_ids = {uid for t in transfers for uid in t[:2]}
+        names = dict(
+            db.session.query(User.id, User.name).filter(User.id.in_(user_ids)).all()
+        ) if user_ids else {}
+        
+        if request.method == 'POST':
+            # All transfers are recorded in one transaction
+            notifications = settlement.execute_transfers(group_id, transfers, names)
+            db.session.commit()
+            publish_notifications(notifications)
+        
+        return {
+            'success': True,
+            'group_id': group_id,
+            'settled': request.method == 'POST',
+            'transfers': [
+                {
+                    'from': {'id': from_id, 'name': names.get(from_id, 'Unknown')},
+                    'to': {'id': to_id, 'name': names.get(to_id, 'Unknown')},
+                    'amount': f'${cents / 100:.2f}',
+                    'raw_amount': cents / 100
+                }
+                for from_id, to_id, cents in transfers
+            ]
         }, 200
     except Exception as e:
         db.session.rollback()
         return handle_error(str(e), 500)
+
+# Dense matrices grow with members squared; larger groups must use sparse output
+MAX_DENSE_MEMBERS = 1000
+
+@groups_bp.route('/groups/<group_id>/balances', methods=['GET'])
+def get_pairwise_balances(group_id):
+    """Get how much each member owes each other member.
+    
+    ?format=sparse (default) returns [debtor_index, creditor_index, amount]
+    entries; ?format=dense returns the full member x member matrix.
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return {'error': 'Not authenticated'}, 401
+        
+        group = Group.query.get(group_id)
+        if not group:
+            return handle_error('Group not found', 404)
+        
+        if group_id not in get_group_ids(user):
+            return handle_error('You are not a member of this group', 403)
+        
+        output_format = request.args.get('format', 'sparse')
+        if output_format not in ('sparse', 'dense'):
+            return handle_error('format must be sparse or dense')
+        
+        user_ids, debtors, creditors, amounts = debts.pairwise_balances(group_id)
+        if output_format == 'dense' and len(user_ids) > MAX_DENSE_MEMBERS:
+            return handle_error(f'Too many members for dense output (max {MAX_DENSE_MEMBERS}), use format=sparse')
+        
+        names = dict(
+            db.session.query(User.id, User.name).filter(User.id.in_(user_ids)).all()
+        ) if user_ids else {}
+        
+        result = {
+            'success': True,
+            'group_id': group_id,
+            'format': output_format,
+            'members': [{'id': uid, 'name': names.get(uid, 'Unknown')} for uid in user_ids]
+        }
+        if output_format == 'dense':
+            result['matrix'] = debts.to_dense(len(user_ids), debtors, creditors, amounts).tolist()
+        else:
+            result['entries'] = [
+                [debtor, creditor, amount]
+                for debtor, creditor, amount in zip(debtors.tolist(), creditors.tolist(), amounts.tolist())
+            ]
+        
+        return result, 200
+    except Exception as e:
+        return handle_error(str(e), 500)
@@ -1,18 +1,29 @@
-from flask import Blueprint, request, jsonify, session
+import json
+from datetime import datetime, timezone
+from flask import Blueprint, Response, current_app, request, jsonify, session
 from app import db
-from app.models import Notification, User
-from app.utils.helpers import generate_id, handle_error, serialize_model
+from app.models import Notification
+from app.utils.helpers import handle_error, serialize_model
+from app.utils.current_user import get_current_user
+from app.utils import versions
+from app.services import pubsub, outbox, unread, notification_list
 
 notifications_bp = Blueprint('notifications', __name__)
 
-def get_current_user():
-    """Get current logged-in user from session"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return None
-    return User.query.get(user_id)
+# Upper bound on ids per bulk mark-read request
+MAX_MARK_READ_IDS = 1000
+
+def format_event(event):
+    """One SSE frame for a serialized notification"""
+    return f"id: {event['id']}\nevent: notification\ndata: {json.dumps(event)}\n\n"
+
+def publish_notifications(notifications):
+    """Push committed notifications to any open streams"""
+    for notification in notifications:
+        pubsub.publish(notification.user_id, serialize_model(notification))
 
 @notifications_bp.route('/notifications', methods=['GET'])
+@versions.conditional
 def get_notifications():
     """Get user's notifications"""
     try:
@@ -20,7 +31,7 @@ def get_notifications():
         if not user:
             return {'error': 'Not authenticated'}, 401
             
-        notifications = Notification.query.filter_by(user_id=user.id).order_by(Notification.created_at.desc()).limit(50).all()
+        notifications = db.session.scalars(notification_list.latest_query(user.id)).all()
         
         return {
             'success': True,
@@ -29,6 +40,70 @@ def get_notifications():
     except Exception as e:
         return handle_error(str(e), 500)
 
+@notifications_bp.route('/notifications/stream', methods=['GET'])
+def stream_notifications():
+    """Push new notifications as Server-Sent Events.
+    
+    Reconnecting clients send Last-Event-ID (or ?last_event_id=) and first
+    receive whatever they missed since that notification.
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return {'error': 'Not authenticated'}, 401
+        
+        # Subscribe before replaying so nothing slips through in between
+        subscription = pubsub.subscribe(user.id)
+        
+        missed = []
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        if last_event_id:
+            last = Notification.query.filter_by(id=last_event_id, user_id=user.id).first()
+            if last:
+                missed = [serialize_model(n) for n in db.session.scalars(notification_list.replay_query(user.id, last))]
+        
+        # Don't hold a database connection for the life of an idle stream
+        db.session.close()
+        keepalive = current_app.config['SSE_KEEPALIVE_SECONDS']
+        
+        def events():
+            sent = set()
+            try:
+                yield 'retry: 3000\n\n'
+                for event in missed:
+                    sent.add(event['id'])
+                    yield format_event(event)
+                while True:
+                    event = subscription.get(timeout=keepalive)
+                    if event is None:
+                        yield ': keepalive\n\n'
+                    elif event['id'] not in sent:
+                        yield format_event(event)
+            finally:
+                pubsub.unsubscribe(subscription)
+        
+        return Response(events(), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+    except Exception as e:
+        return handle_error(str(e), 500)
+
+@notifications_bp.route('/notifications/unread-count', methods=['GET'])
+def get_unread_count():
+    """Get the number of unread notifications"""
+    try:
+        user = get_current_user()
+        if not user:
+            return {'error': 'Not authenticated'}, 401
+        
+        return {
+            'success': True,
+            'unread': unread.unread_count(user.id)
+        }
+    except Exception as e:
+        return handle_error(str(e), 500)
+
 @notifications_bp.route('/notifications/<notification_id>/read', methods=['POST'])
 def mark_read(notification_id):
     """Mark notification as read"""
@@ -41,7 +116,7 @@ def mark_read(notification_id):
         if not notification:
             return handle_error('Notification not found', 404)
             
-        notification.read = True
+        unread.mark_read(user.id, ids=[notification_id])
         db.session.commit()
         
         return {'success': True}
@@ -49,18 +124,51 @@ def mark_read(notification_id):
         db.session.rollback()
         return handle_error(str(e), 500)
 
-def create_notification(user_id, message, type='info'):
-    """Helper to create a notification"""
+@notifications_bp.route('/notifications/read', methods=['POST'])
+def mark_many_read():
+    """Mark several notifications read in one statement.
+    
+    Body: {ids: [...]} and/or {before: ISO timestamp}; {before} alone marks
+    everything created before that time.
+    """
     try:
-        notification = Notification(
-            id=generate_id(),
-            user_id=user_id,
-            message=message,
-            type=type
-        )
-        db.session.add(notification)
+        user = get_current_user()
+        if not user:
+            return {'error': 'Not authenticated'}, 401
+        
+        data = request.json or {}
+        ids = data.get('ids')
+        before = data.get('before')
+        if ids is None and before is None:
+            return handle_error('ids or before is required')
+        
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+                return handle_error('ids must be a list of notification ids')
+            if len(ids) > MAX_MARK_READ_IDS:
+                return handle_error(f'At most {MAX_MARK_READ_IDS} ids per request')
+        if before is not None:
+            try:
+                before = datetime.fromisoformat(before.replace('Z', '+00:00'))
+            except (AttributeError, ValueError):
+                return handle_error('before must be an ISO 8601 timestamp')
+            # Stored timestamps are naive UTC
+            if before.tzinfo:
+                before = before.astimezone(timezone.utc).replace(tzinfo=None)
+        
+        marked = unread.mark_read(user.id, ids=ids, before=before)
         db.session.commit()
-        return notification
+        
+        return {
+            'success': True,
+            'marked': marked,
+            'unread': unread.unread_count(user.id)
+        }
     except Exception as e:
-        print(f"Failed to create notification: {e}")
-        return None
+        db.session.rollback()
+        return handle_error(str(e), 500)
+
+def create_notification(user_id, message, type='info'):
+    """Helper to create a notification with the caller's transaction; the outbox
+    writes it once that commits (call outbox.wake() after committing)"""
+    outbox.enqueue([user_id], message, type)
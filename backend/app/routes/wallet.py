@@ -1,18 +1,18 @@
+from datetime import datetime
 from flask import Blueprint, request, jsonify, session
 from app import db
 from app.models import Wallet, Expense, ExpenseSplit, User
 from app.utils.helpers import generate_id, serialize_model, handle_error
+from app.utils.current_user import get_current_user
+from app.utils import versions
+from app.services import ledger, unread, categories, rollups
+from app.services.balances import wallet_totals
+from app.routes.notifications import publish_notifications
 
 wallet_bp = Blueprint('wallet', __name__)
 
-def get_current_user():
-    """Get current logged-in user from session"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return None
-    return User.query.get(user_id)
-
 @wallet_bp.route('/wallet', methods=['GET'])
+@versions.conditional
 def get_wallet():
     """Get wallet information with spending stats"""
     try:
@@ -23,37 +23,12 @@ def get_wallet():
         wallet = Wallet.query.filter_by(user_id=user.id).first()
         wallet_balance = wallet.balance if wallet else 0.0
         
-        # Calculate spending stats
-        total_spent = 0.0
-        total_owed_by_others = 0.0
-        total_owed_to_others = 0.0
-        
-        # Get all expenses the user paid
-        expenses_paid = Expense.query.filter_by(paid_by=user.id).all()
-        total_spent = sum(exp.amount for exp in expenses_paid)
-        
-        # Get all expense splits for the user
-        all_splits = ExpenseSplit.query.filter_by(user_id=user.id).all()
+        # Calculate spending stats with conditional aggregates in one query:
+        # what the user paid, their share of expenses someone else paid,
+        # and their own share of the expenses they paid
+        total_spent, total_owed_to_others, user_share_in_paid_expenses = wallet_totals(user.id)
         
-        for split in all_splits:
-            expense = Expense.query.get(split.expense_id)
-            if expense:
-                if expense.paid_by != user.id:
-                    # User owes this amount (someone else paid)
-                    total_owed_to_others += split.amount
-                else:
-                    # User paid, others owe them
-                    # This is already counted in total_spent, but we calculate who owes what
-                    pass
-        
-        # Calculate how much others owe the user
-        # Total spent by user - User's share in those expenses
-        user_share_in_paid_expenses = 0.0
-        for split in all_splits:
-            expense = Expense.query.get(split.expense_id)
-            if expense and expense.paid_by == user.id:
-                user_share_in_paid_expenses += split.amount
-                
+        # Others owe the user: total spent by user - user's share in those expenses
         total_owed_by_others = total_spent - user_share_in_paid_expenses
         
         return {
@@ -99,6 +74,7 @@ def link_bank_account():
             db.session.add(wallet)
         else:
             wallet.bank_account = account_number[-4:]
+        versions.bump([user.id])
             
         db.session.commit()
         
@@ -146,6 +122,7 @@ def load_balance():
             # The user said "make sure i can add dummy money, after i have linked a dummy bank account number."
             # So let's just process it.
             wallet.balance += amount
+        versions.bump([user.id])
         
         db.session.commit()
         
@@ -216,12 +193,15 @@ def pay_user():
         # So to reduce debt, we need to increase (Expenses paid by User A where User B is split).
         # So we create an expense paid by Sender (User A), split to Recipient (User B).
         
+        title = f"Payment from {user.name}"
         payment_expense = Expense(
             id=generate_id(),
-            title=f"Payment from {user.name}",
+            title=title,
+            category=categories.PAYMENT_CATEGORY,
             amount=amount,
             paid_by=user.id,
-            group_id=None # Direct payment, not linked to a group
+            group_id=None, # Direct payment, not linked to a group
+            date=datetime.utcnow()
         )
         db.session.add(payment_expense)
         
@@ -229,9 +209,13 @@ def pay_user():
             id=generate_id(),
             expense_id=payment_expense.id,
             user_id=recipient.id,
-            amount=amount
+            amount=amount,
+            expense_date=payment_expense.date
         )
         db.session.add(payment_split)
+        shares = [(recipient.id, amount)]
+        ledger.record_expense(payment_expense, shares)
+        rollups.record_expense(payment_expense, shares)
         
         # Create notification for recipient
         from app.models import Notification
@@ -242,8 +226,10 @@ def pay_user():
             type='success'
         )
         db.session.add(notification)
+        unread.record_notifications([notification])
         
         db.session.commit()
+        publish_notifications([notification])
         
         return {
             'success': True,
@@ -0,0 +1,77 @@
+from sqlalchemy import select, func, case
+from sqlalchemy.orm import selectinload
+from app.models import db, Expense, ExpenseSplit, Group, GroupBalance
+from app.utils.current_user import get_group_ids
+
+# Define gradient colors for groups
+GROUP_GRADIENTS = [
+    'linear-gradient(135deg, #667eea 0%, #764ba2 100%)',
+    'linear-gradient(135deg, #f093fb 0%, #f5576c 100%)',
+    'linear-gradient(135deg, #4facfe 0%, #00f2fe 100%)',
+    'linear-gradient(135deg, #fa709a 0%, #fee140 100%)',
+    'linear-gradient(135deg, #a8edea 0%, #fed6e3 100%)',
+    'linear-gradient(135deg, #ff9a9e 0%, #fecfef 100%)',
+]
+
+def wallet_totals(user_id):
+    """Spending stats for the wallet page in one round trip.
+    
+    Returns (total_spent, owed_to_others, self_share) where self_share is the
+    user's own split of expenses they paid.
+    """
+    total_spent = select(func.coalesce(func.sum(Expense.amount), 0.0)).where(
+        Expense.paid_by == user_id
+    ).scalar_subquery()
+    
+    stmt = select(
+        total_spent,
+        func.coalesce(func.sum(case((Expense.paid_by != user_id, ExpenseSplit.amount), else_=0.0)), 0.0),
+        func.coalesce(func.sum(case((Expense.paid_by == user_id, ExpenseSplit.amount), else_=0.0)), 0.0)
+    ).select_from(ExpenseSplit).join(
+        Expense, Expense.id == ExpenseSplit.expense_id
+    ).where(ExpenseSplit.user_id == user_id)
+    
+    return tuple(db.session.execute(stmt).one())
+
+def group_balances(user_id, group_ids):
+    """Net balance per group from the group_balances ledger (one indexed read)"""
+    if not group_ids:
+        return {}
+    stmt = select(GroupBalance.group_id, GroupBalance.paid, GroupBalance.owed).where(
+        GroupBalance.user_id == user_id,
+        GroupBalance.group_id.in_(group_ids)
+    )
+    return {group_id: paid - owed for group_id, paid, owed in db.session.execute(stmt)}
+
+def summarize_groups(user):
+    """Build the per-group summary shared by /dashboard and /groups.
+    
+    Returns (groups_list, total_balance).
+    """
+    group_ids = list(get_group_ids(user))
+    groups = Group.query.filter(Group.id.in_(group_ids)).options(
+        selectinload(Group.members)
+    ).order_by(Group.created_at, Group.id).all() if group_ids else []
+    balances = group_balances(user.id, group_ids)
+    
+    groups_list = []
+    total_balance = 0
+    for idx, group in enumerate(groups):
+        # Net amount: if user paid more than they owe, it's positive (owed to them)
+        # if user owes more than they paid, it's negative (they owe)
+        net_amount = balances.get(group.id, 0.0)
+        total_balance += net_amount
+        
+        groups_list.append({
+            'id': group.id,
+            'name': group.name,
+            'amount': f'${abs(net_amount):.2f}',
+            'color': GROUP_GRADIENTS[idx % len(GROUP_GRADIENTS)],
+            'isOwed': net_amount >= 0,  # True if others owe you, False if you owe them
+            'members': [
+                {'id': m.id, 'username': m.username, 'name': m.name}
+                for m in group.members
+            ]
+        })
+    
+    return groups_list, total_balance
@@ -0,0 +1,104 @@
+import json
+import re
+from sqlalchemy import select, update
+from app.models import db, Expense
+
+# Category -> title keywords, in priority order: when a title matches several
+# categories the earliest one wins. Matching is case-insensitive substring.
+DEFAULT_KEYWORDS = {
+    'groceries': ['grocery', 'groceries', 'food', 'supermarket'],
+    'dining': ['dinner', 'lunch', 'restaurant', 'cafe', 'bistro'],
+    'entertainment': ['movie', 'cinema', 'tickets'],
+    'coffee': ['coffee', 'cafe', 'starbucks'],
+    'internet': ['internet', 'wifi', 'broadband'],
+    'fuel': ['gas', 'fuel', 'petrol'],
+    'transport': ['uber', 'taxi', 'transport'],
+}
+DEFAULT_CATEGORY = 'other'
+
+# Wallet payments and settle-ups: money moving between users, not spend.
+# Set explicitly when they are recorded, never by classify()
+PAYMENT_CATEGORY = 'payment'
+
+ICONS = {
+    'groceries': '🛒',
+    'dining': '🍽️',
+    'entertainment': '🎬',
+    'coffee': '☕',
+    'internet': '🌐',
+    'fuel': '⛽',
+    'transport': '🚗',
+    PAYMENT_CATEGORY: '💸',
+}
+DEFAULT_ICON = '💰'
+
+class Classifier:
+    """Multi-keyword title classifier compiled into a single regex.
+    
+    The alternation sits inside a lookahead so every start position is
+    tried, and lists keywords in priority order so the best keyword wins at
+    each position; the best category over all positions is the answer.
+    """
+    def __init__(self, keywords):
+        self.categories = list(keywords)
+        self.priority = {}
+        for category in self.categories:
+            for word in keywords[category]:
+                self.priority.setdefault(word.lower(), (self.categories.index(category), category))
+        
+        words = sorted(self.priority, key=lambda w: self.priority[w][0])
+        self.pattern = re.compile('(?=(' + '|'.join(re.escape(w) for w in words) + '))') if words else None
+    
+    def classify(self, title):
+        if not title or self.pattern is None:
+            return DEFAULT_CATEGORY
+        matches = self.pattern.findall(title.lower())
+        if not matches:
+            return DEFAULT_CATEGORY
+        return min(map(self.priority.__getitem__, matches))[1]
+
+classifier = Classifier(DEFAULT_KEYWORDS)
+
+def configure(app):
+    """Swap in the EXPENSE_CATEGORY_KEYWORDS table (JSON object) if one is configured"""
+    global classifier
+    keywords = app.config['EXPENSE_CATEGORY_KEYWORDS']
+    if keywords:
+        classifier = Classifier(json.loads(keywords) if isinstance(keywords, str) else keywords)
+
+def classify(title):
+    return classifier.classify(title)
+
+def icon(category):
+    return ICONS.get(category, DEFAULT_ICON)
+
+def backfill(chunk_size=1000, reclassify=False):
+    """Classify stored expenses in chunks, committing each one.
+    
+    Only rows without a category unless reclassify is set (e.g. after the
+    keyword table changed); payments are never reclassified. Returns the
+    number of rows updated.
+    """
+    updated = 0
+    last_id = ''
+    while True:
+        query = select(Expense.id, Expense.title, Expense.category).where(Expense.id > last_id)
+        if not reclassify:
+            query = query.where(Expense.category.is_(None))
+        else:
+            query = query.where(Expense.category.is_distinct_from(PAYMENT_CATEGORY))
+        rows = db.session.execute(query.order_by(Expense.id).limit(chunk_size)).all()
+        if not rows:
+            return updated
+        
+        changes = [
+            {'id': row.id, 'category': category}
+            for row in rows
+            if (category := classify(row.title)) != row.category
+        ]
+        if changes:
+            # ORM bulk UPDATE by primary key: one executemany per chunk
+            db.session.execute(update(Expense), changes)
+        db.session.commit()
+        updated += len(changes)
+        last_id = rows[-1].id
@@ -0,0 +1,59 @@
+import numpy as np
+from sqlalchemy import select
+from app.models import db, Expense, ExpenseSplit, group_members
+
+def pairwise_balances(group_id):
+    """Who owes whom inside a group, netted per pair of users.
+    
+    Pulls (debtor, payer, amount) columns for every split in one query and
+    aggregates them with NumPy: each pair is keyed as lo * n + hi over the
+    sorted member indexes, signed by direction, and summed with bincount.
+    Returns (user_ids, debtors, creditors, amounts) where debtors/creditors
+    are index arrays into user_ids and amounts are positive, rounded to cents.
+    user_ids lists every current member (so settled ones show zero balances)
+    followed by any former members who still appear in the group's splits.
+    """
+    member_ids = list(db.session.scalars(
+        select(group_members.c.user_id).where(group_members.c.group_id == group_id).order_by(group_members.c.user_id)
+    ))
+    
+    stmt = select(ExpenseSplit.user_id, Expense.paid_by, ExpenseSplit.amount).join(
+        Expense, Expense.id == ExpenseSplit.expense_id
+    ).where(Expense.group_id == group_id, ExpenseSplit.user_id != Expense.paid_by)
+    rows = db.session.execute(stmt).all()
+    
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return member_ids, empty, empty, np.empty(0)
+    
+    split_users, payers, amounts = zip(*rows)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    
+    # Map user ids to dense indexes in one pass (dict lookups beat sorting object arrays)
+    index = {user_id: i for i, user_id in enumerate(member_ids)}
+    debtor_idx = np.fromiter((index.setdefault(u, len(index)) for u in split_users), dtype=np.int64, count=len(rows))
+    payer_idx = np.fromiter((index.setdefault(u, len(index)) for u in payers), dtype=np.int64, count=len(rows))
+    user_ids = list(index)
+    n = len(user_ids)
+    
+    # Canonical pair key; positive weight means lo owes hi
+    lo = np.minimum(debtor_idx, payer_idx)
+    hi = np.maximum(debtor_idx, payer_idx)
+    signed = np.where(debtor_idx < payer_idx, amounts, -amounts)
+    
+    pair_keys, pair_idx = np.unique(lo * n + hi, return_inverse=True)
+    net = np.round(np.bincount(pair_idx.reshape(-1), weights=signed), 2)
+    
+    nonzero = net != 0
+    pair_keys, net = pair_keys[nonzero], net[nonzero]
+    lo, hi = pair_keys // n, pair_keys % n
+    
+    debtors = np.where(net > 0, lo, hi)
+    creditors = np.where(net > 0, hi, lo)
+    return user_ids, debtors, creditors, np.abs(net)
+
+def to_dense(size, debtors, creditors, amounts):
+    """Scatter sparse pairwise balances into a size x size matrix"""
+    matrix = np.zeros((size, size))
+    matrix[debtors, creditors] = amounts
+    return matrix
@@ -0,0 +1,33 @@
+from sqlalchemy import select, tuple_
+from app.models import Expense, ExpenseSplit, User
+
+def page_query(user_id, group_ids, limit, category=None, after=None):
+    """Statement for one page of a user's expenses, newest first.
+
+    Driven from the user's splits on ix_expense_splits_user_date, whose
+    (user_id, expense_date, expense_id) order is the page order, so a page
+    reads about limit + 1 index entries however deep the cursor is. after
+    is the (date, expense id) of the previous page's last row. Rows are
+    (Expense, the user's share, payer name); one extra row signals more.
+    """
+    stmt = select(
+        Expense, ExpenseSplit.amount, User.name
+    ).select_from(ExpenseSplit).join(
+        Expense, Expense.id == ExpenseSplit.expense_id
+    ).outerjoin(
+        User, User.id == Expense.paid_by
+    ).where(
+        ExpenseSplit.user_id == user_id,
+        Expense.group_id.in_(list(group_ids))
+    )
+
+    if category:
+        stmt = stmt.where(Expense.category == category)
+
+    # A row-value comparison is a range on the index, not a filter over it
+    if after:
+        stmt = stmt.where(tuple_(ExpenseSplit.expense_date, ExpenseSplit.expense_id) < tuple_(*after))
+
+    return stmt.order_by(
+        ExpenseSplit.expense_date.desc(), ExpenseSplit.expense_id.desc()
+    ).limit(limit + 1)
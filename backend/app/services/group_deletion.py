@@ -0,0 +1,148 @@
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import delete, func, select, update
+from app.models import db, Expense, ExpenseSplit, Group, GroupDeletion, group_members
+from app.services import ledger, rollups
+from app.utils import versions
+
+# Short sleep between batches so other writers get the SQLite write lock
+BATCH_PAUSE = 0.01
+
+_app = None
+_worker = None
+_wake = threading.Event()
+
+def configure(app):
+    """Start the purge worker, which also resumes deletions left unfinished by a restart"""
+    global _app, _worker
+    _app = app
+    if app.config['GROUP_DELETE_WORKER'] and _worker is None:
+        _worker = threading.Thread(target=_run, name='group-deletion', daemon=True)
+        _worker.start()
+
+def expense_count(group_id):
+    return db.session.scalar(select(func.count()).select_from(Expense).where(Expense.group_id == group_id))
+
+def _delete_expenses(expense_ids):
+    """Delete expenses (ids or a subquery) and their splits, bumping the data
+    version of everyone who paid or shared in them.
+    
+    Does not commit; returns the number of expenses deleted.
+    """
+    # RETURNING names exactly the users whose wallet totals and lists changed
+    sharers = db.session.scalars(
+        delete(ExpenseSplit).where(ExpenseSplit.expense_id.in_(expense_ids))
+        .returning(ExpenseSplit.user_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    payers = db.session.scalars(
+        delete(Expense).where(Expense.id.in_(expense_ids))
+        .returning(Expense.paid_by)
+        .execution_options(synchronize_session=False)
+    ).all()
+    versions.bump(set(sharers) | set(payers))
+    return len(payers)
+
+def _remove_members(group_id):
+    """Drop a group's memberships and ledger rows; returns the former member ids"""
+    member_ids = list(db.session.scalars(
+        select(group_members.c.user_id).where(group_members.c.group_id == group_id)
+    ))
+    db.session.execute(delete(group_members).where(group_members.c.group_id == group_id))
+    ledger.clear_group(group_id)
+    return member_ids
+
+def delete_now(group_id):
+    """Delete a group and everything in it with set-based statements.
+    
+    Does not commit; returns the former member ids.
+    """
+    # Reads the group's splits, so it has to run before they go
+    rollups.clear_group(group_id)
+    _delete_expenses(select(Expense.id).where(Expense.group_id == group_id))
+    member_ids = _remove_members(group_id)
+    db.session.execute(delete(Group).where(Group.id == group_id).execution_options(synchronize_session=False))
+    return member_ids
+
+def start(group_id, user_id, total_expenses):
+    """Tombstone a group for background purging.
+    
+    Members and balances go at once, so the group disappears for everyone
+    when this commits; expenses are purged later by purge(). Does not
+    commit; returns the former member ids.
+    """
+    db.session.add(GroupDeletion(group_id=group_id, requested_by=user_id, total_expenses=total_expenses))
+    return _remove_members(group_id)
+
+def wake():
+    """Have the worker pick up new deletions now rather than at its next poll"""
+    _wake.set()
+
+def purge(group_id, batch_size):
+    """Delete a tombstoned group's expenses in bounded, separately committed batches.
+    
+    Each batch bumps the data version of the users it touched, so their
+    cached /expenses and /wallet responses stop matching as it commits.
+    """
+    # Claim the job; only the worker that flips it to running touches the rollups
+    claimed = db.session.execute(
+        update(GroupDeletion)
+        .where(GroupDeletion.group_id == group_id, GroupDeletion.status == 'pending')
+        .values(status='running')
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if claimed:
+        # Take the group out of the rollups while all of its splits still exist
+        rollups.clear_group(group_id)
+    db.session.commit()
+    
+    status = db.session.scalar(select(GroupDeletion.status).where(GroupDeletion.group_id == group_id))
+    if status != 'running':
+        return
+    
+    while True:
+        expense_ids = list(db.session.scalars(
+            select(Expense.id).where(Expense.group_id == group_id).limit(batch_size)
+        ))
+        if not expense_ids:
+            break
+        deleted = _delete_expenses(expense_ids)
+        # Increment rather than assign, so two workers on one group still count right
+        db.session.execute(
+            update(GroupDeletion)
+            .where(GroupDeletion.group_id == group_id)
+            .values(deleted_expenses=GroupDeletion.deleted_expenses + deleted)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        time.sleep(BATCH_PAUSE)
+    
+    db.session.execute(delete(Group).where(Group.id == group_id).execution_options(synchronize_session=False))
+    db.session.execute(
+        update(GroupDeletion)
+        .where(GroupDeletion.group_id == group_id)
+        .values(status='done', finished_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+def run_pending():
+    """Purge every unfinished deletion; returns how many were processed"""
+    group_ids = list(db.session.scalars(
+        select(GroupDeletion.group_id).where(GroupDeletion.status != 'done').order_by(GroupDeletion.created_at)
+    ))
+    for group_id in group_ids:
+        purge(group_id, _app.config['GROUP_DELETE_BATCH_SIZE'])
+    return len(group_ids)
+
+def _run():
+    while True:
+        _wake.wait(_app.config['GROUP_DELETE_POLL_INTERVAL'])
+        _wake.clear()
+        with _app.app_context():
+            try:
+                run_pending()
+            except Exception:
+                db.session.rollback()
+                _app.logger.exception('Group deletion worker failed')
@@ -0,0 +1,252 @@
+import csv
+import json
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import insert, select, or_
+from app.models import db, Expense, ExpenseSplit, User, group_members
+from app.utils.helpers import generate_id
+from app.services import ledger, categories, rollups
+from app.services.splitting import parse_amount, split_amounts
+
+FORMATS = ('csv', 'ndjson')
+
+# Keep the error list bounded for very dirty files; the count is always exact
+MAX_REPORTED_ERRORS = 100
+
+def iter_records(stream, fmt):
+    """Yield (line_number, record) from a text stream.
+    
+    record is a dict, or the exception raised while parsing that line.
+    CSV participants are ';'-separated usernames/emails.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError('Expected a JSON object')
+                yield line_number, record
+            except ValueError as e:
+                yield line_number, e
+
+def text_field(record, name):
+    """A string field stripped of whitespace, or None when empty"""
+    value = record.get(name) or ''
+    if not isinstance(value, str):
+        raise ValueError(f'{name} must be a string')
+    return value.strip() or None
+
+def parse_record(record):
+    """Validate one import record into plain values; raises ValueError"""
+    title = text_field(record, 'title')
+    if not title:
+        raise ValueError('title is required')
+    
+    amount = parse_amount(record.get('amount'))
+    if amount <= 0:
+        raise ValueError('amount must be greater than 0')
+    
+    participants = record.get('participants') or []
+    if isinstance(participants, str):
+        participants = [p.strip() for p in participants.split(';') if p.strip()]
+    if not isinstance(participants, list) or not all(isinstance(p, str) for p in participants):
+        raise ValueError('participants must be a list of usernames or emails')
+    
+    date = record.get('date')
+    try:
+        date = datetime.fromisoformat(date) if date else None
+    except (ValueError, TypeError):
+        raise ValueError('date must be ISO 8601')
+    
+    return {
+        'title': title,
+        'amount': amount,
+        'paid_by': text_field(record, 'paid_by'),
+        'group_id': text_field(record, 'group_id'),
+        'participants': participants,
+        'date': date
+    }
+
+class ExpenseImporter:
+    """Bulk-insert expenses in chunked transactions for one importing user.
+    
+    Usernames/emails, group access and group member lists are each resolved
+    with one query per chunk for values not seen before, then cached for the
+    rest of the import.
+    
+    The importing user must be the payer or a participant of every row.
+    Everyone on a group row must be a member of that group; everyone else on
+    a row without a group must share a group with the importing user.
+    """
+    
+    def __init__(self, user, chunk_size=1000):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.user_ids = {}
+        self.allowed_groups = {}
+        self.group_members = {}
+        self.contacts = None
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+    
+    def run(self, records):
+        chunk = []
+        for line_number, record in records:
+            if isinstance(record, Exception):
+                self.fail(line_number, str(record))
+                continue
+            try:
+                chunk.append((line_number, parse_record(record)))
+            except ValueError as e:
+                self.fail(line_number, str(e))
+                continue
+            if len(chunk) >= self.chunk_size:
+                self.flush(chunk)
+                chunk = []
+        if chunk:
+            self.flush(chunk)
+        
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors
+        }
+    
+    def fail(self, line_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'error': message})
+    
+    def resolve(self, chunk):
+        """Fill the user/group caches for everything this chunk references"""
+        identifiers = {row['paid_by'] for _, row in chunk if row['paid_by']}
+        identifiers.update(p for _, row in chunk for p in row['participants'])
+        identifiers -= self.user_ids.keys()
+        if identifiers:
+            found = db.session.execute(
+                select(User.id, User.username, User.email).where(or_(
+                    User.username.in_(identifiers),
+                    User.email.in_(identifiers),
+                    User.id.in_(identifiers)
+                ))
+            ).all()
+            for user_id, username, email in found:
+                for key in (user_id, username, email):
+                    if key in identifiers:
+                        self.user_ids[key] = user_id
+            for missing in identifiers - self.user_ids.keys():
+                self.user_ids[missing] = None
+        
+        group_ids = {row['group_id'] for _, row in chunk if row['group_id']} - self.allowed_groups.keys()
+        if group_ids:
+            members = db.session.execute(
+                select(group_members.c.group_id, group_members.c.user_id).where(
+                    group_members.c.group_id.in_(group_ids)
+                )
+            ).all()
+            # Dicts keep the member order and give O(1) membership checks
+            for group_id in group_ids:
+                self.group_members[group_id] = {}
+            for group_id, user_id in members:
+                self.group_members[group_id][user_id] = None
+            for group_id in group_ids:
+                self.allowed_groups[group_id] = self.user.id in self.group_members[group_id]
+    
+    def shared_group_users(self):
+        """Ids of everyone in any of the importing user's groups (loaded once)"""
+        if self.contacts is None:
+            my_groups = select(group_members.c.group_id).where(group_members.c.user_id == self.user.id)
+            self.contacts = set(db.session.scalars(
+                select(group_members.c.user_id).where(group_members.c.group_id.in_(my_groups)).distinct()
+            ))
+        return self.contacts
+    
+    def flush(self, chunk):
+        """Insert one chunk of parsed rows in its own transaction"""
+        self.resolve(chunk)
+        
+        expenses, splits, accepted = [], [], []
+        deltas = defaultdict(lambda: defaultdict(lambda: [0.0, 0.0]))
+        spend = rollups.RollupDeltas()
+        for line_number, row in chunk:
+            group_id = row['group_id']
+            if group_id and not self.allowed_groups.get(group_id):
+                self.fail(line_number, f'Group {group_id} not found or you are not a member')
+                continue
+            
+            paid_by = self.user_ids.get(row['paid_by']) if row['paid_by'] else self.user.id
+            if not paid_by:
+                self.fail(line_number, f"Unknown user {row['paid_by']}")
+                continue
+            
+            if row['participants']:
+                unknown = [p for p in row['participants'] if not self.user_ids.get(p)]
+                if unknown:
+                    self.fail(line_number, f"Unknown participants: {', '.join(unknown)}")
+                    continue
+                participants = list(dict.fromkeys(self.user_ids[p] for p in row['participants']))
+            elif group_id:
+                participants = list(self.group_members[group_id])
+            else:
+                self.fail(line_number, 'Either group_id or participants is required')
+                continue
+            
+            if paid_by != self.user.id and self.user.id not in participants:
+                self.fail(line_number, 'You must be the payer or a participant')
+                continue
+            involved = [paid_by, *participants]
+            if group_id:
+                if any(user_id not in self.group_members[group_id] for user_id in involved):
+                    self.fail(line_number, 'paid_by and participants must be members of the group')
+                    continue
+            elif any(user_id != self.user.id and user_id not in self.shared_group_users() for user_id in involved):
+                self.fail(line_number, 'paid_by and participants must share a group with you')
+                continue
+            
+            expense_id = generate_id()
+            expenses.append({
+                'id': expense_id,
+                'title': row['title'],
+                'category': categories.classify(row['title']),
+                'amount': row['amount'],
+                'paid_by': paid_by,
+                'group_id': group_id,
+                'date': row['date'] or datetime.utcnow()
+            })
+            shares = list(zip(participants, split_amounts(row['amount'], participants, 'equal', {}, expense_id)))
+            for participant_id, split_amount in shares:
+                splits.append({
+                    'id': generate_id(),
+                    'expense_id': expense_id,
+                    'user_id': participant_id,
+                    'amount': split_amount,
+                    'expense_date': expenses[-1]['date']
+                })
+                deltas[group_id][participant_id][1] += split_amount
+            deltas[group_id][paid_by][0] += row['amount']
+            expense = expenses[-1]
+            spend.add_expense(group_id, expense['category'], expense['date'], row['amount'], shares)
+            accepted.append(line_number)
+        
+        if not expenses:
+            return
+        
+        try:
+            db.session.execute(insert(Expense), expenses)
+            db.session.execute(insert(ExpenseSplit), splits)
+            for group_id, group_deltas in deltas.items():
+                ledger.apply_deltas(group_id, {uid: tuple(d) for uid, d in group_deltas.items()})
+            spend.apply()
+            db.session.commit()
+            self.imported += len(expenses)
+        except Exception as e:
+            db.session.rollback()
+            for line_number in accepted:
+                self.fail(line_number, f'Chunk failed: {e}')
@@ -0,0 +1,85 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import func, select
+from app.models import db, Expense, ExpenseSplit, GroupBalance, DIRECT_PAYMENTS
+from app.utils.helpers import generate_id, upsert
+from app.utils import versions
+
+def apply_deltas(group_id, deltas):
+    """Add {user_id: (paid, owed)} deltas to the ledger in the current transaction.
+    
+    Also bumps the data version of the users involved and, for a group,
+    of every member, since their expense lists and balances change.
+    """
+    if not deltas:
+        return
+    versions.bump(deltas, [group_id] if group_id else ())
+    
+    now = datetime.utcnow()
+    table = GroupBalance.__table__
+    stmt = upsert(table)
+    # Increment in SQL on conflict, so concurrent writers neither lose updates
+    # nor fail on the unique constraint when both create a user's first row
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.group_id],
+        set_={
+            'paid': table.c.paid + stmt.excluded.paid,
+            'owed': table.c.owed + stmt.excluded.owed,
+            'updated_at': stmt.excluded.updated_at
+        }
+    )
+    db.session.execute(stmt, [
+        {
+            'id': generate_id(),
+            'user_id': user_id,
+            'group_id': group_id or DIRECT_PAYMENTS,
+            'paid': paid,
+            'owed': owed,
+            'updated_at': now
+        }
+        for user_id, (paid, owed) in deltas.items()
+    ])
+
+def record_expense(expense, shares):
+    """Apply a new expense and its (user_id, amount) shares to the ledger"""
+    deltas = defaultdict(lambda: [0.0, 0.0])
+    deltas[expense.paid_by][0] += expense.amount
+    for user_id, amount in shares:
+        deltas[user_id][1] += amount
+    apply_deltas(expense.group_id, {uid: tuple(d) for uid, d in deltas.items()})
+
+def clear_group(group_id):
+    """Drop all ledger rows for a group"""
+    GroupBalance.query.filter_by(group_id=group_id).delete(synchronize_session=False)
+
+def rebuild(bind=None):
+    """Recompute the whole ledger from the raw expenses/expense_splits rows, on bind or the session.
+    
+    Does not commit; returns the number of ledger rows written.
+    """
+    bind = bind or db.session
+    totals = defaultdict(lambda: [0.0, 0.0])
+    
+    paid_rows = bind.execute(
+        select(Expense.paid_by, Expense.group_id, func.sum(Expense.amount))
+        .group_by(Expense.paid_by, Expense.group_id)
+    )
+    for user_id, group_id, paid in paid_rows:
+        totals[(user_id, group_id or DIRECT_PAYMENTS)][0] += paid or 0.0
+    
+    owed_rows = bind.execute(
+        select(ExpenseSplit.user_id, Expense.group_id, func.sum(ExpenseSplit.amount))
+        .join(Expense, Expense.id == ExpenseSplit.expense_id)
+        .group_by(ExpenseSplit.user_id, Expense.group_id)
+    )
+    for user_id, group_id, owed in owed_rows:
+        totals[(user_id, group_id or DIRECT_PAYMENTS)][1] += owed or 0.0
+    
+    table = GroupBalance.__table__
+    bind.execute(table.delete())
+    if totals:
+        bind.execute(table.insert(), [
+            {'id': generate_id(), 'user_id': user_id, 'group_id': group_id, 'paid': paid, 'owed': owed}
+            for (user_id, group_id), (paid, owed) in totals.items()
+        ])
+    return len(totals)
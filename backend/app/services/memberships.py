@@ -0,0 +1,71 @@
+from sqlalchemy import delete, func, insert, select
+from app.models import db, User, group_members
+
+def add_members(group_id, member_ids):
+    """Add existing users to a group with set-based statements.
+
+    One IN lookup for the users, one for those already in the group and a
+    single multi-row insert. Does not commit; returns (id, username, name)
+    of the users actually added, in request order.
+    """
+    member_ids = list(dict.fromkeys(member_ids))
+    if not member_ids:
+        return []
+
+    users = {
+        row.id: row for row in db.session.execute(
+            select(User.id, User.username, User.name).where(User.id.in_(member_ids))
+        )
+    }
+    existing = set(db.session.scalars(
+        select(group_members.c.user_id)
+        .where(group_members.c.group_id == group_id, group_members.c.user_id.in_(list(users)))
+    )) if users else set()
+
+    added = [tuple(users[uid]) for uid in member_ids if uid in users and uid not in existing]
+    if added:
+        db.session.execute(insert(group_members), [
+            {'group_id': group_id, 'user_id': user_id} for user_id, _, _ in added
+        ])
+    return added
+
+def remove_members(group_id, member_ids):
+    """Remove users from a group; ids that aren't members are ignored.
+
+    Their expenses and balances stay with the group. Does not commit;
+    returns the ids actually removed.
+    """
+    member_ids = list(dict.fromkeys(member_ids))
+    if not member_ids:
+        return []
+
+    condition = (group_members.c.group_id == group_id) & group_members.c.user_id.in_(member_ids)
+    removed = list(db.session.scalars(select(group_members.c.user_id).where(condition)))
+    if removed:
+        db.session.execute(delete(group_members).where(condition))
+    return removed
+
+def member_count(group_id):
+    return db.session.scalar(
+        select(func.count()).select_from(group_members).where(group_members.c.group_id == group_id)
+    )
+
+def member_page(group_id, limit, after=None):
+    """One page of a group's members ordered by user id, for keyset pagination.
+
+    Walks the (group_id, user_id) index. Returns (rows, next_after) where
+    rows are (id, username, name) and next_after is None on the last page.
+    """
+    stmt = (
+        select(User.id, User.username, User.name)
+        .join(group_members, group_members.c.user_id == User.id)
+        .where(group_members.c.group_id == group_id)
+    )
+    if after:
+        stmt = stmt.where(group_members.c.user_id > after)
+    rows = db.session.execute(stmt.order_by(group_members.c.user_id).limit(limit + 1)).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1][0]
+    return rows, None
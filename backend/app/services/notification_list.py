@@ -0,0 +1,26 @@
+from sqlalchemy import select, tuple_
+from app.models import Notification
+
+# Notifications returned by GET /notifications
+PAGE_SIZE = 50
+
+# Most missed notifications replayed to a reconnecting stream
+MAX_REPLAY = 50
+
+def latest_query(user_id, limit=PAGE_SIZE):
+    """Statement for a user's newest notifications, on ix_notifications_user_created"""
+    return select(Notification).where(
+        Notification.user_id == user_id
+    ).order_by(Notification.created_at.desc()).limit(limit)
+
+def replay_query(user_id, last, limit=MAX_REPLAY):
+    """Statement for the user's notifications after last, oldest first.
+    
+    Ordered and compared on (created_at, id): notifications written in one
+    batch share a timestamp, and comparing the timestamp alone would skip
+    the rest of last's batch.
+    """
+    return select(Notification).where(
+        Notification.user_id == user_id,
+        tuple_(Notification.created_at, Notification.id) > tuple_(last.created_at, last.id)
+    ).order_by(Notification.created_at, Notification.id).limit(limit)
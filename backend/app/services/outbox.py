@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import delete, insert, select
+from app.models import db, Notification, NotificationIntent, group_members
+from app.utils.helpers import generate_id
+from app.utils import versions
+from app.services import pubsub, unread
+
+_app = None
+_flusher = None
+_wake = threading.Event()
+
+def configure(app):
+    """Start the background flusher unless the outbox runs synchronously"""
+    global _app, _flusher
+    _app = app
+    if app.config['NOTIFICATION_OUTBOX_ASYNC'] and _flusher is None:
+        _flusher = threading.Thread(target=_run, name='notification-outbox', daemon=True)
+        _flusher.start()
+
+def enqueue(user_ids, message, type='info'):
+    """Record one notification per user in the current transaction (does not commit)"""
+    user_ids = list(user_ids)
+    if user_ids:
+        db.session.add(NotificationIntent(user_ids=user_ids, exclude=[], message=message, type=type))
+
+def enqueue_group(group_id, message, type='info', exclude=()):
+    """Record a notification for every member of a group, resolved when it is written (does not commit)"""
+    db.session.add(NotificationIntent(group_id=group_id, exclude=list(exclude), message=message, type=type))
+
+def wake():
+    """After committing enqueued intents: have the flusher write them now
+    rather than at its next poll, or write them inline when
+    NOTIFICATION_OUTBOX_ASYNC is off"""
+    if _app.config['NOTIFICATION_OUTBOX_ASYNC']:
+        _wake.set()
+    else:
+        flush()
+
+def write_batch(batch):
+    """Insert notifications for (user_ids, group_id, message, type, exclude)
+    intents in the current transaction.
+    
+    Group fan-out for the whole batch is resolved with one membership query.
+    Returns the rows written; publish them once committed.
+    """
+    group_ids = {group_id for _, group_id, _, _, _ in batch if group_id}
+    members = {}
+    if group_ids:
+        for group_id, user_id in db.session.execute(
+            select(group_members.c.group_id, group_members.c.user_id).where(
+                group_members.c.group_id.in_(group_ids)
+            )
+        ):
+            members.setdefault(group_id, []).append(user_id)
+    
+    now = datetime.utcnow()
+    rows = []
+    for user_ids, group_id, message, type, exclude in batch:
+        recipients = user_ids if user_ids is not None else members.get(group_id, [])
+        for user_id in recipients:
+            if user_id in exclude:
+                continue
+            rows.append({
+                'id': generate_id(),
+                'user_id': user_id,
+                'message': message,
+                'type': type,
+                'read': False,
+                'created_at': now
+            })
+    
+    if rows:
+        db.session.execute(insert(Notification), rows)
+        counts = Counter(row['user_id'] for row in rows)
+        unread.add_unread(counts)
+        versions.bump(counts)
+    return rows
+
+def write_pending(limit):
+    """Claim up to limit committed intents, oldest first, write their
+    notifications and commit, then push them to open streams.
+    
+    The intents are deleted in the same transaction that writes the
+    notifications, so each is written exactly once even with several
+    flushers (one per worker process) draining the table. Returns the
+    number of intents written.
+    """
+    table = NotificationIntent.__table__
+    # Read before deleting, so idle polls don't take the write lock
+    if db.session.execute(select(table.c.id).limit(1)).first() is None:
+        db.session.rollback()
+        return 0
+    
+    claimed = db.session.execute(
+        delete(table)
+        .where(table.c.id.in_(select(table.c.id).order_by(table.c.id).limit(limit)))
+        .returning(table.c.id, table.c.user_ids, table.c.group_id, table.c.message, table.c.type, table.c.exclude)
+    ).all()
+    if not claimed:
+        db.session.rollback()
+        return 0
+    
+    rows = write_batch([
+        (user_ids, group_id, message, type, exclude or [])
+        for _, user_ids, group_id, message, type, exclude in sorted(claimed)
+    ])
+    db.session.commit()
+    
+    for row in rows:
+        pubsub.publish(row['user_id'], {**row, 'created_at': row['created_at'].isoformat()})
+    return len(claimed)
+
+def flush():
+    """Write every committed intent, in the caller's app context"""
+    written = 0
+    batch_size = _app.config['NOTIFICATION_OUTBOX_BATCH_SIZE']
+    while True:
+        count = write_pending(batch_size)
+        written += count
+        if count < batch_size:
+            return written
+
+def _run():
+    config = _app.config
+    while True:
+        # Polling also picks up intents another worker committed but never wrote
+        _wake.wait(config['NOTIFICATION_OUTBOX_POLL_INTERVAL'])
+        _wake.clear()
+        # Let intents accumulate so the next commit covers more of them
+        time.sleep(config['NOTIFICATION_OUTBOX_INTERVAL'])
+        with _app.app_context():
+            try:
+                flush()
+            except Exception:
+                # The intents stay in the table and are retried at the next poll
+                db.session.rollback()
+                _app.logger.exception('Failed to write notification intents')
@@ -0,0 +1,124 @@
+import glob
+import json
+import os
+import queue
+import socket
+import threading
+from collections import defaultdict
+
+# Events buffered per idle subscriber; a slow client that overflows this
+# misses events and catches up by reconnecting with Last-Event-ID
+SUBSCRIBER_QUEUE_SIZE = 100
+
+class Subscription:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.events = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    
+    def get(self, timeout):
+        """Next event, or None if nothing arrived within timeout seconds"""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class MemoryBroker:
+    """Per-process pub/sub keyed by user id"""
+    
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+    
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscriptions.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[subscription.user_id]
+    
+    def publish(self, user_id, event):
+        self.deliver(user_id, event)
+    
+    def deliver(self, user_id, event):
+        """Hand an event to this process's subscribers"""
+        with self._lock:
+            subscribers = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.events.put_nowait(event)
+            except queue.Full:
+                pass
+    
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscriptions.values())
+
+class SocketBroker(MemoryBroker):
+    """Multi-worker stand-in: every worker binds a Unix datagram socket in a
+    shared directory, and publish() sends the event to all of them.
+    
+    Only reaches workers on the same host; a real deployment would put a
+    message bus behind the same subscribe/publish interface.
+    """
+    
+    def __init__(self, socket_dir):
+        super().__init__()
+        os.makedirs(socket_dir, exist_ok=True)
+        self.socket_dir = socket_dir
+        self.path = os.path.join(socket_dir, f'{os.getpid()}.sock')
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._listener.bind(self.path)
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        threading.Thread(target=self._listen, name='pubsub-listener', daemon=True).start()
+    
+    def _listen(self):
+        while True:
+            data = self._listener.recv(65536)
+            try:
+                message = json.loads(data)
+                self.deliver(message['user_id'], message['event'])
+            except (ValueError, KeyError):
+                continue
+    
+    def publish(self, user_id, event):
+        data = json.dumps({'user_id': user_id, 'event': event}).encode()
+        for path in glob.glob(os.path.join(self.socket_dir, '*.sock')):
+            try:
+                self._sender.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker is gone; clean up its socket file
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError:
+                continue
+
+broker = MemoryBroker()
+
+def configure(app):
+    """Pick the broker backend from config"""
+    global broker
+    if app.config['NOTIFICATION_BROKER'] == 'socket':
+        broker = SocketBroker(app.config['NOTIFICATION_BROKER_SOCKET_DIR'])
+    else:
+        broker = MemoryBroker()
+
+def publish(user_id, event):
+    broker.publish(user_id, event)
+
+def subscribe(user_id):
+    return broker.subscribe(user_id)
+
+def unsubscribe(subscription):
+    broker.unsubscribe(subscription)
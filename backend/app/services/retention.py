@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import and_, delete, func, or_, select
+from app.models import db, Notification
+from app.services import unread
+from app.utils import versions
+
+# Short sleep between batches so other writers get the SQLite write lock
+BATCH_PAUSE = 0.01
+
+_app = None
+_worker = None
+
+def configure(app):
+    """Start the periodic retention job if an interval is configured"""
+    global _app, _worker
+    _app = app
+    if app.config['NOTIFICATION_RETENTION_INTERVAL'] > 0 and _worker is None:
+        _worker = threading.Thread(target=_run, name='notification-retention', daemon=True)
+        _worker.start()
+
+def purge(ids):
+    """Delete notifications by id and commit, keeping unread counters right.
+    
+    Counters follow what the DELETE actually removed (RETURNING), so rows
+    another process deleted or marked read since they were selected are
+    not counted again. Returns the number of rows deleted.
+    """
+    deleted = db.session.execute(
+        delete(Notification)
+        .where(Notification.id.in_(ids))
+        .returning(Notification.user_id, Notification.read)
+        .execution_options(synchronize_session=False)
+    ).all()
+    lost = Counter(user_id for user_id, read in deleted if not read)
+    unread.add_unread({user_id: -n for user_id, n in lost.items()})
+    versions.bump({user_id for user_id, _ in deleted})
+    db.session.commit()
+    return len(deleted)
+
+def _purge_in_batches(condition, batch_size, report):
+    purged = 0
+    while True:
+        ids = db.session.scalars(
+            select(Notification.id).where(condition).limit(batch_size)
+        ).all()
+        if ids:
+            purged += purge(ids)
+            report['batches'] += 1
+        if len(ids) < batch_size:
+            return purged
+        time.sleep(BATCH_PAUSE)
+
+def run(keep_read, max_age_days, batch_size):
+    """Apply the retention policy in bounded, separately committed batches.
+    
+    Drops every notification older than max_age_days (0 for no limit), then
+    each user's read notifications beyond the newest keep_read. Unread
+    notifications are otherwise kept. Returns a report dict.
+    """
+    started = time.perf_counter()
+    report = {'expired': 0, 'read_overflow': 0, 'batches': 0}
+    
+    if max_age_days > 0:
+        cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+        report['expired'] = _purge_in_batches(Notification.created_at < cutoff, batch_size, report)
+    
+    is_read = Notification.read.is_(True)
+    user_ids = db.session.scalars(
+        select(Notification.user_id)
+        .where(is_read)
+        .group_by(Notification.user_id)
+        .having(func.count() > keep_read)
+    ).all()
+    
+    for user_id in user_ids:
+        condition = and_(Notification.user_id == user_id, is_read)
+        if keep_read > 0:
+            # Oldest read notification the user keeps; everything before it goes
+            boundary = db.session.execute(
+                select(Notification.created_at, Notification.id)
+                .where(condition)
+                .order_by(Notification.created_at.desc(), Notification.id.desc())
+                .offset(keep_read - 1)
+                .limit(1)
+            ).first()
+            condition = and_(condition, or_(
+                Notification.created_at < boundary.created_at,
+                and_(Notification.created_at == boundary.created_at, Notification.id < boundary.id)
+            ))
+        report['read_overflow'] += _purge_in_batches(condition, batch_size, report)
+    
+    report['purged'] = report['expired'] + report['read_overflow']
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    return report
+
+def run_configured():
+    """run() with the policy from the app config"""
+    config = _app.config
+    return run(
+        config['NOTIFICATION_RETENTION_KEEP_READ'],
+        config['NOTIFICATION_RETENTION_DAYS'],
+        config['NOTIFICATION_RETENTION_BATCH_SIZE']
+    )
+
+def _run():
+    while True:
+        time.sleep(_app.config['NOTIFICATION_RETENTION_INTERVAL'])
+        with _app.app_context():
+            try:
+                report = run_configured()
+                _app.logger.info(
+                    f"Notification retention purged {report['purged']} rows "
+                    f"({report['expired']} expired, {report['read_overflow']} old read) "
+                    f"in {report['batches']} batches, {report['seconds']}s"
+                )
+            except Exception:
+                db.session.rollback()
+                _app.logger.exception('Notification retention failed')
@@ -0,0 +1,169 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, func, select
+from app.models import db, Expense, ExpenseSplit, SpendRollup
+from app.services import categories
+from app.utils.helpers import upsert
+
+PERIODS = ('month', 'week')
+SCOPES = ('user', 'group')
+KEY_COLUMNS = ('scope', 'scope_id', 'period', 'bucket', 'category')
+
+def bucket_start(day, period):
+    """First day of the month, or the Monday of the ISO week, containing day"""
+    if period == 'month':
+        return day.replace(day=1)
+    return day - timedelta(days=day.weekday())
+
+def next_bucket(start, period):
+    if period == 'month':
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start + timedelta(days=7)
+
+class RollupDeltas:
+    """Accumulates (amount, count) changes per rollup key before writing them"""
+    def __init__(self):
+        self.totals = defaultdict(lambda: [0.0, 0])
+    
+    def add(self, scope, scope_id, day, category, amount, count=1):
+        for period in PERIODS:
+            total = self.totals[(scope, scope_id, period, bucket_start(day, period), category)]
+            total[0] += amount
+            total[1] += count
+    
+    def add_expense(self, group_id, category, when, amount, shares):
+        """One expense: group totals (if in a group) and each (user_id, share).
+        
+        Payments and settle-ups only move money between users, so they are
+        not spend in either scope and are skipped.
+        """
+        if category == categories.PAYMENT_CATEGORY:
+            return
+        day = when.date() if isinstance(when, datetime) else when
+        category = category or categories.DEFAULT_CATEGORY
+        if group_id:
+            self.add('group', group_id, day, category, amount)
+        for user_id, share in shares:
+            self.add('user', user_id, day, category, share)
+    
+    def apply(self, sign=1, fresh=False):
+        """Write the deltas in the current transaction (sign=-1 subtracts them).
+        
+        fresh inserts plainly, for when the table was just emptied.
+        """
+        if not self.totals:
+            return
+        
+        table = SpendRollup.__table__
+        rows = [
+            {**dict(zip(KEY_COLUMNS, key)), 'amount': sign * amount, 'expense_count': sign * count}
+            for key, (amount, count) in self.totals.items()
+        ]
+        if fresh:
+            db.session.execute(table.insert(), rows)
+            return
+        
+        stmt = upsert(table)
+        # Increment in SQL on conflict, so concurrent writers neither lose updates
+        # nor fail on the primary key when both create a bucket's first row
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[column] for column in KEY_COLUMNS],
+            set_={
+                'amount': table.c.amount + stmt.excluded.amount,
+                'expense_count': table.c.expense_count + stmt.excluded.expense_count
+            }
+        )
+        db.session.execute(stmt, rows)
+        if sign < 0:
+            # Also drops any row a subtraction created for a key that had none
+            db.session.execute(delete(SpendRollup).where(SpendRollup.expense_count <= 0))
+
+def record_expense(expense, shares):
+    """Add a new expense and its (user_id, amount) shares to the rollups"""
+    if expense.date is None:
+        # Fix the timestamp now so the row and its buckets agree
+        expense.date = datetime.utcnow()
+    deltas = RollupDeltas()
+    deltas.add_expense(expense.group_id, expense.category, expense.date, expense.amount, shares)
+    deltas.apply()
+
+def aggregate(group_id=None):
+    """RollupDeltas computed from the raw expenses/expense_splits rows.
+    
+    Rows are summed per day in SQL and bucketed here, so the scan happens
+    once and Python only sees one row per (scope id, day, category).
+    Payments are left out, as in RollupDeltas.add_expense.
+    """
+    deltas = RollupDeltas()
+    day = func.date(Expense.date)
+    category = func.coalesce(Expense.category, categories.DEFAULT_CATEGORY)
+    
+    def scoped(query):
+        query = query.where(Expense.category.is_distinct_from(categories.PAYMENT_CATEGORY))
+        return query.where(Expense.group_id == group_id) if group_id else query
+    
+    group_rows = db.session.execute(scoped(
+        select(Expense.group_id, day, category, func.sum(Expense.amount), func.count())
+        .where(Expense.group_id.is_not(None))
+        .group_by(Expense.group_id, day, category)
+    ))
+    split_rows = db.session.execute(scoped(
+        select(ExpenseSplit.user_id, day, category, func.sum(ExpenseSplit.amount), func.count())
+        .join(Expense, Expense.id == ExpenseSplit.expense_id)
+        .group_by(ExpenseSplit.user_id, day, category)
+    ))
+    for scope, rows in (('group', group_rows), ('user', split_rows)):
+        for scope_id, row_day, row_category, amount, count in rows:
+            if isinstance(row_day, str):
+                row_day = date.fromisoformat(row_day)
+            deltas.add(scope, scope_id, row_day, row_category, amount or 0.0, count)
+    return deltas
+
+def clear_group(group_id):
+    """Take a group's expenses back out of the rollups before they are deleted"""
+    aggregate(group_id).apply(sign=-1)
+    db.session.execute(delete(SpendRollup).where(SpendRollup.scope == 'group', SpendRollup.scope_id == group_id))
+
+def rebuild():
+    """Recompute every rollup from the raw rows.
+    
+    Does not commit; returns the number of rollup rows written.
+    """
+    deltas = aggregate()
+    db.session.execute(delete(SpendRollup))
+    deltas.apply(fresh=True)
+    return len(deltas.totals)
+
+def spend_series(scope, scope_id, period, start, end):
+    """Per-bucket totals and category breakdown for buckets from start up to end.
+    
+    Reads only the rollup rows in range (one per bucket and category), and
+    includes empty buckets so the series is continuous.
+    """
+    first = bucket_start(start, period)
+    buckets = {}
+    current = first
+    while current <= end:
+        buckets[current] = {'start': current.isoformat(), 'total': 0.0, 'count': 0, 'categories': {}}
+        current = next_bucket(current, period)
+    
+    rows = db.session.execute(
+        select(SpendRollup.bucket, SpendRollup.category, SpendRollup.amount, SpendRollup.expense_count)
+        .where(
+            SpendRollup.scope == scope,
+            SpendRollup.scope_id == scope_id,
+            SpendRollup.period == period,
+            SpendRollup.bucket >= first,
+            SpendRollup.bucket <= end
+        )
+    )
+    for bucket, category, amount, count in rows:
+        entry = buckets[bucket]
+        entry['total'] += amount
+        entry['count'] += count
+        entry['categories'][category] = round(entry['categories'].get(category, 0.0) + amount, 2)
+    
+    series = list(buckets.values())
+    for entry in series:
+        entry['total'] = round(entry['total'], 2)
+    return series
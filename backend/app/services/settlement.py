@@ -0,0 +1,103 @@
+import heapq
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import select, func, union_all
+from app.models import db, Expense, ExpenseSplit, Notification
+from app.utils.helpers import generate_id
+from app.services import ledger, unread, categories, rollups
+
+def net_positions(group_id):
+    """Net position per member of a group: paid minus owed, in cents.
+    
+    Positive means the member is owed money, negative means they owe.
+    """
+    paid = select(
+        Expense.paid_by.label('user_id'),
+        Expense.amount.label('amount')
+    ).where(Expense.group_id == group_id)
+    
+    owed = select(
+        ExpenseSplit.user_id.label('user_id'),
+        (-ExpenseSplit.amount).label('amount')
+    ).join(Expense, Expense.id == ExpenseSplit.expense_id).where(Expense.group_id == group_id)
+    
+    rows = union_all(paid, owed).subquery()
+    stmt = select(rows.c.user_id, func.sum(rows.c.amount)).group_by(rows.c.user_id)
+    
+    return {user_id: round((net or 0.0) * 100) for user_id, net in db.session.execute(stmt)}
+
+def simplify_debts(positions):
+    """Turn net positions (cents) into a near-minimal list of transfers.
+    
+    Greedy over two max-heaps: the largest debtor always pays the largest
+    creditor, so every step settles at least one of them. Runs in
+    O(n log n) and yields at most n - 1 transfers.
+    Returns a list of (from_user_id, to_user_id, cents).
+    """
+    creditors = [(-cents, user_id) for user_id, cents in positions.items() if cents > 0]
+    debtors = [(cents, user_id) for user_id, cents in positions.items() if cents < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+    
+    transfers = []
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+        transfers.append((debtor, creditor, amount))
+        
+        # Whoever is not fully settled goes back on their heap
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor))
+    
+    return transfers
+
+def execute_transfers(group_id, transfers, names):
+    """Record settle-up transfers as group payments in the current transaction.
+    
+    Each transfer becomes an expense paid by the debtor and split 100% to the
+    creditor, the same shape /wallet/pay uses, so group balances net to zero.
+    Does not commit; returns the creditor notifications to publish afterwards.
+    """
+    expenses, splits, notifications = [], [], []
+    deltas = defaultdict(lambda: [0.0, 0.0])
+    spend = rollups.RollupDeltas()
+    now = datetime.utcnow()
+    for from_id, to_id, cents in transfers:
+        amount = cents / 100
+        title = f"Settle up from {names.get(from_id, 'Unknown')}"
+        expense = Expense(
+            id=generate_id(),
+            title=title,
+            category=categories.PAYMENT_CATEGORY,
+            amount=amount,
+            paid_by=from_id,
+            group_id=group_id,
+            date=now
+        )
+        split = ExpenseSplit(
+            id=generate_id(),
+            expense_id=expense.id,
+            user_id=to_id,
+            amount=amount,
+            expense_date=now
+        )
+        expenses.append(expense)
+        splits.append(split)
+        notifications.append(Notification(
+            id=generate_id(),
+            user_id=to_id,
+            message=f"{names.get(from_id, 'Someone')} settled ${amount:.2f} with you",
+            type='success'
+        ))
+        deltas[from_id][0] += amount
+        deltas[to_id][1] += amount
+        spend.add_expense(group_id, expense.category, now, amount, [(to_id, amount)])
+    
+    db.session.add_all(expenses + splits + notifications)
+    unread.record_notifications(notifications)
+    ledger.apply_deltas(group_id, {user_id: tuple(d) for user_id, d in deltas.items()})
+    spend.apply()
+    return notifications
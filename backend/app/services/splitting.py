@@ -0,0 +1,62 @@
+import math
+import zlib
+
+def parse_amount(value, name='amount'):
+    """A finite float from a request value; raises ValueError"""
+    try:
+        amount = float(value)
+    except (ValueError, TypeError):
+        raise ValueError(f'{name} must be a number')
+    # float() accepts 'nan', 'inf' and overflows like '1e400'
+    if not math.isfinite(amount):
+        raise ValueError(f'{name} must be a finite number')
+    return amount
+
+def parse_participant_ids(value):
+    """Participant user ids from a request value, duplicates dropped; raises ValueError"""
+    if not isinstance(value, list) or not all(isinstance(pid, str) for pid in value):
+        raise ValueError('participants must be a list of user ids')
+    return list(dict.fromkeys(value))
+
+def split_amounts(amount, participant_ids, split_type, custom_splits, expense_id):
+    """Per-participant split amounts, in participant order.
+    
+    Shares are whole cents that sum exactly to the rounded total: equal
+    splits hand the leftover cents to consecutive participants starting at
+    an offset taken from a checksum of expense_id, so the same people don't
+    always pay them, and the rounding difference of custom splits goes to
+    the largest share.
+    """
+    total_cents = round(amount * 100)
+    if split_type == 'equal':
+        count = len(participant_ids)
+        share, extra = divmod(total_cents, count)
+        # crc32 rather than hash(): the same expense splits alike in every process
+        start = zlib.crc32(expense_id.encode()) % count
+        return [
+            (share + ((index - start) % count < extra)) / 100
+            for index in range(count)
+        ]
+    
+    # Handle unequal/percentage splits
+    if not isinstance(custom_splits, dict):
+        raise ValueError('splits must map user ids to amounts')
+    amounts = []
+    for participant_id in participant_ids:
+        try:
+            share = float(custom_splits.get(participant_id, 0))
+        except (ValueError, TypeError):
+            share = 0.0
+        if not math.isfinite(share):
+            raise ValueError('Split amounts must be finite numbers')
+        amounts.append(share)
+    
+    # Validate total split amount matches expense amount (allow small float error)
+    total_split_amount = sum(amounts)
+    if abs(total_split_amount - amount) > 0.01:
+        raise ValueError(f"Split amounts (${total_split_amount:.2f}) do not match total amount (${amount:.2f})")
+    
+    cents = [round(split_amount * 100) for split_amount in amounts]
+    largest = max(range(len(cents)), key=cents.__getitem__)
+    cents[largest] += total_cents - sum(cents)
+    return [c / 100 for c in cents]
@@ -0,0 +1,95 @@
+from collections import Counter, defaultdict
+from sqlalchemy import case, func, select, update
+from app.models import db, Notification, NotificationCounter
+from app.utils import versions
+from app.utils.helpers import upsert
+
+def add_unread(counts):
+    """Add {user_id: n} to the unread counters in the current transaction.
+    
+    Increments are one upsert, so concurrent first notifications for a user
+    can't both insert its row. Decrements never take a counter below zero.
+    """
+    if not counts:
+        return
+    
+    table = NotificationCounter.__table__
+    increments = [{'user_id': user_id, 'unread': n} for user_id, n in counts.items() if n > 0]
+    if increments:
+        stmt = upsert(table)
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c.user_id],
+                set_={'unread': table.c.unread + stmt.excluded.unread}
+            ),
+            increments
+        )
+    
+    # One UPDATE per distinct decrement; a user without a counter has nothing to lose
+    by_decrement = defaultdict(list)
+    for user_id, n in counts.items():
+        if n < 0:
+            by_decrement[-n].append(user_id)
+    for n, user_ids in by_decrement.items():
+        db.session.execute(
+            update(NotificationCounter)
+            .where(NotificationCounter.user_id.in_(user_ids))
+            .values(unread=case((NotificationCounter.unread > n, NotificationCounter.unread - n), else_=0))
+            .execution_options(synchronize_session=False)
+        )
+
+def record_notifications(notifications):
+    """Count new Notification objects added in the current transaction"""
+    add_unread(Counter(n.user_id for n in notifications))
+
+def unread_count(user_id):
+    return db.session.scalar(
+        select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id)
+    ) or 0
+
+def mark_read(user_id, ids=None, before=None):
+    """Mark a user's unread notifications read with one UPDATE.
+    
+    Limited to the given ids and/or to those created before a timestamp.
+    Does not commit; returns the number of notifications changed.
+    """
+    query = update(Notification).where(
+        Notification.user_id == user_id,
+        Notification.read.is_not(True)
+    )
+    if ids is not None:
+        query = query.where(Notification.id.in_(ids))
+    if before is not None:
+        query = query.where(Notification.created_at < before)
+    
+    changed = db.session.execute(
+        query.values(read=True).execution_options(synchronize_session=False)
+    ).rowcount
+    if changed:
+        db.session.execute(
+            update(NotificationCounter)
+            .where(NotificationCounter.user_id == user_id)
+            .values(unread=case(
+                (NotificationCounter.unread > changed, NotificationCounter.unread - changed),
+                else_=0
+            ))
+            .execution_options(synchronize_session=False)
+        )
+        versions.bump([user_id])
+    return changed
+
+def rebuild(bind=None):
+    """Recount every user's unread notifications, on bind or the session.
+    
+    Does not commit; returns the number of counter rows written.
+    """
+    bind = bind or db.session
+    bind.execute(NotificationCounter.__table__.delete())
+    return bind.execute(
+        NotificationCounter.__table__.insert().from_select(
+            ['user_id', 'unread'],
+            select(Notification.user_id, func.count())
+            .where(Notification.read.is_not(True))
+            .group_by(Notification.user_id)
+        )
+    ).rowcount
@@ -0,0 +1,66 @@
+from sqlalchemy import select, func, and_, not_, tuple_
+from app.models import db, User, group_members
+
+# Matched fields in ranking order; each is read in the order of its lower() index
+FIELDS = (User.username, User.name, User.email)
+
+def prefix_range(column, prefix):
+    """lower(column) starts with prefix, as an index-friendly range"""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(func.lower(column) >= prefix, func.lower(column) < upper)
+
+def search_users(user_id, group_ids, query, limit, after=None, exclude_group_id=None):
+    """Users other than the caller (user_id) whose username, name or email
+    starts with query (case-insensitive), leaving out members of
+    exclude_group_id if given.
+    
+    Members of the caller's groups (group_ids) rank first, then everyone
+    else. Within each tier come username matches, then name matches, then
+    email matches, each ordered by that field lowercased and id, so every
+    step is a walk of one index that stops after limit rows. Without a
+    query everyone matches on username. after is the (tier, field, key, id)
+    of the last row already returned.
+    Returns (rows, next_after) where rows are (id, username, name, email).
+    """
+    mates = select(group_members.c.user_id).where(group_members.c.group_id.in_(list(group_ids)))
+    
+    # The caller is a member of their own groups, but never a search result
+    conditions = [User.id != user_id]
+    if exclude_group_id:
+        conditions.append(User.id.not_in(
+            select(group_members.c.user_id).where(group_members.c.group_id == exclude_group_id)
+        ))
+    
+    prefix = query.lower() if query else None
+    fields = range(len(FIELDS)) if prefix else (0,)
+    start = tuple(int(part) for part in after[:2]) if after else (0, 0)
+    rows = []
+    for tier in (0, 1):
+        for field in fields:
+            if (tier, field) < start or len(rows) > limit:
+                continue
+            if tier == 0 and not group_ids:
+                continue
+            
+            sort_key = func.lower(FIELDS[field])
+            stmt = select(User.id, User.username, User.name, User.email, sort_key).where(*conditions)
+            stmt = stmt.where(User.id.in_(mates) if tier == 0 else User.id.not_in(mates))
+            if prefix:
+                # Rows matching an earlier field were already listed under it
+                stmt = stmt.where(
+                    prefix_range(FIELDS[field], prefix),
+                    *(not_(prefix_range(FIELDS[earlier], prefix)) for earlier in range(field))
+                )
+            if after and (tier, field) == start:
+                stmt = stmt.where(tuple_(sort_key, User.id) > tuple_(after[2], after[3]))
+            
+            stmt = stmt.order_by(sort_key, User.id).limit(limit + 1 - len(rows))
+            rows.extend((tier, field, *row) for row in db.session.execute(stmt))
+    
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        tier, field, user_id, _, _, _, key = rows[-1]
+        next_after = (tier, field, key, user_id)
+    
+    return [row[2:6] for row in rows], next_after
@@ -0,0 +1,56 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+# Preferred first; quality levels favour speed since bodies are compressed per request
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+_min_size = 1024
+
+def configure(app):
+    """Compress JSON responses above COMPRESS_MIN_SIZE bytes (0 disables)"""
+    global _min_size
+    _min_size = app.config['COMPRESS_MIN_SIZE']
+    if _min_size > 0:
+        app.after_request(compress_response)
+
+def encoded_etag(etag, encoding):
+    """Strong ETags differ per content coding"""
+    return f'{etag}-{encoding}'
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+def compress_response(response):
+    if (
+        response.status_code != 200
+        or response.mimetype != 'application/json'
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+    ):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = next((e for e in ENCODINGS if request.accept_encodings[e]), None)
+    if encoding is None:
+        return response
+    
+    data = response.get_data()
+    if len(data) < _min_size:
+        return response
+    
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(encoded_etag(etag, encoding), weak)
+    return response
@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from flask import g, request, session
+from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
+from app.models import db, User, group_members
+from app.utils import tokens
+from app.utils.cache import TTLCache, MISSING
+
+# Column snapshots of User rows and (membership_version, group ids), keyed by user id
+user_cache = TTLCache()
+membership_cache = TTLCache()
+
+_stats_logger = None
+
+def configure(app):
+    """Size the caches from config, install the per-request loader and start logging cache stats"""
+    global _stats_logger
+    for cache in (user_cache, membership_cache, tokens.verified_tokens):
+        cache.maxsize = app.config['CURRENT_USER_CACHE_SIZE']
+        cache.ttl = app.config['CURRENT_USER_CACHE_TTL']
+    app.before_request(load_current_user)
+    
+    interval = app.config['CURRENT_USER_CACHE_STATS_INTERVAL']
+    if interval > 0 and _stats_logger is None:
+        _stats_logger = threading.Thread(
+            target=_log_stats, args=(app.logger, interval), name='current-user-cache-stats', daemon=True
+        )
+        _stats_logger.start()
+
+def load_current_user():
+    """Resolve the request's user once into g.user.
+    
+    A bearer access token wins over the session cookie. Token requests get a
+    user built from the token claims with no database read; other columns
+    load lazily if a handler touches them.
+    """
+    g.user = None
+    g.auth_mode = None
+    
+    token = tokens.bearer_token(request)
+    if token:
+        claims = tokens.verify_token(token)
+        if claims:
+            user = User(id=claims['uid'], username=claims['un'], membership_version=claims['mv'])
+            make_transient_to_detached(user)
+            db.session.add(user)
+            g.user = user
+            g.auth_mode = 'token'
+        return
+    
+    user_id = session.get('user_id')
+    if not user_id:
+        return
+    
+    g.auth_mode = 'session'
+    values = user_cache.get(user_id)
+    if values is MISSING:
+        user = User.query.get(user_id)
+        if user:
+            user_cache.set(user_id, {c.name: getattr(user, c.name) for c in User.__table__.columns})
+        g.user = user
+        return
+    
+    # Rebuild the row from the snapshot and attach it without a SELECT
+    user = User(**values)
+    make_transient_to_detached(user)
+    db.session.add(user)
+    g.user = user
+
+def get_current_user():
+    """Get current logged-in user, as loaded for this request"""
+    if 'user' not in g:
+        load_current_user()
+    return g.user
+
+def get_group_ids(user):
+    """Ids of the groups a user belongs to (cached).
+    
+    Entries remember the membership version they were loaded for, so a token
+    carrying a newer version than this process has seen forces a reload.
+    """
+    version = user.membership_version or 0
+    cached = membership_cache.get(user.id)
+    if cached is not MISSING and cached[0] >= version:
+        return cached[1]
+    
+    group_ids = frozenset(db.session.scalars(
+        select(group_members.c.group_id).where(group_members.c.user_id == user.id)
+    ))
+    membership_cache.set(user.id, (version, group_ids))
+    return group_ids
+
+def invalidate_user(*user_ids):
+    """Drop cached rows after a user's own columns change"""
+    user_cache.invalidate(*user_ids)
+
+def invalidate_memberships(*user_ids):
+    """Drop cached group id sets (and user rows, which carry the version) after membership changes"""
+    membership_cache.invalidate(*user_ids)
+    user_cache.invalidate(*user_ids)
+
+def bump_membership_version(user_ids):
+    """Mark memberships (and so the users' data) as changed so tokens can be refreshed (does not commit)"""
+    if user_ids:
+        User.query.filter(User.id.in_(list(user_ids))).update(
+            {
+                User.membership_version: User.membership_version + 1,
+                User.data_version: User.data_version + 1
+            },
+            synchronize_session=False
+        )
+
+def cache_stats():
+    return {'users': user_cache.stats(), 'memberships': membership_cache.stats()}
+
+def _log_stats(logger, interval):
+    # The caches are per process, so each worker logs its own counters
+    while True:
+        time.sleep(interval)
+        stats = ', '.join(
+            f"{name} {counts['size']} entries {counts['hits']} hits {counts['misses']} misses"
+            for name, counts in cache_stats().items()
+        )
+        logger.info(f'Current-user caches (pid {os.getpid()}): {stats}')
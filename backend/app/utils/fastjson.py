@@ -0,0 +1,25 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used without it
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Encode responses with orjson, falling back to Flask's encoder for types it can't handle"""
+    option = orjson.OPT_NON_STR_KEYS if orjson else 0
+    
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self.option)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def configure(app):
+    """Use orjson for JSON responses when it is installed"""
+    if orjson is not None and app.config['JSON_FAST_ENCODER']:
+        app.json = OrjsonProvider(app)
@@ -1,20 +1,73 @@
+import base64
 import uuid
 from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models import db
 
 def generate_id():
     return str(uuid.uuid4())
 
-def serialize_model(model):
+# Serializers generated per (model class, field subset) on first use
+_serializers = {}
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def model_serializer(model_class, fields=None):
+    """A function turning instances of model_class into dicts.
+    
+    Generated once per class and field subset (default: every column) as a
+    single dict literal, so rows skip the per-column loop and type checks.
+    """
+    key = (model_class, tuple(fields) if fields else None)
+    serializer = _serializers.get(key)
+    if serializer is None:
+        columns = model_class.__table__.columns
+        names = list(fields) if fields else [c.name for c in columns]
+        items = []
+        for name in names:
+            if not name.isidentifier():
+                raise ValueError(f'Cannot serialize column {name!r}')
+            # Only datetime-typed columns need conversion
+            python_type = getattr(columns[name].type, 'python_type', None) if name in columns else None
+            # Loaded values sit in the instance dict; the descriptor handles expired ones
+            value = f'(state[{name!r}] if {name!r} in state else obj.{name})'
+            items.append(f'{name!r}: _iso({value})' if python_type is datetime else f'{name!r}: {value}')
+        source = f"def serialize(obj):\n    state = obj.__dict__\n    return {{{', '.join(items)}}}\n"
+        namespace = {'_iso': _iso}
+        exec(compile(source, f'<serializer {model_class.__name__}>', 'exec'), namespace)
+        serializer = _serializers[key] = namespace['serialize']
+    return serializer
+
+def serialize_model(model, fields=None):
     """Convert SQLAlchemy model to dict"""
-    result = {}
-    for column in model.__table__.columns:
-        value = getattr(model, column.name)
-        if isinstance(value, datetime):
-            result[column.name] = value.isoformat()
-        else:
-            result[column.name] = value
-    return result
+    return model_serializer(type(model), fields)(model)
 
 def handle_error(message, status_code=400):
     """Standard error response"""
     return {'error': message}, status_code
+
+def parse_limit(value, default=50, maximum=200):
+    """Parse a ?limit= query value, clamped to [1, maximum]"""
+    try:
+        limit = int(value) if value is not None else default
+    except (ValueError, TypeError):
+        raise ValueError('limit must be an integer')
+    return max(1, min(limit, maximum))
+
+def encode_cursor(*values):
+    """Encode keyset pagination values into an opaque cursor string"""
+    parts = [v.isoformat() if isinstance(v, datetime) else str(v) for v in values]
+    return base64.urlsafe_b64encode('|'.join(parts).encode()).decode()
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor into its string parts"""
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+
+def upsert(table, bind=None):
+    """insert(table) supporting on_conflict_do_update() on SQLite and PostgreSQL"""
+    dialect = (bind or db.session.get_bind()).dialect.name
+    return (postgresql.insert if dialect == 'postgresql' else sqlite.insert)(table)
@@ -0,0 +1,62 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+class HashPoolBusy(Exception):
+    """Raised when the hashing pool's queue is full; callers should answer 503"""
+
+# forkserver where the platform has it (POSIX), spawn elsewhere
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    """Lazily start the process pool sized from config"""
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is None:
+            workers = current_app.config['PASSWORD_HASH_WORKERS']
+            # Never fork the server process itself: it has threads (outbox, retention)
+            # and open database connections that a forked child would inherit
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD))
+            # Running plus waiting jobs; beyond this we shed load instead of queueing.
+            # The last job in a full queue waits about QUEUE_SIZE / WORKERS hash times
+            _slots = threading.BoundedSemaphore(workers + current_app.config['PASSWORD_HASH_QUEUE_SIZE'])
+    return _pool, _slots
+
+def shutdown():
+    """Stop the hashing pool; the next job starts a new one sized from the current config"""
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = _slots = None
+
+def _run(fn, *args):
+    """Run fn in the hashing pool, or inline when the pool is disabled"""
+    config = current_app.config
+    if not config['PASSWORD_HASH_WORKERS']:
+        return fn(*args)
+    
+    pool, slots = _get_pool()
+    if not slots.acquire(timeout=config['PASSWORD_HASH_QUEUE_TIMEOUT']):
+        raise HashPoolBusy('Too many concurrent password operations, try again shortly')
+    try:
+        return pool.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+def hash_password(password):
+    config = current_app.config
+    return _run(generate_password_hash, password, config['PASSWORD_HASH_METHOD'], config['PASSWORD_SALT_LENGTH'])
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
+
+def needs_rehash(password_hash):
+    """True if the hash was made with different parameters than configured"""
+    return password_hash.split('$', 1)[0] != current_app.config['PASSWORD_HASH_METHOD']
@@ -0,0 +1,41 @@
+import time
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from app.utils.cache import TTLCache, MISSING
+
+# Verified claims keyed by token string, so repeat requests skip the HMAC check
+verified_tokens = TTLCache()
+
+def serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='access-token')
+
+def issue_token(user):
+    """Signed access token carrying user id, username and membership version"""
+    return serializer().dumps({
+        'uid': user.id,
+        'un': user.username,
+        'mv': user.membership_version or 0
+    })
+
+def verify_token(token):
+    """Return the token's claims, or None if it is forged or expired"""
+    max_age = current_app.config['TOKEN_MAX_AGE']
+    cached = verified_tokens.get(token)
+    if cached is not MISSING:
+        claims, expires_at = cached
+        return claims if time.time() < expires_at else None
+    
+    try:
+        claims, issued_at = serializer().loads(token, max_age=max_age, return_timestamp=True)
+    except (BadSignature, SignatureExpired):
+        return None
+    
+    verified_tokens.set(token, (claims, issued_at.timestamp() + max_age))
+    return claims
+
+def bearer_token(request):
+    """Token from an 'Authorization: Bearer ...' header, if any"""
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        return header[len('Bearer '):].strip() or None
+    return None
@@ -0,0 +1,67 @@
+import hashlib
+from functools import wraps
+from flask import make_response, request
+from sqlalchemy import or_, select, update
+from app.models import db, User, group_members
+from app.utils import compression
+from app.utils.current_user import get_current_user
+
+def bump(user_ids=(), group_ids=()):
+    """Bump the data version of some users and every member of some groups.
+    
+    One UPDATE in the current transaction; does not commit.
+    """
+    user_ids, group_ids = list(user_ids), list(group_ids)
+    conditions = []
+    if user_ids:
+        conditions.append(User.id.in_(user_ids))
+    if group_ids:
+        conditions.append(User.id.in_(
+            select(group_members.c.user_id).where(group_members.c.group_id.in_(group_ids))
+        ))
+    if conditions:
+        db.session.execute(
+            update(User)
+            .where(or_(*conditions))
+            .values(data_version=User.data_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+def current_version(user_id):
+    return db.session.scalar(select(User.data_version).where(User.id == user_id)) or 0
+
+def conditional(view):
+    """Tag a per-user GET endpoint with a strong ETag from the user's data version.
+    
+    A matching If-None-Match gets a 304 before the view (and its aggregation
+    queries) runs. The tag also covers the path and query string.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        user = get_current_user()
+        if not user:
+            return view(*args, **kwargs)
+        
+        # Read the version first: a write racing the view only makes the tag older
+        version = current_version(user.id)
+        digest = hashlib.sha1(f'{user.id}:{request.full_path}'.encode()).hexdigest()[:16]
+        etag = f'{version}-{digest}'
+        
+        # A compressed 200 carried the tag with its content coding appended
+        matched = next((
+            tag for tag in [etag] + [compression.encoded_etag(etag, e) for e in compression.ENCODINGS]
+            if request.if_none_match.contains(tag)
+        ), None)
+        if matched:
+            response = make_response('', 304)
+            response.set_etag(matched)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            response.set_etag(etag)
+        
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.update(('Cookie', 'Authorization'))
+        return response
+    return wrapper
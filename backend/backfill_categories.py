@@ -0,0 +1,18 @@
+import argparse
+from app import create_app, db
+from app.services import categories
+
+parser = argparse.ArgumentParser(description='Store categories for existing expenses')
+parser.add_argument('--all', action='store_true', help='reclassify every expense, e.g. after changing the keyword table')
+parser.add_argument('--chunk-size', type=int, default=1000)
+args = parser.parse_args()
+
+app = create_app()
+
+with app.app_context():
+    try:
+        count = categories.backfill(args.chunk_size, reclassify=args.all)
+        print(f"Classified {count} expenses")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error classifying expenses: {e}")
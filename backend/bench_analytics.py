@@ -0,0 +1,107 @@
+"""Benchmark: monthly spend for one user from the rollups vs. the raw rows.
+
+Fills a throwaway SQLite database with synthetic expenses, rebuilds the
+rollups, then times both paths for a sample of users.
+
+    python bench_analytics.py --splits 10000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--splits', type=int, default=1000000)
+parser.add_argument('--users', type=int, default=1000)
+parser.add_argument('--group-size', type=int, default=10)
+parser.add_argument('--samples', type=int, default=50)
+args = parser.parse_args()
+
+path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+from sqlalchemy import func, insert, select
+from app import create_app
+from app.models import db, Expense, ExpenseSplit, Group, User, group_members
+from app.services import categories, rollups
+
+CHUNK = 50000
+DAYS = 3 * 365
+TITLES = ['Dinner', 'Groceries', 'Movie tickets', 'Coffee', 'Internet bill', 'Gas', 'Taxi', 'Rent']
+
+app = create_app('production')
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+with app.app_context():
+    random.seed(1)
+    user_ids = [f'user-{i}' for i in range(args.users)]
+    db.session.execute(insert(User), [
+        {'id': uid, 'username': uid, 'email': f'{uid}@example.com', 'password_hash': '-', 'name': uid}
+        for uid in user_ids
+    ])
+    groups = [user_ids[i:i + args.group_size] for i in range(0, args.users, args.group_size)]
+    db.session.execute(insert(Group), [{'id': f'group-{i}', 'name': f'Group {i}'} for i in range(len(groups))])
+    db.session.execute(insert(group_members), [
+        {'group_id': f'group-{i}', 'user_id': uid} for i, members in enumerate(groups) for uid in members
+    ])
+    db.session.commit()
+    
+    origin = datetime.utcnow() - timedelta(days=DAYS)
+    expense_count = args.splits // args.group_size
+    started = time.perf_counter()
+    for offset in range(0, expense_count, CHUNK):
+        expenses, splits = [], []
+        for n in range(offset, min(offset + CHUNK, expense_count)):
+            group = random.randrange(len(groups))
+            title = random.choice(TITLES)
+            amount = round(random.uniform(5, 200), 2)
+            expense_id = f'expense-{n}'
+            expenses.append({
+                'id': expense_id, 'title': title, 'category': categories.classify(title),
+                'amount': amount, 'paid_by': groups[group][0], 'group_id': f'group-{group}',
+                'date': origin + timedelta(minutes=random.randrange(DAYS * 1440))
+            })
+            share = amount / len(groups[group])
+            splits.extend(
+                {'id': f'{expense_id}-{i}', 'expense_id': expense_id, 'user_id': uid, 'amount': share,
+                 'expense_date': expenses[-1]['date']}
+                for i, uid in enumerate(groups[group])
+            )
+        db.session.execute(insert(Expense), expenses)
+        db.session.execute(insert(ExpenseSplit), splits)
+        db.session.commit()
+    print(f'Inserted {expense_count} expenses / {expense_count * args.group_size} splits '
+          f'in {time.perf_counter() - started:.1f}s')
+    
+    count, rebuild_ms = timed(rollups.rebuild)
+    db.session.commit()
+    print(f'Rebuilt {count} rollup rows in {rebuild_ms / 1000:.1f}s')
+    
+    start, end = origin.date(), date.today()
+    
+    def raw(user_id):
+        """The on-demand alternative: aggregate the user's splits by month and category"""
+        month = func.strftime('%Y-%m', Expense.date)
+        return db.session.execute(
+            select(month, Expense.category, func.sum(ExpenseSplit.amount), func.count())
+            .join(Expense, Expense.id == ExpenseSplit.expense_id)
+            .where(ExpenseSplit.user_id == user_id, Expense.date >= origin)
+            .group_by(month, Expense.category)
+        ).all()
+    
+    sample = random.sample(user_ids, min(args.samples, len(user_ids)))
+    raw_ms = sum(timed(lambda: raw(uid))[1] for uid in sample) / len(sample)
+    rollup_ms = sum(
+        timed(lambda: rollups.spend_series('user', uid, 'month', start, end))[1] for uid in sample
+    ) / len(sample)
+    print(f'Per-user monthly spend over {DAYS // 30} months, mean of {len(sample)} users:')
+    print(f'  raw aggregate {raw_ms:8.2f} ms')
+    print(f'  rollups       {rollup_ms:8.2f} ms')
+
+os.remove(path)
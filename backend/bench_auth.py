@@ -0,0 +1,98 @@
+"""Benchmark: per-request authentication overhead, session cookie vs bearer token.
+
+Fills a throwaway SQLite database with one user in --groups groups with a
+few expenses each, then issues --requests GETs per endpoint in three modes
+and reports statements and mean latency per request:
+
+    session-cold  session cookie with the current-user caches cleared before
+                  every request (a users and a group_members read each time)
+    session       session cookie with warm caches
+    token         Authorization: Bearer access token (no users read)
+
+    python bench_auth.py --groups 20 --requests 500
+"""
+import argparse
+import os
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--groups', type=int, default=20)
+parser.add_argument('--requests', type=int, default=500)
+parser.add_argument('--endpoints', nargs='+', default=['/api/notifications/unread-count', '/api/wallet', '/api/dashboard'])
+args = parser.parse_args()
+
+path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+os.environ['NOTIFICATION_OUTBOX_ASYNC'] = '0'
+os.environ['NOTIFICATION_RETENTION_INTERVAL'] = '0'
+os.environ['GROUP_DELETE_WORKER'] = '0'
+os.environ['CURRENT_USER_CACHE_STATS_INTERVAL'] = '0'
+os.environ['PASSWORD_HASH_WORKERS'] = '0'
+
+from sqlalchemy import event
+from app import create_app
+from app.models import db
+from app.utils import current_user
+
+app = create_app('production')
+
+statements = 0
+
+def count_statement(*_):
+    global statements
+    statements += 1
+
+def run(client, endpoint, headers, cold):
+    """(statements, mean latency in ms) per request"""
+    global statements
+    statements = 0
+    elapsed = 0.0
+    for _ in range(args.requests):
+        if cold:
+            current_user.user_cache.clear()
+            current_user.membership_cache.clear()
+        started = time.perf_counter()
+        response = client.get(endpoint, headers=headers)
+        elapsed += time.perf_counter() - started
+        assert response.status_code == 200, response.get_json()
+    return statements / args.requests, elapsed * 1000 / args.requests
+
+client = app.test_client()
+response = client.post('/api/auth/register', json={
+    'username': 'bench', 'email': 'bench@example.com', 'password': 'password123', 'name': 'Bench'
+})
+token = response.get_json()['access_token']
+friend_client = app.test_client()
+friend_id = friend_client.post('/api/auth/register', json={
+    'username': 'friend', 'email': 'friend@example.com', 'password': 'password123', 'name': 'Friend'
+}).get_json()['user']['id']
+for n in range(args.groups):
+    group_id = client.post('/api/groups', json={'name': f'Group {n}'}).get_json()['group']['id']
+    client.post(f'/api/groups/{group_id}/members', json={'member_ids': [friend_id]})
+    for k in range(3):
+        client.post('/api/expenses', json={'title': f'Dinner {k}', 'amount': 30, 'group_id': group_id})
+# The token was issued before the memberships changed; refresh it as a client would
+token = client.post('/api/auth/refresh').get_json()['access_token']
+
+token_client = app.test_client()
+modes = [
+    ('session-cold', client, {}, True),
+    ('session', client, {}, False),
+    ('token', token_client, {'Authorization': f'Bearer {token}'}, False),
+]
+
+with app.app_context():
+    event.listen(db.engine, 'before_cursor_execute', count_statement)
+
+print(f'{"endpoint":>32} {"mode":>13} {"stmts/req":>10} {"ms/req":>8}')
+for endpoint in args.endpoints:
+    for name, mode_client, headers, cold in modes:
+        # Warm up the route, serializers and token cache
+        mode_client.get(endpoint, headers=headers)
+        per_request, latency = run(mode_client, endpoint, headers, cold)
+        print(f'{endpoint:>32} {name:>13} {per_request:>10.1f} {latency:>8.2f}')
+
+for suffix in ('', '-wal', '-shm'):
+    if os.path.exists(path + suffix):
+        os.remove(path + suffix)
@@ -0,0 +1,116 @@
+"""Benchmark: per-group balances for /dashboard and /groups, before and after.
+
+Fills a throwaway SQLite database with one user in 1, 50 and 500 groups,
+then reports statements issued and latency for the original per-group
+loop (load the user's splits and paid expenses of each group, sum them
+in Python) and for balances.summarize_groups, which reads the
+group_balances ledger.
+
+    python bench_balances.py --groups 1 50 500
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--groups', type=int, nargs='+', default=[1, 50, 500])
+parser.add_argument('--group-size', type=int, default=5)
+parser.add_argument('--expenses', type=int, default=20, help='expenses per group')
+parser.add_argument('--repeat', type=int, default=5)
+args = parser.parse_args()
+
+path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+from sqlalchemy import event, insert
+from app import create_app
+from app.models import db, Expense, ExpenseSplit, Group, User, group_members
+from app.services import ledger
+from app.services.balances import summarize_groups
+
+app = create_app('production')
+
+statements = 0
+
+def count_statement(*_):
+    global statements
+    statements += 1
+
+def measure(fn):
+    """(statements, best latency in ms) over args.repeat runs"""
+    global statements
+    best = None
+    for _ in range(args.repeat):
+        db.session.expire_all()
+        statements = 0
+        started = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return statements, best
+
+def per_group_loop(user):
+    """The loop /dashboard and /groups used to run"""
+    total_balance = 0
+    groups = []
+    for group in user.groups:
+        user_splits = ExpenseSplit.query.filter(
+            ExpenseSplit.user_id == user.id,
+            Expense.group_id == group.id
+        ).join(Expense).all()
+        user_paid = sum(expense.amount for expense in Expense.query.filter_by(paid_by=user.id, group_id=group.id).all())
+        net_amount = user_paid - sum(split.amount for split in user_splits)
+        total_balance += net_amount
+        groups.append({
+            'id': group.id,
+            'amount': f'${abs(net_amount):.2f}',
+            'members': [{'id': m.id, 'username': m.username, 'name': m.name} for m in group.members]
+        })
+    return groups, total_balance
+
+with app.app_context():
+    random.seed(1)
+    event.listen(db.engine, 'before_cursor_execute', count_statement)
+    print(f'{"groups":>6} {"loop stmts":>11} {"loop ms":>9} {"ledger stmts":>13} {"ledger ms":>10}')
+    for count in args.groups:
+        prefix = f'g{count}'
+        user_ids = [f'{prefix}-user-{i}' for i in range(args.group_size)]
+        db.session.execute(insert(User), [
+            {'id': uid, 'username': uid, 'email': f'{uid}@example.com', 'password_hash': '-', 'name': uid}
+            for uid in user_ids
+        ])
+        group_ids = [f'{prefix}-group-{i}' for i in range(count)]
+        db.session.execute(insert(Group), [{'id': gid, 'name': gid} for gid in group_ids])
+        db.session.execute(insert(group_members), [
+            {'group_id': gid, 'user_id': uid} for gid in group_ids for uid in user_ids
+        ])
+        expenses, splits = [], []
+        for gid in group_ids:
+            for n in range(args.expenses):
+                expense_id = f'{gid}-expense-{n}'
+                amount = round(random.uniform(5, 200), 2)
+                expenses.append({
+                    'id': expense_id, 'title': 'Dinner', 'amount': amount,
+                    'paid_by': random.choice(user_ids), 'group_id': gid, 'date': datetime.utcnow()
+                })
+                splits.extend(
+                    {'id': f'{expense_id}-{uid}', 'expense_id': expense_id, 'user_id': uid,
+                     'amount': amount / len(user_ids), 'expense_date': expenses[-1]['date']}
+                    for uid in user_ids
+                )
+        db.session.execute(insert(Expense), expenses)
+        db.session.execute(insert(ExpenseSplit), splits)
+        ledger.rebuild()
+        db.session.commit()
+
+        user = db.session.get(User, user_ids[0])
+        # Both must agree before their timings mean anything
+        assert f'{per_group_loop(user)[1]:.2f}' == f'{summarize_groups(user)[1]:.2f}'
+        loop_statements, loop_ms = measure(lambda: per_group_loop(db.session.get(User, user_ids[0])))
+        ledger_statements, ledger_ms = measure(lambda: summarize_groups(db.session.get(User, user_ids[0])))
+        print(f'{count:>6} {loop_statements:>11} {loop_ms:>9.1f} {ledger_statements:>13} {ledger_ms:>10.1f}')
+
+os.remove(path)
@@ -0,0 +1,129 @@
+"""Benchmark: parallel readers and writers against each SQLite profile.
+
+Runs --writers processes alternating POST /api/expenses and
+POST /api/wallet/pay with --readers processes alternating GET
+/api/dashboard and GET /api/expenses, all on one throwaway database, for
+--seconds per profile. Each process has its own app and connections, as
+separate server workers would. Profiles:
+
+    rollback   journal_mode=DELETE, synchronous=FULL (the old defaults)
+    wal-nowait WAL with busy_timeout=0: a writer that finds the lock taken fails
+    wal        WAL with the configured busy_timeout (the default profile)
+
+    python bench_concurrency.py --writers 4 --readers 4 --seconds 5
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+PROFILES = {
+    'rollback': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL'},
+    'wal-nowait': {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_BUSY_TIMEOUT_MS': '0'},
+    'wal': {'SQLITE_JOURNAL_MODE': 'WAL'},
+}
+
+USERS = 20
+
+def user_id(n):
+    return f'user-{n:03d}'
+
+def seed():
+    from sqlalchemy import insert
+    from app import create_app
+    from app.models import db, Group, User, Wallet, group_members
+
+    app = create_app('production')
+    with app.app_context():
+        user_ids = [user_id(n) for n in range(USERS)]
+        db.session.execute(insert(User), [
+            {'id': uid, 'username': uid, 'email': f'{uid}@example.com', 'password_hash': '-', 'name': uid}
+            for uid in user_ids
+        ])
+        db.session.execute(insert(Wallet), [
+            {'id': f'wallet-{uid}', 'user_id': uid, 'balance': 1e9} for uid in user_ids
+        ])
+        db.session.execute(insert(Group), [{'id': 'group', 'name': 'Everyone'}])
+        db.session.execute(insert(group_members), [{'group_id': 'group', 'user_id': uid} for uid in user_ids])
+        db.session.commit()
+
+def work(role, worker, seconds):
+    """Issue requests for seconds; returns (role, latencies in ms, failures)"""
+    from app import create_app
+
+    app = create_app('production')
+    client = app.test_client()
+    me = user_id(worker % USERS)
+    with client.session_transaction() as session:
+        session['user_id'] = me
+
+    latencies, failures = [], 0
+    deadline = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        if role == 'write' and n % 2:
+            response = client.post('/api/wallet/pay', json={'recipient_id': user_id((worker + 1) % USERS), 'amount': 1})
+        elif role == 'write':
+            response = client.post('/api/expenses', json={
+                'title': 'Dinner', 'amount': 50, 'group_id': 'group',
+                'participants': [user_id((worker + k) % USERS) for k in range(5)]
+            })
+        elif n % 2:
+            response = client.get('/api/dashboard')
+        else:
+            response = client.get('/api/expenses')
+        latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            failures += 1
+        n += 1
+    return role, latencies, failures
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES))
+    args = parser.parse_args()
+
+    # Requests do all their writing inline, and no background workers compete
+    os.environ['NOTIFICATION_OUTBOX_ASYNC'] = '0'
+    os.environ['NOTIFICATION_RETENTION_INTERVAL'] = '0'
+    os.environ['GROUP_DELETE_WORKER'] = '0'
+
+    # Fresh interpreters, so each process reads the profile from the environment
+    context = multiprocessing.get_context('spawn')
+    print(f'{"profile":>10} {"writes/s":>9} {"failed":>7} {"write p95":>10} {"reads/s":>8} {"failed":>7} {"read p95":>9}')
+    for name in args.profiles:
+        path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+        os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+        for setting in ('SQLITE_JOURNAL_MODE', 'SQLITE_SYNCHRONOUS', 'SQLITE_BUSY_TIMEOUT_MS'):
+            os.environ.pop(setting, None)
+        os.environ.update(PROFILES[name])
+
+        with context.Pool(1) as pool:
+            pool.apply(seed)
+
+        jobs = [('write', n, args.seconds) for n in range(args.writers)]
+        jobs += [('read', n, args.seconds) for n in range(args.readers)]
+        with context.Pool(len(jobs)) as pool:
+            results = pool.starmap(work, jobs)
+
+        stats = {}
+        for role in ('write', 'read'):
+            latencies = [ms for r, values, _ in results if r == role for ms in values]
+            failed = sum(f for r, _, f in results if r == role)
+            # Throughput counts only requests that succeeded
+            stats[role] = ((len(latencies) - failed) / args.seconds, failed, percentile(latencies, 0.95))
+        (writes, write_failed, write_p95), (reads, read_failed, read_p95) = stats['write'], stats['read']
+        print(f'{name:>10} {writes:>9.0f} {write_failed:>7} {write_p95:>8.1f}ms {reads:>8.0f} {read_failed:>7} {read_p95:>7.1f}ms')
+
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
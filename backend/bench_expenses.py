@@ -0,0 +1,109 @@
+"""Benchmark: POST /api/expenses with 10, 1k and 10k participants.
+
+Fills a throwaway SQLite database with one group per size, then times
+creating an expense split across every member through the endpoint,
+against the way add_expense used to do it (a primary key get per
+participant and one ExpenseSplit object per share). Both include queuing
+and writing the participants' notifications.
+
+    python bench_expenses.py --sizes 10 1000 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 10000])
+parser.add_argument('--repeat', type=int, default=3)
+args = parser.parse_args()
+
+path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+# Write notifications inline so both paths pay for them inside the timing
+os.environ['NOTIFICATION_OUTBOX_ASYNC'] = '0'
+
+from sqlalchemy import func, insert, select
+from app import create_app
+from app.models import db, Expense, ExpenseSplit, Group, User, group_members
+from app.services import categories, ledger, outbox, rollups
+from app.utils.helpers import generate_id
+
+app = create_app('production')
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+def per_row(payer, participant_ids, group_id, amount):
+    """The previous implementation"""
+    participants = []
+    for pid in participant_ids:
+        p = db.session.get(User, pid)
+        if p:
+            participants.append(p)
+    expense = Expense(
+        id=generate_id(), title='Event tickets', category=categories.classify('Event tickets'),
+        amount=amount, paid_by=payer.id, group_id=group_id
+    )
+    db.session.add(expense)
+    splits = []
+    for participant in participants:
+        split = ExpenseSplit(
+            id=generate_id(), expense_id=expense.id, user_id=participant.id,
+            amount=amount / len(participants)
+        )
+        db.session.add(split)
+        splits.append(split)
+    shares = [(split.user_id, split.amount) for split in splits]
+    ledger.record_expense(expense, shares)
+    rollups.record_expense(expense, shares)
+    outbox.enqueue([p.id for p in participants if p.id != payer.id], 'Payer added "Event tickets"')
+    db.session.commit()
+    outbox.wake()
+
+with app.app_context():
+    client = app.test_client()
+    print(f'{"participants":>12} {"per-row ORM":>14} {"endpoint":>12}   (ms, best of {args.repeat})')
+    for size in args.sizes:
+        user_ids = [f'user-{size}-{i:06d}' for i in range(size)]
+        group_id = f'group-{size}'
+        db.session.execute(insert(User), [
+            {'id': uid, 'username': uid, 'email': f'{uid}@example.com', 'password_hash': '-', 'name': uid}
+            for uid in user_ids
+        ])
+        db.session.execute(insert(Group), [{'id': group_id, 'name': f'Group {size}'}])
+        db.session.execute(insert(group_members), [{'group_id': group_id, 'user_id': uid} for uid in user_ids])
+        db.session.commit()
+
+        payer = db.session.get(User, user_ids[0])
+        with client.session_transaction() as session:
+            session['user_id'] = payer.id
+        body = {'title': 'Event tickets', 'amount': 1234.56, 'group_id': group_id, 'participants': user_ids}
+
+        old_ms = min(
+            timed(lambda: per_row(payer, user_ids, group_id, body['amount']))[1] for _ in range(args.repeat)
+        )
+        db.session.expunge_all()
+
+        def post():
+            response = client.post('/api/expenses', json=body)
+            assert response.status_code == 201, response.get_json()
+        new_ms = min(timed(post)[1] for _ in range(args.repeat))
+        print(f'{size:>12} {old_ms:>14.1f} {new_ms:>12.1f}')
+
+    # Every endpoint-created expense splits to exact cents
+    mismatched = db.session.scalar(
+        select(func.count()).select_from(
+            select(Expense.id)
+            .join(ExpenseSplit, ExpenseSplit.expense_id == Expense.id)
+            .where(Expense.title == 'Event tickets')
+            .group_by(Expense.id)
+            .having(func.round(func.sum(ExpenseSplit.amount) * 100) != func.round(func.max(Expense.amount) * 100))
+            .subquery()
+        )
+    )
+    print(f'Expenses whose splits miss the total by a cent or more: {mismatched}')
+
+os.remove(path)
@@ -0,0 +1,96 @@
+"""Benchmark: POST /api/expenses/import throughput against the 100k/minute target.
+
+Fills a throwaway SQLite database with a few groups, streams --rows NDJSON
+(or CSV) expenses through the endpoint in one request and reports
+expenses per minute. Half the rows split across a whole group and half
+name their payer and participants by username.
+
+    python bench_import.py --rows 100000 --format ndjson
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--rows', type=int, default=100000)
+parser.add_argument('--format', choices=('ndjson', 'csv'), default='ndjson')
+parser.add_argument('--chunk-size', type=int, default=1000)
+parser.add_argument('--groups', type=int, default=20)
+parser.add_argument('--group-size', type=int, default=5)
+args = parser.parse_args()
+
+path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+os.environ['NOTIFICATION_OUTBOX_ASYNC'] = '0'
+
+from sqlalchemy import func, insert, select
+from app import create_app
+from app.models import db, Expense, Group, User, group_members
+
+TITLES = ['Dinner', 'Groceries', 'Movie tickets', 'Coffee', 'Internet bill', 'Gas', 'Taxi', 'Rent']
+
+app = create_app('production')
+
+with app.app_context():
+    random.seed(1)
+    # The importing user is in every group; the others in one group each
+    importer = 'importer'
+    users = [importer] + [f'user-{g}-{i}' for g in range(args.groups) for i in range(args.group_size - 1)]
+    db.session.execute(insert(User), [
+        {'id': uid, 'username': uid, 'email': f'{uid}@example.com', 'password_hash': '-', 'name': uid}
+        for uid in users
+    ])
+    groups = {f'group-{g}': [importer] + [f'user-{g}-{i}' for i in range(args.group_size - 1)]
+              for g in range(args.groups)}
+    db.session.execute(insert(Group), [{'id': gid, 'name': gid} for gid in groups])
+    db.session.execute(insert(group_members), [
+        {'group_id': gid, 'user_id': uid} for gid, members in groups.items() for uid in members
+    ])
+    db.session.commit()
+
+    records = []
+    for n in range(args.rows):
+        group_id, members = random.choice(list(groups.items()))
+        record = {'title': random.choice(TITLES), 'amount': round(random.uniform(5, 200), 2)}
+        if n % 2:
+            record['group_id'] = group_id
+        else:
+            record['paid_by'] = random.choice(members)
+            record['participants'] = random.sample(members, 3) if record['paid_by'] == importer \
+                else [importer] + random.sample(members[1:], 2)
+        records.append(record)
+
+    if args.format == 'ndjson':
+        body = '\n'.join(json.dumps(record) for record in records)
+        content_type = 'application/x-ndjson'
+    else:
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=['title', 'amount', 'paid_by', 'participants', 'group_id'])
+        writer.writeheader()
+        for record in records:
+            writer.writerow({**record, 'participants': ';'.join(record.get('participants', []))})
+        body = out.getvalue()
+        content_type = 'text/csv'
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = importer
+
+    started = time.perf_counter()
+    response = client.post(f'/api/expenses/import?format={args.format}&chunk_size={args.chunk_size}',
+                           data=body.encode(), content_type=content_type)
+    elapsed = time.perf_counter() - started
+    result = response.get_json()
+    assert response.status_code == 200 and not result['failed'], result
+
+    stored = db.session.scalar(select(func.count()).select_from(Expense))
+    rate = result['imported'] / elapsed * 60
+    print(f"Imported {result['imported']} expenses ({stored} stored) from {args.format} in {elapsed:.1f}s")
+    print(f"  {rate:,.0f} expenses/minute ({'meets' if rate >= 100000 else 'misses'} the 100k/minute target)")
+
+os.remove(path)
@@ -0,0 +1,82 @@
+"""Benchmark: adding members to a large group, per-row ORM vs. set-based.
+
+Fills a throwaway SQLite database with a group of --members users, then
+times adding another --add users the way add_members_to_group used to
+(a primary key get plus a scan of group.members per id) against
+memberships.add_members, and removing them again.
+
+    python bench_members.py --members 5000 --add 5000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--members', type=int, default=5000)
+parser.add_argument('--add', type=int, default=5000)
+args = parser.parse_args()
+
+path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+from sqlalchemy import insert
+from app import create_app
+from app.models import db, Group, User, group_members
+from app.services import memberships
+
+app = create_app('production')
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+with app.app_context():
+    user_ids = [f'user-{i:06d}' for i in range(args.members + args.add)]
+    db.session.execute(insert(User), [
+        {'id': uid, 'username': uid, 'email': f'{uid}@example.com', 'password_hash': '-', 'name': uid}
+        for uid in user_ids
+    ])
+    db.session.execute(insert(Group), [{'id': 'group', 'name': 'Group'}])
+    db.session.execute(insert(group_members), [
+        {'group_id': 'group', 'user_id': uid} for uid in user_ids[:args.members]
+    ])
+    db.session.commit()
+    # A third of the requested ids are already members, as when re-inviting a list
+    request_ids = user_ids[args.members // 2:]
+
+    def per_row():
+        """The previous implementation"""
+        group = db.session.get(Group, 'group')
+        added = 0
+        for member_id in request_ids:
+            member = db.session.get(User, member_id)
+            if member and member not in group.members:
+                group.members.append(member)
+                added += 1
+        db.session.flush()
+        return added
+
+    def set_based():
+        added = memberships.add_members('group', request_ids)
+        db.session.flush()
+        return len(added)
+
+    def remove():
+        removed = memberships.remove_members('group', user_ids[args.members:])
+        db.session.flush()
+        return len(removed)
+
+    print(f'Adding {len(request_ids)} ids ({args.add} new) to a {args.members}-member group:')
+    added, per_row_ms = timed(per_row)
+    db.session.rollback()
+    db.session.expunge_all()
+    print(f'  per-row ORM {per_row_ms:9.1f} ms ({added} added)')
+    added, set_ms = timed(set_based)
+    print(f'  set-based   {set_ms:9.1f} ms ({added} added)')
+    removed, remove_ms = timed(remove)
+    db.session.rollback()
+    print(f'Removing {args.add} members: {remove_ms:.1f} ms ({removed} removed)')
+
+os.remove(path)
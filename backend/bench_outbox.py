@@ -0,0 +1,97 @@
+"""Benchmark: notification writes inline in each request vs through the outbox.
+
+Fills a throwaway SQLite database with --groups groups of --group-size
+members, then simulates --requests request transactions that each
+announce one change: every --group-every'th to a whole group, the rest
+to --recipients users. Reports the per-request cost of writing the
+notifications inline, of committing an outbox intent instead, and how
+fast the flusher then turns the intents into notifications.
+
+    python bench_outbox.py --requests 10000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--requests', type=int, default=10000)
+parser.add_argument('--recipients', type=int, default=1)
+parser.add_argument('--groups', type=int, default=50)
+parser.add_argument('--group-size', type=int, default=200)
+parser.add_argument('--group-every', type=int, default=200)
+args = parser.parse_args()
+
+path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+# The flusher is driven by hand below
+os.environ['NOTIFICATION_OUTBOX_ASYNC'] = '0'
+os.environ['NOTIFICATION_RETENTION_INTERVAL'] = '0'
+os.environ['GROUP_DELETE_WORKER'] = '0'
+
+from sqlalchemy import delete, func, insert, select
+from app import create_app
+from app.models import db, Group, Notification, NotificationCounter, User, group_members
+from app.services import outbox
+
+app = create_app('production')
+
+def announcements():
+    """(user_ids, group_id) per simulated request, the same for both runs"""
+    random.seed(1)
+    for n in range(args.requests):
+        if n % args.group_every == 0:
+            yield None, f'group-{random.randrange(args.groups)}'
+        else:
+            yield random.sample(user_ids, args.recipients), None
+
+def notification_count():
+    return db.session.scalar(select(func.count()).select_from(Notification))
+
+with app.app_context():
+    user_ids = [f'user-{n:06d}' for n in range(args.groups * args.group_size)]
+    db.session.execute(insert(User), [
+        {'id': uid, 'username': uid, 'email': f'{uid}@example.com', 'password_hash': '-', 'name': uid}
+        for uid in user_ids
+    ])
+    db.session.execute(insert(Group), [{'id': f'group-{g}', 'name': f'Group {g}'} for g in range(args.groups)])
+    db.session.execute(insert(group_members), [
+        {'group_id': f'group-{g}', 'user_id': user_ids[g * args.group_size + m]}
+        for g in range(args.groups) for m in range(args.group_size)
+    ])
+    db.session.commit()
+    
+    # Inline: each request writes its notifications before committing
+    started = time.perf_counter()
+    for recipients, group_id in announcements():
+        outbox.write_batch([(recipients, group_id, 'Something changed', 'info', [])])
+        db.session.commit()
+    inline = time.perf_counter() - started
+    written = notification_count()
+    print(f'inline   {inline * 1e6 / args.requests:>8.0f}us/request  {written} notifications')
+    
+    db.session.execute(delete(Notification))
+    db.session.execute(delete(NotificationCounter))
+    db.session.commit()
+    
+    # Outbox: each request commits one intent; the flusher writes them in batches
+    started = time.perf_counter()
+    for recipients, group_id in announcements():
+        if group_id:
+            outbox.enqueue_group(group_id, 'Something changed')
+        else:
+            outbox.enqueue(recipients, 'Something changed')
+        db.session.commit()
+    enqueued = time.perf_counter() - started
+    started = time.perf_counter()
+    intents = outbox.flush()
+    drained = time.perf_counter() - started
+    assert notification_count() == written
+    print(f'outbox   {enqueued * 1e6 / args.requests:>8.0f}us/request  {intents} intents flushed in '
+          f'{drained:.2f}s ({written / drained:,.0f} notifications/s, '
+          f'batches of {app.config["NOTIFICATION_OUTBOX_BATCH_SIZE"]})')
+
+for suffix in ('', '-wal', '-shm'):
+    if os.path.exists(path + suffix):
+        os.remove(path + suffix)
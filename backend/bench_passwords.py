@@ -0,0 +1,145 @@
+"""Load test: /dashboard latency during a burst of concurrent logins.
+
+Fires --concurrency logins at once from as many threads (one request
+thread each, as a threaded server would run them) while --readers
+threads keep requesting an authenticated GET /api/dashboard until the
+burst is over. Each round reports how many logins succeeded, how many
+were shed with 503 + Retry-After, login p95, and the p99 of the
+/dashboard requests that ran alongside. Rounds:
+
+    idle    no logins, the /dashboard baseline
+    inline  PASSWORD_HASH_WORKERS=0: logins hash on the request threads
+    pool    --workers hashing processes, once per size in --queue-sizes
+
+With W workers and queue size Q, at most W + Q logins are accepted at a
+time; the rest get a 503 after PASSWORD_HASH_QUEUE_TIMEOUT instead of
+piling up behind them.
+
+    python bench_passwords.py --workers 2 --queue-sizes 0 8 32 --concurrency 48 --readers 4
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+PASSWORD = 'password123'
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+# The hashing workers (forkserver) import this file too; only the parent runs the test
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--queue-sizes', type=int, nargs='+', default=[0, 8, 32])
+    parser.add_argument('--concurrency', type=int, default=48)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--idle-seconds', type=float, default=2)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    os.environ['PASSWORD_HASH_WORKERS'] = str(args.workers)
+    os.environ['NOTIFICATION_OUTBOX_ASYNC'] = '0'
+    os.environ['NOTIFICATION_RETENTION_INTERVAL'] = '0'
+    os.environ['GROUP_DELETE_WORKER'] = '0'
+
+    from sqlalchemy import insert
+    from app import create_app
+    from app.models import db, User
+    from app.utils import passwords
+
+    app = create_app('production')
+
+    with app.app_context():
+        password_hash = passwords.hash_password(PASSWORD)
+        db.session.execute(insert(User), [
+            {'id': f'user-{n}', 'username': f'user-{n}', 'email': f'user-{n}@example.com',
+             'password_hash': password_hash, 'name': f'User {n}'}
+            for n in range(args.concurrency + args.readers)
+        ])
+        db.session.commit()
+
+    # Readers are users outside the burst with a group and some expenses to show
+    readers = []
+    for n in range(args.concurrency, args.concurrency + args.readers):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = f'user-{n}'
+        group_id = client.post('/api/groups', json={'name': f'Group {n}'}).get_json()['group']['id']
+        for k in range(20):
+            client.post('/api/expenses', json={'title': f'Dinner {k}', 'amount': 30, 'group_id': group_id})
+        readers.append(client)
+
+    def read_dashboard(client, done, latencies):
+        while not done.is_set():
+            started = time.perf_counter()
+            response = client.get('/api/dashboard')
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.get_json()
+
+    def run_round(queue_size):
+        """Burst of logins (queue_size None: no burst) with readers alongside"""
+        done = threading.Event()
+        dashboard, results = [], []
+        reader_threads = [
+            threading.Thread(target=read_dashboard, args=(client, done, dashboard)) for client in readers
+        ]
+        for thread in reader_threads:
+            thread.start()
+
+        if queue_size is None:
+            time.sleep(args.idle_seconds)
+        else:
+            start = threading.Barrier(args.concurrency)
+
+            def login(n):
+                client = app.test_client()
+                start.wait()
+                started = time.perf_counter()
+                response = client.post('/api/auth/login', json={'username': f'user-{n}', 'password': PASSWORD})
+                results.append((response.status_code, response.headers.get('Retry-After'),
+                                (time.perf_counter() - started) * 1000))
+
+            threads = [threading.Thread(target=login, args=(n,)) for n in range(args.concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        done.set()
+        for thread in reader_threads:
+            thread.join()
+        return results, dashboard
+
+    rounds = [('idle', None, None), ('inline', 0, 0)] + [('pool', args.workers, q) for q in args.queue_sizes]
+
+    print(f'{args.concurrency} concurrent logins, {args.readers} /dashboard readers, '
+          f'{app.config["PASSWORD_HASH_QUEUE_TIMEOUT"]}s queue timeout, {os.cpu_count()} CPUs')
+    print(f'{"mode":>6} {"queue":>6} {"ok":>5} {"503":>5} {"other":>6} {"login p95":>10} '
+          f'{"dashboards":>11} {"dash p50":>9} {"dash p99":>9}')
+    for mode, workers, queue_size in rounds:
+        if workers is not None:
+            app.config['PASSWORD_HASH_WORKERS'] = workers
+            app.config['PASSWORD_HASH_QUEUE_SIZE'] = queue_size
+            # A pool sized for this round, with its workers started before the clock does
+            passwords.shutdown()
+            with app.app_context():
+                passwords.verify_password(password_hash, PASSWORD)
+
+        results, dashboard = run_round(queue_size)
+
+        ok = [ms for status, _, ms in results if status == 200]
+        shed = [ms for status, retry_after, ms in results if status == 503 and retry_after]
+        other = len(results) - len(ok) - len(shed)
+        queue = '-' if mode != 'pool' else queue_size
+        logins = f'{percentile(ok, 0.95):>8.0f}ms' if results else f'{"-":>10}'
+        print(f'{mode:>6} {queue:>6} {len(ok):>5} {len(shed):>5} {other:>6} {logins} '
+              f'{len(dashboard):>11} {percentile(dashboard, 0.5):>7.1f}ms {percentile(dashboard, 0.99):>7.1f}ms')
+
+    passwords.shutdown()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
@@ -0,0 +1,102 @@
+"""Load test: idle notification streams held open against a running server.
+
+Registers a user on --url, opens --streams GET /api/notifications/stream
+connections for it with its access token, and checks that each one got
+its first frame. With the streams open it times --requests GET
+/api/dashboard calls, then makes a second user pay the first and counts
+the streams that receive the notification. Start the server first, e.g.
+with the gevent workers from gunicorn.conf.py:
+
+    gunicorn -c gunicorn.conf.py run:app
+    python bench_streams.py --url http://127.0.0.1:5000 --streams 1000
+"""
+import argparse
+import json
+import selectors
+import socket
+import time
+import uuid
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--url', default='http://127.0.0.1:5000')
+parser.add_argument('--streams', type=int, default=1000)
+parser.add_argument('--requests', type=int, default=200)
+parser.add_argument('--wait', type=float, default=10, help='seconds to wait for the notification to arrive')
+args = parser.parse_args()
+
+server = urlsplit(args.url)
+
+def call(method, path, body=None, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    data = json.dumps(body).encode() if body is not None else None
+    with urlopen(Request(args.url + path, data=data, method=method, headers=headers)) as response:
+        return json.loads(response.read())
+
+def register(prefix):
+    name = f'{prefix}-{uuid.uuid4().hex[:8]}'
+    data = call('POST', '/api/auth/register', {
+        'username': name, 'email': f'{name}@example.com', 'password': 'password123', 'name': name
+    })
+    return data['user']['id'], data['access_token']
+
+def open_stream(token):
+    """A connected stream socket, once the first frame has been read"""
+    sock = socket.create_connection((server.hostname, server.port or 80))
+    sock.sendall((
+        f'GET /api/notifications/stream HTTP/1.1\r\nHost: {server.netloc}\r\n'
+        f'Authorization: Bearer {token}\r\nAccept: text/event-stream\r\n\r\n'
+    ).encode())
+    received = b''
+    while b'retry:' not in received:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise RuntimeError(f'stream closed early: {received[:200]!r}')
+        received += chunk
+    return sock
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+user_id, token = register('streams')
+payer_id, payer_token = register('payer')
+
+started = time.perf_counter()
+streams = [open_stream(token) for _ in range(args.streams)]
+print(f'Opened {len(streams)} streams in {time.perf_counter() - started:.1f}s')
+
+latencies = []
+for _ in range(args.requests):
+    started = time.perf_counter()
+    call('GET', '/api/dashboard', token=token)
+    latencies.append((time.perf_counter() - started) * 1000)
+print(f'/dashboard with the streams open: p50 {percentile(latencies, 0.5):.1f}ms '
+      f'p99 {percentile(latencies, 0.99):.1f}ms over {args.requests} requests')
+
+call('POST', '/api/wallet/load', {'amount': 10}, token=payer_token)
+call('POST', '/api/wallet/pay', {'recipient_id': user_id, 'amount': 1}, token=payer_token)
+
+# epoll/kqueue where available: select() stops at 1024 descriptors
+selector = selectors.DefaultSelector()
+pending = {}
+for sock in streams:
+    selector.register(sock, selectors.EVENT_READ)
+    pending[sock] = b''
+delivered = 0
+deadline = time.time() + args.wait
+while pending and time.time() < deadline:
+    for key, _ in selector.select(max(0.0, deadline - time.time())):
+        sock = key.fileobj
+        pending[sock] += sock.recv(65536)
+        if b'event: notification' in pending[sock]:
+            selector.unregister(sock)
+            del pending[sock]
+            delivered += 1
+print(f'Payment notification reached {delivered} of {len(streams)} streams')
+
+for sock in streams:
+    sock.close()
@@ -0,0 +1,92 @@
+"""Benchmark: GET /api/auth/users prefix search on a large user table.
+
+Fills a throwaway SQLite database with --users users (random lowercase
+usernames, names and emails) and puts the searching user in a group
+with --group-size of them. Then reports the median and p95 latency of
+a full request for each prefix in --prefixes, for the first page and
+the next one, with and without ?exclude_group= (as the add-members
+modal sends it).
+
+    python bench_user_search.py --users 1000000 --prefixes a al ale
+"""
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--users', type=int, default=1000000)
+parser.add_argument('--group-size', type=int, default=200)
+parser.add_argument('--prefixes', nargs='+', default=['a', 'al', 'ale', 'zq'])
+parser.add_argument('--repeat', type=int, default=20)
+args = parser.parse_args()
+
+path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+os.environ['NOTIFICATION_OUTBOX_ASYNC'] = '0'
+os.environ['NOTIFICATION_RETENTION_INTERVAL'] = '0'
+os.environ['GROUP_DELETE_WORKER'] = '0'
+
+from sqlalchemy import insert
+from app import create_app
+from app.models import db, Group, User, group_members
+
+app = create_app('production')
+
+def word(length):
+    return ''.join(random.choices(string.ascii_lowercase, k=length))
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+with app.app_context():
+    random.seed(1)
+    chunk = 50000
+    for start in range(0, args.users, chunk):
+        db.session.execute(insert(User), [
+            {'id': f'user-{n:08d}', 'username': f'{word(6)}{n}', 'email': f'{word(8)}{n}@example.com',
+             'password_hash': '-', 'name': f'{word(5).title()} {word(7).title()}'}
+            for n in range(start, min(start + chunk, args.users))
+        ])
+    db.session.execute(insert(Group), [{'id': 'group', 'name': 'Group'}])
+    members = ['user-00000000'] + random.sample([f'user-{n:08d}' for n in range(1, args.users)], args.group_size)
+    db.session.execute(insert(group_members), [{'group_id': 'group', 'user_id': uid} for uid in members])
+    db.session.commit()
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql('ANALYZE')
+
+client = app.test_client()
+with client.session_transaction() as session:
+    session['user_id'] = 'user-00000000'
+
+def measure(url):
+    """(median ms, p95 ms, response json) over args.repeat requests"""
+    latencies = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.get_json()
+    return percentile(latencies, 0.5), percentile(latencies, 0.95), response.get_json()
+
+print(f'{args.users} users, caller in a group of {args.group_size + 1}')
+print(f'{"prefix":>7} {"exclude":>8} {"page":>5} {"rows":>5} {"p50":>8} {"p95":>8}')
+for prefix in args.prefixes:
+    for exclude in ('', '&exclude_group=group'):
+        url = f'/api/auth/users?q={prefix}&limit=50{exclude}'
+        # Warm the page cache for this prefix first
+        client.get(url)
+        for page in (1, 2):
+            p50, p95, data = measure(url)
+            print(f'{prefix:>7} {"yes" if exclude else "no":>8} {page:>5} {len(data["users"]):>5} '
+                  f'{p50:>6.1f}ms {p95:>6.1f}ms')
+            if not data['next_cursor']:
+                break
+            url = f'/api/auth/users?q={prefix}&limit=50{exclude}&cursor={data["next_cursor"]}'
+
+for suffix in ('', '-wal', '-shm'):
+    if os.path.exists(path + suffix):
+        os.remove(path + suffix)
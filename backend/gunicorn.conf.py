@@ -0,0 +1,28 @@
+"""gunicorn settings for serving the API in production.
+
+Workers are gevent-based, so each open /notifications/stream connection
+costs a greenlet parked on its subscription queue rather than an OS
+thread: one worker holds up to GUNICORN_WORKER_CONNECTIONS connections,
+idle streams included. gevent patches the standard library when a worker
+boots, before it imports run.py, so the background workers (outbox,
+retention, group deletion) run as greenlets too.
+
+    gunicorn -c gunicorn.conf.py run:app
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+worker_class = 'gevent'
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 2000))
+# gevent workers heartbeat from their own greenlet, so open streams don't trip this
+timeout = 30
+graceful_timeout = 30
+
+# Every worker must build its own app after gevent has patched it
+preload_app = False
+
+os.environ.setdefault('FLASK_ENV', 'production')
+if workers > 1:
+    # Notifications published in one worker must reach streams held by the others
+    os.environ.setdefault('NOTIFICATION_BROKER', 'socket')
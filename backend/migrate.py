@@ -0,0 +1,41 @@
+import argparse
+import os
+import sys
+
+# Migrations run explicitly below rather than during app startup, and nothing
+# may query the models before they have: no background workers either
+os.environ['AUTO_MIGRATE'] = '0'
+os.environ['NOTIFICATION_OUTBOX_ASYNC'] = '0'
+os.environ['NOTIFICATION_RETENTION_INTERVAL'] = '0'
+os.environ['GROUP_DELETE_WORKER'] = '0'
+
+from app import create_app, db, init_db
+from app.migrations import MIGRATIONS, applied_versions, check_query_plans, migrate
+
+parser = argparse.ArgumentParser(description='Apply pending schema migrations')
+parser.add_argument('--status', action='store_true', help='list migrations and whether they are applied')
+parser.add_argument('--check-plans', action='store_true', help='fail if a hot-path query scans a table or sorts in a temp B-tree')
+args = parser.parse_args()
+
+app = create_app()
+
+with app.app_context():
+    if args.status:
+        with db.engine.begin() as conn:
+            done = applied_versions(conn)
+        for version, name, _ in MIGRATIONS:
+            print(f"{'x' if version in done else ' '} {version:04d} {name}")
+        sys.exit(0)
+    
+    applied = migrate()
+    for version, name in applied:
+        print(f"Applied {version:04d} {name}")
+    if not applied:
+        print("Database is up to date")
+    init_db()
+    
+    if args.check_plans:
+        failures = check_query_plans()
+        for name, plan in failures.items():
+            print(f"Unindexed plan in '{name}': {'; '.join(plan)}")
+        sys.exit(1 if failures else 0)
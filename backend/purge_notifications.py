@@ -0,0 +1,16 @@
+from app import create_app, db
+from app.services import retention
+
+app = create_app()
+
+with app.app_context():
+    try:
+        report = retention.run_configured()
+        print(
+            f"Purged {report['purged']} notifications "
+            f"({report['expired']} expired, {report['read_overflow']} old read) "
+            f"in {report['batches']} batches, {report['seconds']}s"
+        )
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error purging notifications: {e}")
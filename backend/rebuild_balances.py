@@ -0,0 +1,13 @@
+from app import create_app, db
+from app.services import ledger
+
+app = create_app()
+
+with app.app_context():
+    try:
+        count = ledger.rebuild()
+        db.session.commit()
+        print(f"Rebuilt group_balances ledger ({count} rows)")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error rebuilding ledger: {e}")
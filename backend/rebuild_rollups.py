@@ -0,0 +1,15 @@
+from app import create_app, db
+from app.services import categories, rollups
+
+app = create_app()
+
+with app.app_context():
+    try:
+        # Rollups are keyed by category, so classify any rows still missing one first
+        classified = categories.backfill()
+        count = rollups.rebuild()
+        db.session.commit()
+        print(f"Rebuilt spend_rollups ({count} rows, {classified} expenses classified first)")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error rebuilding rollups: {e}")
@@ -1,7 +1,10 @@
 from app import create_app
 import os
 
-app = create_app(os.getenv('FLASK_ENV', 'development'))
+# Password hashing workers start by importing this file as __mp_main__
+# (forkserver/spawn); only the server process should build the app
+if __name__ != '__mp_main__':
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
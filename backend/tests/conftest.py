@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import event
+from app import create_app
+from app.models import db
+
+def register(client, username):
+    """Register (and log the client in as) a user; returns the user id"""
+    response = client.post('/api/auth/register', json={
+        'username': username,
+        'email': f'{username}@example.com',
+        'password': 'password123',
+        'name': username.title()
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['user']['id']
+
+class QueryCounter:
+    """Counts statements sent to the database while active"""
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+    
+    def _count(self, *_):
+        self.count += 1
+    
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+    
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+@pytest.fixture
+def app_factory():
+    """Build any number of independent testing apps, each on its own database"""
+    apps = []
+    
+    def build():
+        apps.append(create_app('testing'))
+        return apps[-1]
+    
+    yield build
+    for built in apps:
+        with built.app_context():
+            db.session.remove()
+            db.drop_all()
@@ -0,0 +1,53 @@
+from datetime import date
+from sqlalchemy import select
+from app.models import db, SpendRollup
+from app.services import rollups
+from tests.conftest import register
+
+def spend(client, query=''):
+    return client.get(f'/api/analytics?{query}').get_json()['total']
+
+def test_payments_and_settle_ups_are_not_spend(app_factory):
+    app = app_factory()
+    alice, bob = app.test_client(), app.test_client()
+    alice_id = register(alice, 'alice')
+    bob_id = register(bob, 'bob')
+    group_id = alice.post('/api/groups', json={'name': 'Trip'}).get_json()['group']['id']
+    alice.post(f'/api/groups/{group_id}/members', json={'member_ids': [bob_id]})
+    
+    alice.post('/api/expenses', json={'title': 'Dinner', 'amount': 30, 'group_id': group_id})
+    assert bob.post('/api/wallet/load', json={'amount': 100}).status_code == 200
+    assert bob.post('/api/wallet/pay', json={'recipient_id': alice_id, 'amount': 5}).status_code == 200
+    assert alice.post(f'/api/groups/{group_id}/settle-up').get_json()['transfers']
+    
+    expected = (15.0, 15.0, 30.0)
+    assert (spend(alice), spend(bob), spend(alice, f'scope=group&group_id={group_id}')) == expected
+    
+    with app.app_context():
+        rollups.rebuild()
+        db.session.commit()
+    assert (spend(alice), spend(bob), spend(alice, f'scope=group&group_id={group_id}')) == expected
+
+def test_rollup_deltas_add_to_existing_buckets_and_drop_emptied_ones(app_factory):
+    app = app_factory()
+    with app.app_context():
+        def apply(amount, sign=1):
+            deltas = rollups.RollupDeltas()
+            deltas.add_expense('group-1', 'dining', date(2024, 3, 5), amount, [('user-1', amount)])
+            deltas.apply(sign)
+        
+        def buckets():
+            return sorted(db.session.execute(select(
+                SpendRollup.scope, SpendRollup.period, SpendRollup.amount, SpendRollup.expense_count
+            )).all())
+        
+        apply(10)
+        apply(4)
+        assert buckets() == [
+            ('group', 'month', 14.0, 2), ('group', 'week', 14.0, 2),
+            ('user', 'month', 14.0, 2), ('user', 'week', 14.0, 2),
+        ]
+        apply(4, sign=-1)
+        assert {row[2:] for row in buckets()} == {(10.0, 1)}
+        apply(10, sign=-1)
+        assert buckets() == []
@@ -0,0 +1,92 @@
+import threading
+from app.utils import passwords, tokens
+from tests.conftest import register
+
+def test_login_is_shed_with_503_when_the_hash_queue_is_full(app_factory, monkeypatch):
+    app = app_factory()
+    client = app.test_client()
+    register(client, 'alice')
+    
+    # One worker, no queue, and that worker is busy
+    app.config.update(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE_SIZE=0, PASSWORD_HASH_QUEUE_TIMEOUT=0)
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(passwords, '_pool', object())
+    monkeypatch.setattr(passwords, '_slots', slots)
+    slots.acquire()
+    
+    response = client.post('/api/auth/login', json={'username': 'alice', 'password': 'password123'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    
+    slots.release()
+    app.config['PASSWORD_HASH_WORKERS'] = 0
+    response = client.post('/api/auth/login', json={'username': 'alice', 'password': 'password123'})
+    assert response.status_code == 200
+
+def test_user_search_ranks_group_mates_first_and_leaves_out_the_caller(app_factory):
+    app = app_factory()
+    alice = app.test_client()
+    register(alice, 'alice')
+    register(app.test_client(), 'alan')
+    albert_id = register(app.test_client(), 'albert')
+    group_id = alice.post('/api/groups', json={'name': 'Trip'}).get_json()['group']['id']
+    alice.post(f'/api/groups/{group_id}/members', json={'member_ids': [albert_id]})
+    
+    users = alice.get('/api/auth/users?q=al').get_json()['users']
+    assert [u['username'] for u in users] == ['albert', 'alan']
+    assert [u['username'] for u in alice.get('/api/auth/users').get_json()['users']] == ['albert', 'alan']
+
+def test_refreshed_token_carries_the_current_membership_version(app_factory):
+    app = app_factory()
+    alice = app.test_client()
+    register(alice, 'alice')
+    bob = app.test_client()
+    response = bob.post('/api/auth/register', json={
+        'username': 'bob', 'email': 'bob@example.com', 'password': 'password123', 'name': 'Bob'
+    })
+    bob_id = response.get_json()['user']['id']
+    old_token = response.get_json()['access_token']
+    
+    group_id = alice.post('/api/groups', json={'name': 'Trip'}).get_json()['group']['id']
+    alice.post(f'/api/groups/{group_id}/members', json={'member_ids': [bob_id]})
+    
+    # Bearer only, no session cookie
+    response = app.test_client().post('/api/auth/refresh', headers={'Authorization': f'Bearer {old_token}'})
+    assert response.status_code == 200
+    with app.app_context():
+        assert tokens.verify_token(old_token)['mv'] == 0
+        assert tokens.verify_token(response.get_json()['access_token'])['mv'] == 1
+
+def test_user_search_pages_through_every_match_once_and_can_exclude_a_group(app_factory):
+    app = app_factory()
+    alice = app.test_client()
+    register(alice, 'alice')
+    # 'bo' matches bob's username, Bonnie's name (username zed) and bill's email
+    bob_id = register(app.test_client(), 'bob')
+    app.test_client().post('/api/auth/register', json={
+        'username': 'zed', 'email': 'zed@example.com', 'password': 'password123', 'name': 'Bonnie'
+    })
+    app.test_client().post('/api/auth/register', json={
+        'username': 'bill', 'email': 'bo.bill@example.com', 'password': 'password123', 'name': 'Bill'
+    })
+    register(app.test_client(), 'boris')
+    group_id = alice.post('/api/groups', json={'name': 'Trip'}).get_json()['group']['id']
+    alice.post(f'/api/groups/{group_id}/members', json={'member_ids': [bob_id]})
+    
+    def search(query):
+        usernames, cursor = [], None
+        while True:
+            data = alice.get(f'/api/auth/users?{query}&limit=1' + (f'&cursor={cursor}' if cursor else '')).get_json()
+            usernames += [u['username'] for u in data['users']]
+            cursor = data['next_cursor']
+            if not cursor:
+                return usernames
+    
+    # Group mates first, then username, name and email matches
+    assert search('q=bo') == ['bob', 'boris', 'zed', 'bill']
+    assert search(f'q=bo&exclude_group={group_id}') == ['boris', 'zed', 'bill']
+    
+    other_group = app.test_client()
+    register(other_group, 'carol')
+    other_id = other_group.post('/api/groups', json={'name': 'Other'}).get_json()['group']['id']
+    assert alice.get(f'/api/auth/users?exclude_group={other_id}').status_code == 403
@@ -0,0 +1,54 @@
+from sqlalchemy import select, update
+from app.models import db, Expense
+from app.services import categories
+from tests.conftest import register
+
+def test_classifier_picks_the_highest_priority_keyword_anywhere_in_the_title():
+    classify = categories.classify
+    assert classify('Movie night and dinner') == 'dining'
+    assert classify('Cafe lunch') == 'dining'
+    assert classify('STARBUCKS') == 'coffee'
+    assert classify('Shared wifi bill') == 'internet'
+    assert classify('Rent') == categories.DEFAULT_CATEGORY
+    assert classify('') == classify(None) == categories.DEFAULT_CATEGORY
+    
+    # Overlapping keywords are all seen, not just the leftmost one
+    classifier = categories.Classifier({'short': ['axi'], 'long': ['taxi']})
+    assert classifier.classify('Taxi home') == 'short'
+    assert categories.Classifier({}).classify('Taxi') == categories.DEFAULT_CATEGORY
+
+def test_categories_are_stored_and_backfilled_without_touching_payments(app_factory):
+    app = app_factory()
+    alice, bob = app.test_client(), app.test_client()
+    register(alice, 'alice')
+    bob_id = register(bob, 'bob')
+    group_id = alice.post('/api/groups', json={'name': 'Flat'}).get_json()['group']['id']
+    alice.post(f'/api/groups/{group_id}/members', json={'member_ids': [bob_id]})
+    for title in ('Dinner at the bistro', 'Uber to the airport', 'Rent'):
+        alice.post('/api/expenses', json={'title': title, 'amount': 20, 'group_id': group_id})
+    alice.post('/api/wallet/load', json={'amount': 10})
+    alice.post('/api/wallet/pay', json={'recipient_id': bob_id, 'amount': 5})
+    
+    def stored():
+        with app.app_context():
+            return dict(db.session.execute(select(Expense.title, Expense.category)).all())
+    
+    expected = {
+        'Dinner at the bistro': 'dining',
+        'Uber to the airport': 'transport',
+        'Rent': 'other',
+    }
+    assert {t: c for t, c in stored().items() if t in expected} == expected
+    assert list(stored().values()).count(categories.PAYMENT_CATEGORY) == 1
+    listed = bob.get('/api/expenses?category=dining').get_json()['transactions']
+    assert [(e['title'], e['icon']) for e in listed] == [('Dinner at the bistro', categories.icon('dining'))]
+    
+    with app.app_context():
+        db.session.execute(update(Expense).where(Expense.category != categories.PAYMENT_CATEGORY).values(category=None))
+        db.session.commit()
+        assert categories.backfill(chunk_size=2) == 3
+        assert categories.backfill(chunk_size=2) == 0
+        # Reclassifying never turns a payment back into spend
+        assert categories.backfill(reclassify=True) == 0
+    assert {t: c for t, c in stored().items() if t in expected} == expected
+    assert list(stored().values()).count(categories.PAYMENT_CATEGORY) == 1
@@ -0,0 +1,79 @@
+from app.services.splitting import split_amounts
+from tests.conftest import register
+
+def setup_group(app):
+    """alice's group with bob in it, and carol outside it"""
+    alice = app.test_client()
+    register(alice, 'alice')
+    bob_id = register(app.test_client(), 'bob')
+    carol_id = register(app.test_client(), 'carol')
+    group_id = alice.post('/api/groups', json={'name': 'Trip'}).get_json()['group']['id']
+    alice.post(f'/api/groups/{group_id}/members', json={'member_ids': [bob_id]})
+    return alice, group_id, bob_id, carol_id
+
+def test_add_expense_rejects_malformed_values_with_400(app_factory):
+    alice, group_id, bob_id, carol_id = setup_group(app_factory())
+    bad = [
+        {'amount': 'nan'},
+        {'amount': '1e400'},
+        {'amount': 'inf'},
+        {'participants': [{'id': bob_id}]},
+        {'participants': [bob_id, carol_id]},
+        {'split_type': 'custom', 'participants': [bob_id], 'splits': {bob_id: 'nan'}},
+        {'group_id': {'id': group_id}},
+    ]
+    for fields in bad:
+        body = {'title': 'Dinner', 'amount': 30, 'group_id': group_id, **fields}
+        response = alice.post('/api/expenses', json=body)
+        assert response.status_code == 400, (fields, response.get_json())
+
+def test_batch_checks_every_entry_like_add_expense(app_factory):
+    alice, group_id, bob_id, carol_id = setup_group(app_factory())
+    entries = [
+        {'title': 'Dinner', 'amount': 30, 'group_id': group_id, 'participants': [bob_id]},
+        {'title': 'Dinner', 'amount': 30, 'group_id': group_id, 'participants': [bob_id, carol_id]},
+        {'title': 'Dinner', 'amount': 30, 'group_id': group_id, 'participants': [{'id': bob_id}]},
+        {'title': 'Dinner', 'amount': 'nan', 'group_id': group_id},
+        {'title': 'Dinner', 'amount': '1e400', 'group_id': group_id},
+        {'title': 'Dinner', 'amount': 30, 'group_id': [group_id]},
+    ]
+    response = alice.post('/api/expenses/batch', json={'expenses': entries, 'mode': 'best_effort'})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [r['success'] for r in results] == [True, False, False, False, False, False]
+    assert results[1]['error'] == 'Participants must be members of this group'
+    assert results[3]['error'] == 'amount must be a finite number'
+
+def test_batch_accepts_a_bare_array_and_rejects_other_bodies(app_factory):
+    alice, group_id, bob_id, carol_id = setup_group(app_factory())
+    entries = [{'title': f'Dinner {n}', 'amount': 30, 'group_id': group_id} for n in range(3)]
+    
+    response = alice.post('/api/expenses/batch', json=entries)
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()['created'] == 3
+    
+    response = alice.post('/api/expenses/batch?mode=best_effort', json=entries + [{'title': 'Dinner'}])
+    assert response.get_json()['created'] == 3
+    
+    for body in ('expenses', 42, None, [], {'expenses': {}}):
+        response = alice.post('/api/expenses/batch', json=body)
+        assert response.status_code == 400, (body, response.get_json())
+
+def test_equal_split_leftover_cents_rotate_by_expense():
+    participants = ['alice', 'bob', 'carol']
+    paid_extra = {pid: 0 for pid in participants}
+    for n in range(60):
+        amounts = split_amounts(100, participants, 'equal', {}, f'expense-{n}')
+        assert round(sum(amounts) * 100) == 10000
+        assert sorted(amounts) == [33.33, 33.33, 33.34]
+        assert split_amounts(100, participants, 'equal', {}, f'expense-{n}') == amounts
+        paid_extra[participants[amounts.index(33.34)]] += 1
+    
+    # Not always the first participant
+    assert all(paid_extra.values()), paid_extra
+    
+    # Two leftover cents go to neighbours, wrapping around the end
+    for n in range(20):
+        amounts = split_amounts(0.05, participants, 'equal', {}, f'expense-{n}')
+        low = amounts.index(0.01)
+        assert amounts == [0.01 if index == low else 0.02 for index in range(3)]
@@ -0,0 +1,119 @@
+from sqlalchemy import insert
+from app.models import db, User
+from tests.conftest import register
+
+def make_group(client, member_ids):
+    group_id = client.post('/api/groups', json={'name': 'Trip'}).get_json()['group']['id']
+    assert client.post(f'/api/groups/{group_id}/members', json={'member_ids': member_ids}).status_code == 200
+    return group_id
+
+def test_pairwise_balances_list_members_without_expenses(app_factory):
+    app = app_factory()
+    alice = app.test_client()
+    alice_id = register(alice, 'alice')
+    bob_id = register(app.test_client(), 'bob')
+    carol_id = register(app.test_client(), 'carol')
+    group_id = make_group(alice, [bob_id, carol_id])
+    
+    response = alice.get(f'/api/groups/{group_id}/balances')
+    assert {m['id'] for m in response.get_json()['members']} == {alice_id, bob_id, carol_id}
+    assert response.get_json()['entries'] == []
+    
+    alice.post('/api/expenses', json={'title': 'Taxi', 'amount': 10, 'group_id': group_id,
+                                      'participants': [alice_id, bob_id]})
+    body = alice.get(f'/api/groups/{group_id}/balances?format=dense').get_json()
+    members = [m['id'] for m in body['members']]
+    assert set(members) == {alice_id, bob_id, carol_id}
+    assert body['matrix'][members.index(bob_id)][members.index(alice_id)] == 5.0
+    assert sum(body['matrix'][members.index(carol_id)]) == 0
+
+def test_deleting_a_group_invalidates_former_members_cached_wallet(app_factory):
+    for query in ('', '?async=true'):
+        app = app_factory()
+        alice, bob = app.test_client(), app.test_client()
+        register(alice, 'alice')
+        bob_id = register(bob, 'bob')
+        group_id = make_group(alice, [bob_id])
+        alice.post('/api/expenses', json={'title': 'Taxi', 'amount': 10, 'group_id': group_id})
+        # Bob leaves but keeps his share of the taxi, so only the purge touches his data
+        assert alice.post(f'/api/groups/{group_id}/members/remove', json={'member_ids': [bob_id]}).status_code == 200
+        
+        cached = bob.get('/api/wallet')
+        assert cached.get_json()['raw_owed_to'] == 5.0
+        assert alice.delete(f'/api/groups/{group_id}{query}').status_code in (200, 202)
+        
+        response = bob.get('/api/wallet', headers={'If-None-Match': cached.headers['ETag']})
+        assert response.status_code == 200
+        assert response.get_json()['raw_owed_to'] == 0.0
+
+def test_settle_up_records_the_suggested_transfers(app_factory):
+    app = app_factory()
+    alice, bob, carol = app.test_client(), app.test_client(), app.test_client()
+    alice_id = register(alice, 'alice')
+    bob_id = register(bob, 'bob')
+    carol_id = register(carol, 'carol')
+    outsider = app.test_client()
+    register(outsider, 'dave')
+    group_id = make_group(alice, [bob_id, carol_id])
+    alice.post('/api/expenses', json={'title': 'Hotel', 'amount': 30, 'group_id': group_id})
+    bob.post('/api/expenses', json={'title': 'Taxi', 'amount': 12, 'group_id': group_id,
+                                    'participants': [bob_id, carol_id]})
+    
+    assert outsider.post(f'/api/groups/{group_id}/settle-up').status_code == 403
+    suggested = alice.get(f'/api/groups/{group_id}/settle-up').get_json()
+    assert not suggested['settled']
+    transfers = {(t['from']['id'], t['to']['id'], t['raw_amount']) for t in suggested['transfers']}
+    assert transfers == {(carol_id, alice_id, 16.0), (bob_id, alice_id, 4.0)}
+    
+    settled = bob.post(f'/api/groups/{group_id}/settle-up').get_json()
+    assert settled['settled']
+    assert {(t['from']['id'], t['to']['id'], t['raw_amount']) for t in settled['transfers']} == transfers
+    
+    # Nothing is left to settle
+    assert alice.get(f'/api/groups/{group_id}/settle-up').get_json()['transfers'] == []
+    for client in (alice, bob, carol):
+        assert client.get('/api/groups').get_json()['balance'] == '$0.00'
+    messages = [n['message'] for n in alice.get('/api/notifications').get_json()['notifications']]
+    assert 'Carol settled $16.00 with you' in messages
+    assert 'Bob settled $4.00 with you' in messages
+
+def test_bulk_membership_changes_skip_unknown_and_repeated_ids(app_factory):
+    app = app_factory()
+    alice, bob = app.test_client(), app.test_client()
+    alice_id = register(alice, 'alice')
+    bob_id = register(bob, 'bob')
+    seeded = [f'user-{n:04d}' for n in range(300)]
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {'id': uid, 'username': uid, 'email': f'{uid}@example.com', 'password_hash': '-', 'name': uid}
+            for uid in seeded
+        ])
+        db.session.commit()
+    group_id = make_group(alice, [bob_id])
+    
+    response = alice.post(f'/api/groups/{group_id}/members?include_members=true&limit=10',
+                          json={'member_ids': seeded + seeded[:5] + [bob_id, alice_id, 'no-such-user']})
+    body = response.get_json()
+    assert response.status_code == 200, body
+    assert sorted(m['id'] for m in body['added_members']) == seeded
+    assert body['group']['member_count'] == 302
+    assert len(body['group']['members']) == 10 and body['group']['next_cursor']
+    
+    # Paging through the members lists each exactly once
+    listed, cursor = [], ''
+    while cursor is not None:
+        page = alice.get(f'/api/groups/{group_id}/members?limit=100{cursor and "&cursor=" + cursor}').get_json()
+        listed += [m['id'] for m in page['members']]
+        cursor = page['next_cursor']
+    assert sorted(listed) == sorted(seeded + [alice_id, bob_id])
+    
+    response = alice.post(f'/api/groups/{group_id}/members/remove',
+                          json={'member_ids': seeded[::2] + [bob_id, 'no-such-user']})
+    assert sorted(response.get_json()['removed_member_ids']) == sorted(seeded[::2] + [bob_id])
+    assert response.get_json()['group']['member_count'] == 151
+    # Bob's cached group list reflects the removal straight away
+    assert group_id not in [g['id'] for g in bob.get('/api/groups').get_json()['groups']]
+    assert bob.get(f'/api/groups/{group_id}/members').status_code == 403
+    
+    too_many = alice.post(f'/api/groups/{group_id}/members', json={'member_ids': ['x'] * 10001})
+    assert too_many.status_code == 400
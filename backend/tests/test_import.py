@@ -0,0 +1,55 @@
+import json
+from sqlalchemy import func, select
+from app.models import db, Expense, ExpenseSplit
+from tests.conftest import register
+
+def import_rows(client, rows):
+    body = '\n'.join(json.dumps(row) for row in rows)
+    response = client.post('/api/expenses/import?format=ndjson', data=body,
+                           content_type='application/x-ndjson')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+def test_import_rejects_rows_the_importer_is_not_part_of(app_factory):
+    app = app_factory()
+    mallory = app.test_client()
+    register(mallory, 'mallory')
+    register(app.test_client(), 'alice')
+    register(app.test_client(), 'bob')
+    
+    result = import_rows(mallory, [
+        {'title': 'Loan', 'amount': 1000, 'paid_by': 'bob', 'participants': ['alice']},
+        {'title': 'Loan', 'amount': 1000, 'participants': ['alice', 'mallory']},
+    ])
+    assert result['imported'] == 0
+    assert [e['error'] for e in result['errors']] == [
+        'You must be the payer or a participant',
+        'paid_by and participants must share a group with you',
+    ]
+
+def test_import_checks_group_membership_and_splits_to_the_cent(app_factory):
+    app = app_factory()
+    alice = app.test_client()
+    alice_id = register(alice, 'alice')
+    bob_id = register(app.test_client(), 'bob')
+    carol_id = register(app.test_client(), 'carol')
+    register(app.test_client(), 'dave')
+    group_id = alice.post('/api/groups', json={'name': 'Flat'}).get_json()['group']['id']
+    alice.post(f'/api/groups/{group_id}/members', json={'member_ids': [bob_id, carol_id]})
+    
+    result = import_rows(alice, [
+        {'title': 'Rent', 'amount': 100, 'group_id': group_id},
+        {'title': 'Pizza', 'amount': 10, 'participants': ['bob', 'carol'], 'paid_by': 'bob'},
+        {'title': 'Taxi', 'amount': 10, 'group_id': group_id, 'participants': ['alice', 'dave']},
+        {'title': 'Taxi', 'amount': 'nan', 'group_id': group_id},
+        {'title': 'Taxi', 'amount': 5, 'participants': [{'id': bob_id}]},
+    ])
+    assert result['imported'] == 1
+    assert sorted(e['line'] for e in result['errors']) == [2, 3, 4, 5]
+    
+    with app.app_context():
+        expense = db.session.scalars(select(Expense)).one()
+        assert db.session.scalar(
+            select(func.sum(ExpenseSplit.amount)).where(ExpenseSplit.expense_id == expense.id)
+        ) == 100.0
+        assert sorted(db.session.scalars(select(ExpenseSplit.amount))) == [33.33, 33.33, 33.34]
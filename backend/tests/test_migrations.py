@@ -0,0 +1,14 @@
+from app.migrations import check_query_plans
+from app.models import db
+
+def test_hot_path_queries_read_in_index_order(app_factory):
+    app = app_factory()
+    with app.app_context():
+        assert check_query_plans() == {}
+
+def test_check_query_plans_flags_a_missing_index(app_factory):
+    app = app_factory()
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql('DROP INDEX ix_expense_splits_user_date')
+        assert 'expenses list' in check_query_plans()
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select
+from app.models import db, Notification, NotificationIntent
+from app.services import notification_list, outbox, retention, unread
+from tests.conftest import register
+
+def test_replay_resumes_inside_a_batch_sharing_one_timestamp(app_factory):
+    app = app_factory()
+    user_id = register(app.test_client(), 'alice')
+    with app.app_context():
+        created_at = datetime(2024, 1, 1)
+        db.session.execute(insert(Notification), [
+            {'id': f'n{i}', 'user_id': user_id, 'message': f'Message {i}', 'type': 'info',
+             'read': False, 'created_at': created_at}
+            for i in range(5)
+        ])
+        db.session.commit()
+        
+        last = db.session.get(Notification, 'n1')
+        replayed = db.session.scalars(notification_list.replay_query(user_id, last)).all()
+        assert [n.id for n in replayed] == ['n2', 'n3', 'n4']
+
+def test_unread_counters_upsert_and_never_go_negative(app_factory):
+    app = app_factory()
+    alice_id = register(app.test_client(), 'alice')
+    bob_id = register(app.test_client(), 'bob')
+    with app.app_context():
+        unread.add_unread({alice_id: 2})
+        unread.add_unread({alice_id: 1, bob_id: 1})
+        db.session.commit()
+        assert (unread.unread_count(alice_id), unread.unread_count(bob_id)) == (3, 1)
+        
+        unread.add_unread({alice_id: -5, bob_id: -1})
+        db.session.commit()
+        assert (unread.unread_count(alice_id), unread.unread_count(bob_id)) == (0, 0)
+
+def test_retention_counts_what_its_delete_removed(app_factory):
+    app = app_factory()
+    user_id = register(app.test_client(), 'alice')
+    with app.app_context():
+        db.session.execute(insert(Notification), [
+            {'id': f'n{i}', 'user_id': user_id, 'message': f'Message {i}', 'type': 'info',
+             'read': False, 'created_at': datetime(2024, 1, 1, 0, i)}
+            for i in range(3)
+        ])
+        unread.add_unread({user_id: 3})
+        db.session.commit()
+        
+        # Selected for purging while unread, then read before the DELETE runs
+        unread.mark_read(user_id, ids=['n0'])
+        db.session.commit()
+        assert retention.purge(['n0', 'n1']) == 2
+        assert unread.unread_count(user_id) == 1
+        
+        # Already gone: a second purge of the same batch changes nothing
+        assert retention.purge(['n0', 'n1']) == 0
+        assert unread.unread_count(user_id) == 1
+
+def test_retention_run_expires_old_rows_and_trims_read_ones(app_factory):
+    app = app_factory()
+    alice_id = register(app.test_client(), 'alice')
+    bob_id = register(app.test_client(), 'bob')
+    now = datetime.utcnow()
+    
+    def notification(id, user_id, read, created_at):
+        return {'id': id, 'user_id': user_id, 'message': id, 'type': 'info', 'read': read, 'created_at': created_at}
+    
+    with app.app_context():
+        db.session.execute(insert(Notification), [
+            # Past the 90 day limit, read or not
+            *(notification(f'old{i}', alice_id, i < 2, now - timedelta(days=200, minutes=i)) for i in range(5)),
+            # Read, two to a timestamp, so the kept boundary falls inside a tie
+            *(notification(f'r{i:02d}', alice_id, True, now - timedelta(minutes=i // 2)) for i in range(10)),
+            *(notification(f'unread{i}', alice_id, False, now - timedelta(days=30)) for i in range(4)),
+            *(notification(f'bob{i}', bob_id, True, now) for i in range(3)),
+        ])
+        unread.add_unread({alice_id: 7})
+        db.session.commit()
+        
+        report = retention.run(keep_read=3, max_age_days=90, batch_size=2)
+        assert (report['expired'], report['read_overflow'], report['purged'], report['batches']) == (5, 7, 12, 7)
+        remaining = set(db.session.scalars(select(Notification.id)))
+        assert remaining == {'r00', 'r01', 'r03', *(f'unread{i}' for i in range(4)), 'bob0', 'bob1', 'bob2'}
+        assert unread.unread_count(alice_id) == 4
+        
+        # No age limit and nothing read kept: only unread notifications survive
+        report = retention.run(keep_read=0, max_age_days=0, batch_size=100)
+        assert (report['expired'], report['read_overflow']) == (0, 6)
+        assert set(db.session.scalars(select(Notification.id))) == {f'unread{i}' for i in range(4)}
+        assert unread.unread_count(alice_id) == 4
+
+def test_outbox_intents_commit_with_the_change_and_survive_the_worker(app_factory):
+    app = app_factory()
+    alice = app.test_client()
+    register(alice, 'alice')
+    bob = app.test_client()
+    bob_id = register(bob, 'bob')
+    group_id = alice.post('/api/groups', json={'name': 'Trip'}).get_json()['group']['id']
+    alice.post(f'/api/groups/{group_id}/members', json={'member_ids': [bob_id]})
+    
+    # Written inline in testing: group fan-out leaves the author out
+    alice.post('/api/expenses', json={'title': 'Dinner', 'amount': 30, 'group_id': group_id})
+    messages = [n['message'] for n in bob.get('/api/notifications').get_json()['notifications']]
+    assert messages == ['Alice added "Dinner" ($30.00)', 'Alice added you to Trip']
+    assert alice.get('/api/notifications').get_json()['notifications'] == []
+    
+    # The process that committed the next expense dies before its flusher runs
+    app.config['NOTIFICATION_OUTBOX_ASYNC'] = True
+    alice.post('/api/expenses', json={'title': 'Taxi', 'amount': 10, 'group_id': group_id})
+    assert len(bob.get('/api/notifications').get_json()['notifications']) == 2
+    
+    with app.app_context():
+        # Intents roll back with the transaction that recorded them
+        outbox.enqueue([bob_id], 'Never committed')
+        db.session.rollback()
+        assert db.session.scalar(select(func.count()).select_from(NotificationIntent)) == 1
+        
+        # Any other worker's flusher writes the committed one, exactly once
+        assert outbox.flush() == 1
+        assert outbox.flush() == 0
+    messages = [n['message'] for n in bob.get('/api/notifications').get_json()['notifications']]
+    assert messages[0] == 'Alice added "Taxi" ($10.00)'
+    assert len(messages) == 3
+    assert bob.get('/api/notifications/unread-count').get_json()['unread'] == 3
@@ -0,0 +1,54 @@
+"""Statement counts of the wallet and dashboard reads must not grow with history"""
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import insert
+from app.models import db, Expense, ExpenseSplit, Group, group_members
+from app.services import ledger
+from tests.conftest import QueryCounter, register
+
+def seed_history(user_id, other_id, count):
+    """count group expenses split between the two users, half paid by each"""
+    db.session.execute(insert(Group), [{'id': 'group-1', 'name': 'Trip'}])
+    db.session.execute(insert(group_members), [
+        {'group_id': 'group-1', 'user_id': user_id},
+        {'group_id': 'group-1', 'user_id': other_id}
+    ])
+    start = datetime(2025, 1, 1)
+    expenses, splits = [], []
+    for n in range(count):
+        date = start + timedelta(minutes=n)
+        expenses.append({
+            'id': f'expense-{n}', 'title': 'Dinner', 'category': 'dining', 'amount': 20.0,
+            'paid_by': user_id if n % 2 else other_id, 'group_id': 'group-1', 'date': date
+        })
+        splits.extend(
+            {'id': f'split-{n}-{uid}', 'expense_id': f'expense-{n}', 'user_id': uid,
+             'amount': 10.0, 'expense_date': date}
+            for uid in (user_id, other_id)
+        )
+    db.session.execute(insert(Expense), expenses)
+    db.session.execute(insert(ExpenseSplit), splits)
+    ledger.rebuild()
+    db.session.commit()
+
+def statements_for(app, splits, path):
+    client = app.test_client()
+    user_id = register(client, 'alice')
+    other_id = register(app.test_client(), 'bob')
+    with app.app_context():
+        seed_history(user_id, other_id, splits)
+    
+    # Warm the current-user and membership caches as a running server would
+    assert client.get(path).status_code == 200
+    with app.app_context():
+        with QueryCounter(db.engine) as counter:
+            response = client.get(path)
+    assert response.status_code == 200
+    return counter.count
+
+@pytest.mark.parametrize('path,limit', [('/api/wallet', 3), ('/api/dashboard', 4)])
+def test_statement_count_is_constant_at_10k_splits(path, limit, app_factory):
+    small = statements_for(app_factory(), 10, path)
+    large = statements_for(app_factory(), 10000, path)
+    assert large == small
+    assert large <= limit
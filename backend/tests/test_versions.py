@@ -0,0 +1,51 @@
+from tests.conftest import register
+
+ENDPOINTS = ('/api/dashboard', '/api/groups', '/api/expenses', '/api/wallet', '/api/notifications', '/api/analytics')
+
+def tags(client):
+    """The current ETag of every conditional endpoint, checked to answer 304"""
+    current = {}
+    for path in ENDPOINTS:
+        response = client.get(path)
+        assert response.status_code == 200, (path, response.get_json())
+        current[path] = response.headers['ETag']
+        assert client.get(path, headers={'If-None-Match': current[path]}).status_code == 304, path
+    return current
+
+def stale(client, before):
+    """Endpoints whose old ETag no longer gets a 304"""
+    return {
+        path for path, etag in before.items()
+        if client.get(path, headers={'If-None-Match': etag}).status_code != 304
+    }
+
+def test_writes_invalidate_the_etags_of_everyone_they_touch(app_factory):
+    app = app_factory()
+    alice, bob, carol = app.test_client(), app.test_client(), app.test_client()
+    register(alice, 'alice')
+    bob_id = register(bob, 'bob')
+    carol_id = register(carol, 'carol')
+    group_id = alice.post('/api/groups', json={'name': 'Trip'}).get_json()['group']['id']
+    alice.post(f'/api/groups/{group_id}/members', json={'member_ids': [bob_id]})
+    
+    writes = [
+        # (description, write, clients whose tags must go stale)
+        ('expense', lambda: alice.post('/api/expenses', json={
+            'title': 'Dinner', 'amount': 30, 'group_id': group_id}), (alice, bob)),
+        ('mark read', lambda: bob.post('/api/notifications/read', json={'before': '2100-01-01T00:00:00Z'}), (bob,)),
+        ('wallet load', lambda: alice.post('/api/wallet/load', json={'amount': 50}), (alice,)),
+        ('wallet pay', lambda: alice.post('/api/wallet/pay', json={
+            'recipient_id': bob_id, 'amount': 5}), (alice, bob)),
+        ('settle up', lambda: bob.post(f'/api/groups/{group_id}/settle-up'), (alice, bob)),
+        ('add member', lambda: alice.post(f'/api/groups/{group_id}/members', json={
+            'member_ids': [carol_id]}), (alice, bob, carol)),
+    ]
+    for description, write, touched in writes:
+        before = {client: tags(client) for client in (alice, bob, carol)}
+        response = write()
+        assert response.status_code in (200, 201), (description, response.get_json())
+        for client in (alice, bob, carol):
+            if client in touched:
+                assert stale(client, before[client]) == set(ENDPOINTS), description
+            else:
+                assert stale(client, before[client]) == set(), description
@@ -8,16 +8,12 @@ interface User {
   email: string;
 }
 
-interface GroupMember {
-  id: string;
-  username: string;
-  name: string;
-}
+// Wait this long after the last keystroke before searching
+const SEARCH_DEBOUNCE_MS = 300;
 
 interface Props {
   groupId: string;
   groupName: string;
-  currentMembers: GroupMember[];
   isOpen: boolean;
   onClose: () => void;
   onSuccess: () => void;
@@ -26,34 +22,55 @@ interface Props {
 export default function AddMembersModal({
   groupId,
   groupName,
-  currentMembers,
   isOpen,
   onClose,
   onSuccess,
 }: Props) {
   const [users, setUsers] = useState<User[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [query, setQuery] = useState('');
   const [selectedMembers, setSelectedMembers] = useState<Set<string>>(new Set());
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
 
   useEffect(() => {
     if (isOpen) {
-      fetchAvailableUsers();
+      setQuery('');
     }
   }, [isOpen]);
 
-  const fetchAvailableUsers = async () => {
+  useEffect(() => {
+    if (!isOpen) return;
+    const timer = setTimeout(() => fetchAvailableUsers(query.trim()), SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [isOpen, query]);
+
+  // The API leaves out existing members and returns one page at a time
+  const fetchAvailableUsers = async (search: string) => {
     try {
-      const data = await api.getAllUsers();
-      // Filter out users that are already members
-      const currentMemberIds = new Set(currentMembers.map(m => m.id));
-      const available = data.users.filter((u: User) => !currentMemberIds.has(u.id));
-      setUsers(available);
+      const data = await api.getAllUsers(search, undefined, groupId);
+      setUsers(data.users);
+      setNextCursor(data.next_cursor || null);
     } catch (err) {
       setError('Failed to load users');
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const data = await api.getAllUsers(query.trim(), nextCursor, groupId);
+      setUsers(prev => [...prev, ...data.users]);
+      setNextCursor(data.next_cursor || null);
+    } catch (err) {
+      setError('Failed to load users');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const toggleMember = (userId: string) => {
     const newSelected = new Set(selectedMembers);
     if (newSelected.has(userId)) {
@@ -97,9 +114,19 @@ export default function AddMembersModal({
           </div>
         )}
 
+        <input
+          type="search"
+          value={query}
+          onChange={(e) => setQuery(e.target.value)}
+          className="input-field mb-4"
+          placeholder="Search by name, username or email"
+        />
+
         <div className="space-y-3 mb-6 max-h-64 overflow-y-auto">
           {users.length === 0 ? (
-            <p className="text-muted-foreground text-center py-4">No available users to add</p>
+            <p className="text-muted-foreground text-center py-4">
+              {query.trim() ? 'No matching users to add' : 'No available users to add'}
+            </p>
           ) : (
             users.map(user => (
               <label key={user.id} className="flex items-center p-3 border border-border rounded-lg hover:bg-accent cursor-pointer transition-colors">
@@ -116,6 +143,15 @@ export default function AddMembersModal({
               </label>
             ))
           )}
+          {nextCursor && (
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="w-full btn-secondary"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          )}
         </div>
 
         <div className="flex gap-3">
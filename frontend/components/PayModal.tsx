@@ -1,6 +1,9 @@
 import React, { useState, useEffect } from 'react';
 import { api } from '../lib/api';
 
+// Wait this long after the last keystroke before searching
+const SEARCH_DEBOUNCE_MS = 300;
+
 interface PayModalProps {
     isOpen: boolean;
     onClose: () => void;
@@ -10,6 +13,7 @@ interface PayModalProps {
 
 export default function PayModal({ isOpen, onClose, onSuccess, maxAmount }: PayModalProps) {
     const [users, setUsers] = useState<any[]>([]);
+    const [query, setQuery] = useState('');
     const [selectedUser, setSelectedUser] = useState('');
     const [amount, setAmount] = useState('');
     const [loading, setLoading] = useState(false);
@@ -18,24 +22,28 @@ export default function PayModal({ isOpen, onClose, onSuccess, maxAmount }: PayM
 
     useEffect(() => {
         if (isOpen) {
-            fetchUsers();
+            setQuery('');
             setAmount('');
             setSelectedUser('');
             setError('');
         }
     }, [isOpen]);
 
-    const fetchUsers = async () => {
-        try {
-            const [usersData, currentUserData] = await Promise.all([
-                api.getAllUsers(),
-                api.getCurrentUser()
-            ]);
+    useEffect(() => {
+        if (!isOpen) return;
+        const timer = setTimeout(() => fetchUsers(query.trim()), SEARCH_DEBOUNCE_MS);
+        return () => clearTimeout(timer);
+    }, [isOpen, query]);
 
-            const currentUserId = currentUserData.user?.id;
-            const filteredUsers = (usersData.users || []).filter((u: any) => u.id !== currentUserId);
+    const fetchUsers = async (search: string) => {
+        try {
+            // Search results never include the current user
+            const usersData = await api.getAllUsers(search);
+            const found = usersData.users || [];
 
-            setUsers(filteredUsers);
+            setUsers(found);
+            // Drop a selection the new results no longer list
+            setSelectedUser((selected) => (found.some((u: any) => u.id === selected) ? selected : ''));
         } catch (err) {
             console.error('Failed to fetch users');
         }
@@ -83,6 +91,13 @@ export default function PayModal({ isOpen, onClose, onSuccess, maxAmount }: PayM
                 <form onSubmit={handleSubmit} className="space-y-6">
                     <div>
                         <label className="block text-sm font-medium text-foreground mb-2">Select User</label>
+                        <input
+                            type="search"
+                            value={query}
+                            onChange={(e) => setQuery(e.target.value)}
+                            className="input-field mb-2"
+                            placeholder="Search by name, username or email"
+                        />
                         <select
                             value={selectedUser}
                             onChange={(e) => setSelectedUser(e.target.value)}
@@ -63,9 +63,15 @@ export const api = {
     }
   },
 
-  getAllUsers: async () => {
+  getAllUsers: async (query?: string, cursor?: string, excludeGroupId?: string) => {
     try {
-      const response = await apiClient.get('/auth/users');
+      const response = await apiClient.get('/auth/users', {
+        params: {
+          q: query || undefined,
+          cursor: cursor || undefined,
+          exclude_group: excludeGroupId || undefined,
+        },
+      });
       return response.data;
     } catch (error) {
       handleError(error);
@@ -139,9 +145,9 @@ export const api = {
   },
 
   // Transaction endpoints
-  getTransactions: async () => {
+  getTransactions: async (cursor?: string) => {
     try {
-      const response = await apiClient.get('/transactions');
+      const response = await apiClient.get('/transactions', { params: cursor ? { cursor } : {} });
       return response.data;
     } catch (error) {
       handleError(error);
@@ -208,4 +214,25 @@ export const api = {
       handleError(error);
     }
   },
+
+  getUnreadCount: async () => {
+    try {
+      const response = await apiClient.get('/notifications/unread-count');
+      return response.data;
+    } catch (error: any) {
+      if (error.response?.status === 401) {
+        return { unread: 0 };
+      }
+      handleError(error);
+    }
+  },
+
+  markNotificationsRead: async (params: { ids?: string[]; before?: string }) => {
+    try {
+      const response = await apiClient.post('/notifications/read', params);
+      return response.data;
+    } catch (error) {
+      handleError(error);
+    }
+  },
 };
@@ -186,7 +186,6 @@ export default function Groups() {
         <AddMembersModal
           groupId={selectedGroup.id}
           groupName={selectedGroup.name}
-          currentMembers={selectedGroup.members || []}
           isOpen={isAddMembersModalOpen}
           onClose={() => {
             setIsAddMembersModalOpen(false);
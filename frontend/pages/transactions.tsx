@@ -11,6 +11,8 @@ export default function Transactions() {
     const [isModalOpen, setIsModalOpen] = useState(false);
     const [transactions, setTransactions] = useState<any[]>([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     // Filters
     const [filterDate, setFilterDate] = useState('');
@@ -26,6 +28,7 @@ export default function Transactions() {
             setLoading(true);
             const data = await api.getTransactions();
             if (data.transactions) setTransactions(data.transactions);
+            setNextCursor(data.next_cursor || null);
         } catch (error) {
             console.error('Failed to fetch transactions:', error);
         } finally {
@@ -33,6 +36,21 @@ export default function Transactions() {
         }
     };
 
+    // The API returns one page at a time; next_cursor fetches the following page
+    const loadMore = async () => {
+        if (!nextCursor) return;
+        try {
+            setLoadingMore(true);
+            const data = await api.getTransactions(nextCursor);
+            if (data.transactions) setTransactions(prev => [...prev, ...data.transactions]);
+            setNextCursor(data.next_cursor || null);
+        } catch (error) {
+            console.error('Failed to load more transactions:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleExpenseAdded = () => {
         fetchTransactions();
     };
@@ -147,6 +165,17 @@ export default function Transactions() {
                             <p className="text-muted-foreground/80">Try adjusting your filters or add a new expense.</p>
                         </div>
                     )}
+                    {!loading && nextCursor && (
+                        <div className="text-center pt-6">
+                            <button
+                                onClick={loadMore}
+                                disabled={loadingMore}
+                                className="btn-secondary"
+                            >
+                                {loadingMore ? 'Loading...' : 'Load more'}
+                            </button>
+                        </div>
+                    )}
                 </Card>
             </main>
 